@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+块大小基准测试
+比较不同块时长下采集流水线（入队 → 转换 → 写盘 + 分析回调）的CPU开销
+
+用法: python benchmarks/bench_blocksize.py [--rate 48000] [--channels 2] [--seconds 60]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from core.pipeline import (RecordingPipeline, ConvertStage, WriteStage, CallbackStage,
+                           OVERFLOW_DROP_OLDEST)
+from core.wavwriter import StreamingWavWriter
+
+
+def run_case(samplerate: int, channels: int, seconds: float, block_duration: float) -> dict:
+    """以给定块时长模拟一段录音，返回耗时统计"""
+    blocksize = max(1, int(round(samplerate * block_duration)))
+    num_blocks = max(1, int(seconds * samplerate) // blocksize)
+    source = np.random.uniform(-0.5, 0.5, (blocksize, channels)).astype(np.float32)
+
+    fd, path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        pipeline = RecordingPipeline()
+        writer = StreamingWavWriter(path, samplerate, channels,
+                                    AUDIO_CONFIG['sample_format'], AUDIO_CONFIG['dither'])
+        pipeline.add_branch('writer', [ConvertStage(writer.converter), WriteStage(writer)],
+                            AUDIO_CONFIG['queue_maxsize'], AUDIO_CONFIG['overflow_policy'])
+        pipeline.add_branch('analysis', [CallbackStage(lambda block: None)],
+                            AUDIO_CONFIG['analysis_queue_maxsize'], OVERFLOW_DROP_OLDEST)
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        pipeline.start()
+        for _ in range(num_blocks):
+            # 模拟 recorder.record() 每次返回新数组
+            block = np.empty_like(source)
+            np.copyto(block, source)
+            pipeline.push(block)
+        pipeline.close()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        os.remove(path)
+
+    audio_seconds = num_blocks * blocksize / samplerate
+    return {
+        'block_ms': block_duration * 1000,
+        'blocksize': blocksize,
+        'blocks': num_blocks,
+        'cpu_ms_per_audio_s': cpu * 1000 / audio_seconds,
+        'cpu_us_per_block': cpu * 1e6 / num_blocks,
+        'realtime_factor': audio_seconds / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="块大小CPU开销基准测试")
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'])
+    parser.add_argument('--channels', type=int, default=AUDIO_CONFIG['default_channels'])
+    parser.add_argument('--seconds', type=float, default=60.0, help="每组模拟的音频时长")
+    args = parser.parse_args()
+
+    print(f"采样率 {args.rate} Hz, {args.channels} 通道, 每组 {args.seconds:.0f} 秒音频")
+    print(f"{'块时长(ms)':>10} {'帧数/块':>8} {'块数':>7} {'CPU ms/音频秒':>14} {'CPU us/块':>10} {'实时倍数':>9}")
+    for duration in AUDIO_CONFIG['block_durations']:
+        r = run_case(args.rate, args.channels, args.seconds, duration)
+        print(f"{r['block_ms']:>10.0f} {r['blocksize']:>8} {r['blocks']:>7} "
+              f"{r['cpu_ms_per_audio_s']:>14.2f} {r['cpu_us_per_block']:>10.1f} {r['realtime_factor']:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
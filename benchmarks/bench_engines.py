@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集引擎对比基准测试
+分别用 soundcard（轮询，每次 record() 新分配数组）和 sounddevice（回调写入预分配环形缓冲区）
+采集同样时长的音频，比较 record() 返回间隔的抖动（相对块时长的偏差）和每秒音频消耗的CPU时间
+
+需要实际的音频设备；synthetic 引擎可作为无设备时的参照
+
+用法: python benchmarks/bench_engines.py [--engines soundcard sounddevice] [--seconds 10] [--block-ms 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+
+
+def create_backend(engine: str, latency: float):
+    """按名称创建采集引擎"""
+    from core.backends import SoundcardBackend, SoundDeviceBackend, SyntheticBackend
+
+    if engine == 'soundcard':
+        return SoundcardBackend()
+    if engine == 'sounddevice':
+        return SoundDeviceBackend(latency=latency, loopback=AUDIO_CONFIG['callback_loopback'])
+    return SyntheticBackend(realtime=True)
+
+
+def run(engine: str, samplerate: int, seconds: float, block_ms: float, latency: float) -> dict:
+    """采集 seconds 秒，返回抖动和CPU统计"""
+    backend = create_backend(engine, latency)
+    channels = min(2, backend.max_channels)
+    blocksize = max(1, int(round(samplerate * block_ms / 1000)))
+    intervals = []
+    frames = 0
+
+    with backend.open(samplerate, channels, blocksize) as reader:
+        reader.record(numframes=blocksize)  # 预热：设备启动时间不计入
+        cpu_start = time.process_time()
+        started = last = time.perf_counter()
+        while frames < seconds * samplerate:
+            data = reader.record(numframes=blocksize)
+            now = time.perf_counter()
+            intervals.append(now - last)
+            last = now
+            frames += len(data)
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_start
+
+    block_seconds = blocksize / samplerate
+    deviation = np.abs(np.array(intervals) - block_seconds) * 1000
+    return {
+        'engine': engine,
+        'blocks': len(intervals),
+        'jitter_p50_ms': float(np.percentile(deviation, 50)),
+        'jitter_p99_ms': float(np.percentile(deviation, 99)),
+        'jitter_max_ms': float(deviation.max()),
+        'interval_stdev_ms': statistics.pstdev(intervals) * 1000,
+        'cpu_ms_per_audio_s': cpu * 1000 / (frames / samplerate),
+        'realtime_ratio': (frames / samplerate) / wall,
+        'engine_stats': getattr(backend, 'last_stats', {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采集引擎对比基准测试")
+    parser.add_argument('--engines', nargs='+', default=['soundcard', 'sounddevice'],
+                        choices=['soundcard', 'sounddevice', 'synthetic'])
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--block-ms', type=float, default=10.0)
+    parser.add_argument('--latency-ms', type=float, default=AUDIO_CONFIG['callback_latency'] * 1000,
+                        help="sounddevice 引擎的输入延迟")
+    args = parser.parse_args()
+
+    print(f"采样率 {args.rate} Hz, 块 {args.block_ms:g} ms, 每个引擎采集 {args.seconds:g} 秒")
+    print(f"{'引擎':<12} {'块数':>6} {'抖动p50ms':>10} {'抖动p99ms':>10} {'抖动最大ms':>10} "
+          f"{'CPU ms/音频秒':>13}")
+    for engine in args.engines:
+        try:
+            result = run(engine, args.rate, args.seconds, args.block_ms, args.latency_ms / 1000)
+        except Exception as e:
+            print(f"{engine:<12} 无法运行: {e}")
+            continue
+        print(f"{engine:<12} {result['blocks']:>6} {result['jitter_p50_ms']:>10.2f} "
+              f"{result['jitter_p99_ms']:>10.2f} {result['jitter_max_ms']:>10.2f} "
+              f"{result['cpu_ms_per_audio_s']:>13.2f}")
+        if result['engine_stats']:
+            print(f"{'':<12} {result['engine_stats']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+块分发基准测试
+测量采集线程调用 RecordingPipeline.push() 把一个块分发给 N 个订阅者的耗时，
+并确认所有订阅者拿到的是同一块内存的只读视图（没有复制）；
+另有一个从不读取的慢订阅者，验证它按策略被丢弃/降级/断开，而不会让 push() 变慢
+
+用法: python benchmarks/bench_fanout.py [--subscribers 1 4 16] [--rate 48000] [--block-ms 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from core.fanout import SLOW_POLICIES, Subscription
+from core.pipeline import RecordingPipeline
+
+
+def run(subscribers: int, slow_policy: str, blocksize: int, channels: int, num_blocks: int) -> dict:
+    """分发 num_blocks 个块，返回 push() 耗时和各订阅者的统计"""
+    pipeline = RecordingPipeline()
+    fast = [Subscription(f"fast-{i}", AUDIO_CONFIG['subscriber_queue_maxsize']) for i in range(subscribers)]
+    slow = Subscription('slow', AUDIO_CONFIG['subscriber_queue_maxsize'], slow_policy)
+    for subscription in fast + [slow]:
+        pipeline.add_subscription(subscription)
+    pipeline.start()
+
+    shared = []  # 每个快订阅者是否与源块共享内存、是否只读
+    sources = []
+
+    def consume(subscription):
+        for item in subscription:
+            source = sources[item.frame // blocksize]
+            shared.append(np.shares_memory(item.data, source) and not item.data.flags.writeable)
+
+    threads = [threading.Thread(target=consume, args=(s,), daemon=True) for s in fast]
+    for thread in threads:
+        thread.start()
+
+    timings = []
+    for _ in range(num_blocks):
+        block = np.random.uniform(-1, 1, (blocksize, channels)).astype(np.float32)
+        sources.append(block)
+        started = time.perf_counter()
+        pipeline.push(block)
+        timings.append(time.perf_counter() - started)
+        time.sleep(0.0002)  # 给订阅者线程留出读取的时间
+    pipeline.close()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'push_us_median': statistics.median(timings) * 1e6,
+        'push_us_max': max(timings) * 1e6,
+        'zero_copy': all(shared) and len(shared) == subscribers * num_blocks,
+        'slow': slow.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="块分发基准测试")
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'])
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--block-ms', type=float, default=10.0)
+    parser.add_argument('--blocks', type=int, default=500)
+    args = parser.parse_args()
+
+    blocksize = max(1, int(round(args.rate * args.block_ms / 1000)))
+    print(f"块 {blocksize} 帧 × {args.channels} 通道，每个用例 {args.blocks} 块")
+    print(f"{'订阅者':>6} {'慢订阅者策略':>12} {'push中位us':>11} {'push最大us':>11} {'零拷贝':>6} "
+          f"{'慢:投递':>7} {'慢:丢弃':>7} {'慢:跳过':>7} {'慢:断开':>7}")
+    failed = False
+    for subscribers in args.subscribers:
+        for policy in SLOW_POLICIES:
+            result = run(subscribers, policy, blocksize, args.channels, args.blocks)
+            slow = result['slow']
+            print(f"{subscribers:>6} {policy:>12} {result['push_us_median']:>11.1f} "
+                  f"{result['push_us_max']:>11.1f} {'是' if result['zero_copy'] else '否':>6} "
+                  f"{slow['delivered']:>7} {slow['dropped']:>7} {slow['skipped']:>7} "
+                  f"{'是' if slow['disconnected'] else '否':>7}")
+            failed |= not result['zero_copy']
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
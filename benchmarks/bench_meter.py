@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+电平表CPU开销基准测试
+测量 LevelMeter.process() 在各采样率、通道数和块时长下每块的耗时，
+与块时长乘以 AUDIO_CONFIG['meter_cpu_budget'] 得到的预算比较；任一用例超出预算时以退出码1结束
+
+用法: python benchmarks/bench_meter.py [--rates 48000 384000] [--channels 2 8] [--budget 0.01]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from core.meter import LevelMeter
+
+
+def measure(samplerate: int, channels: int, block_duration: float, num_blocks: int) -> float:
+    """返回每块耗时的中位数（秒）"""
+    blocksize = max(1, int(round(samplerate * block_duration)))
+    block = np.random.uniform(-1.05, 1.05, (blocksize, channels)).astype(np.float32)
+    meter = LevelMeter(channels, samplerate, AUDIO_CONFIG['meter_interval'], AUDIO_CONFIG['clip_threshold'])
+    meter.process(block)  # 预热，触发缓冲区分配
+
+    timings = []
+    for _ in range(num_blocks):
+        started = time.perf_counter()
+        meter.process(block)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="电平表CPU开销基准测试")
+    parser.add_argument('--rates', type=int, nargs='+', default=[48000, 192000, 384000])
+    parser.add_argument('--channels', type=int, nargs='+', default=[2, 8])
+    parser.add_argument('--block-durations', type=float, nargs='+', default=AUDIO_CONFIG['block_durations'])
+    parser.add_argument('--blocks', type=int, default=200, help="每个用例测量的块数")
+    parser.add_argument('--budget', type=float, default=AUDIO_CONFIG['meter_cpu_budget'],
+                        help="每块耗时占块时长的上限")
+    args = parser.parse_args()
+
+    print(f"{'采样率':>8} {'通道':>4} {'块ms':>6} {'每块耗时us':>11} {'占块时长':>9}")
+    over_budget = []
+    for rate in args.rates:
+        for channels in args.channels:
+            for duration in args.block_durations:
+                per_block = measure(rate, channels, duration, args.blocks)
+                ratio = per_block / duration
+                flag = "  超出预算" if ratio > args.budget else ""
+                print(f"{rate:>8} {channels:>4} {duration * 1000:>6.0f} {per_block * 1e6:>11.1f} "
+                      f"{ratio:>8.2%}{flag}")
+                if ratio > args.budget:
+                    over_budget.append((rate, channels, duration))
+
+    print(f"\n预算: 每块耗时不超过块时长的 {args.budget:.2%}")
+    if over_budget:
+        print(f"{len(over_budget)} 个用例超出预算")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
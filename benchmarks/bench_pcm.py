@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PCM转换吞吐量基准测试
+对比原先 (x * 32767).astype(np.int16) 的做法与 PCMConverter 各输出格式的吞吐量（MB/s）
+
+用法: python benchmarks/bench_pcm.py [--rate 48000] [--channels 2] [--block-ms 50] [--seconds 120]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from core.pcm import PCMConverter, SAMPLE_FORMATS
+
+
+def legacy_convert(block: np.ndarray) -> np.ndarray:
+    """原先的转换方式：生成整块临时数组，不做饱和处理"""
+    return (block * 32767).astype(np.int16)
+
+
+def measure(convert, block: np.ndarray, num_blocks: int) -> float:
+    """返回输入数据的吞吐量（MB/s）"""
+    convert(block)  # 预热，触发缓冲区分配
+    started = time.perf_counter()
+    for _ in range(num_blocks):
+        convert(block)
+    elapsed = time.perf_counter() - started
+    return block.nbytes * num_blocks / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCM转换吞吐量基准测试")
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'])
+    parser.add_argument('--channels', type=int, default=AUDIO_CONFIG['default_channels'])
+    parser.add_argument('--block-ms', type=float, default=AUDIO_CONFIG['blocksize_factor'] * 1000)
+    parser.add_argument('--seconds', type=float, default=120.0, help="参与转换的音频总时长")
+    args = parser.parse_args()
+
+    blocksize = max(1, int(args.rate * args.block_ms / 1000))
+    num_blocks = max(1, int(args.seconds * args.rate) // blocksize)
+    block = np.random.uniform(-1.2, 1.2, (blocksize, args.channels)).astype(np.float32)
+
+    print(f"采样率 {args.rate} Hz, {args.channels} 通道, 块 {blocksize} 帧, 共 {num_blocks} 块 (float32输入)")
+    print(f"{'方式':<22} {'吞吐量 MB/s':>12} {'实时倍数':>10}")
+
+    realtime_mbps = args.rate * args.channels * 4 / 1e6
+    mbps = measure(legacy_convert, block, num_blocks)
+    print(f"{'legacy int16':<22} {mbps:>12.1f} {mbps / realtime_mbps:>9.0f}x")
+    for sample_format in SAMPLE_FORMATS:
+        for dither in (False, True):
+            if dither and sample_format == 'float32':
+                continue
+            converter = PCMConverter(sample_format, dither)
+            mbps = measure(converter.convert, block, num_blocks)
+            name = sample_format + (' + TPDF' if dither else '')
+            print(f"{name:<22} {mbps:>12.1f} {mbps / realtime_mbps:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
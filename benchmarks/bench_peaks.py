@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+波形峰值基准测试
+测量写入分支中增量计算多级峰值的开销（相对实时的倍数），
+以及不同录音时长下绘制整段/局部视图的耗时：绘制耗时应只与像素宽度有关，不随录音时长增长；
+另测量打开伴随文件和按时间定位字节偏移的耗时
+
+用法: python benchmarks/bench_peaks.py [--minutes 1 10 60] [--rate 48000] [--width 800]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from core.peaks import PeakPyramid
+
+
+def time_call(func, repeats: int) -> float:
+    """多次调用取中位数（毫秒）"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def run(minutes: float, rate: int, channels: int, blocksize: int, width: int) -> dict:
+    """生成 minutes 分钟的峰值，返回生成和绘制的耗时"""
+    total = int(minutes * 60 * rate)
+    # 一段随机噪声循环使用，避免生成数据的耗时计入
+    source = np.random.uniform(-1, 1, (rate, channels)).astype(np.float32)
+    pyramid = PeakPyramid(rate, channels)
+    started = time.perf_counter()
+    position = 0
+    while position < total:
+        offset = position % (len(source) - blocksize)
+        count = min(blocksize, total - position)
+        pyramid.process(source[offset:offset + count])
+        position += count
+    pyramid.flush()
+    ingest = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.peaks')
+        pyramid.set_index([(0, os.path.join(folder, 'bench.wav'), 80)], channels * 2)
+        pyramid.save(path)
+        size = os.path.getsize(path)
+        load_ms = time_call(lambda: PeakPyramid.load(path), 5)
+        loaded = PeakPyramid.load(path)
+        middle = total // 2
+        return {
+            'realtime_x': minutes * 60 / ingest,
+            'size_kb': size / 1024,
+            'load_ms': load_ms,
+            'full_ms': time_call(lambda: loaded.render(0, total, width), 20),
+            'zoom_ms': time_call(lambda: loaded.render(middle, middle + rate, width), 20),
+            'seek_us': time_call(lambda: loaded.seek(minutes * 30), 100) * 1000,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="波形峰值基准测试")
+    parser.add_argument('--minutes', type=float, nargs='+', default=[1, 10, 60])
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'])
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--block-ms', type=float, default=AUDIO_CONFIG['blocksize_factor'] * 1000)
+    parser.add_argument('--width', type=int, default=800, help="绘制的像素宽度")
+    args = parser.parse_args()
+
+    blocksize = max(1, int(round(args.rate * args.block_ms / 1000)))
+    print(f"块 {blocksize} 帧 × {args.channels} 通道，绘制宽度 {args.width} 像素")
+    print(f"{'时长分钟':>8} {'生成/实时':>10} {'文件KB':>9} {'打开ms':>8} "
+          f"{'全景ms':>8} {'1秒ms':>8} {'定位us':>8}")
+    for minutes in args.minutes:
+        result = run(minutes, args.rate, args.channels, blocksize, args.width)
+        print(f"{minutes:>8g} {result['realtime_x']:>9.0f}x {result['size_kb']:>9.1f} "
+              f"{result['load_ms']:>8.2f} {result['full_ms']:>8.2f} {result['zoom_ms']:>8.2f} "
+              f"{result['seek_us']:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
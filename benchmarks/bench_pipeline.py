@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集→保存流水线基准测试
+用合成信号后端驱动 AudioRecorder，遍历采样率、通道数、录制时长和写盘模式，
+记录处理速度（帧/秒）、峰值内存、停止到文件落盘的延迟以及每秒音频的CPU时间
+
+每个用例在独立子进程中运行，保证峰值内存互不干扰。结果保存为JSON，
+指定 --baseline 时与历史结果比较，任何指标变差超过容差即以退出码1结束
+
+用法:
+    python benchmarks/bench_pipeline.py --output results.json
+    python benchmarks/bench_pipeline.py --baseline results.json --output new.json
+    python benchmarks/bench_pipeline.py --quick
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import AUDIO_CONFIG
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 回归判定：指标名 -> (越大越好?, 绝对容差)，绝对容差用于过滤小数值上的噪声
+METRICS = {
+    'frames_per_s': (True, 0.0),
+    'peak_rss_mb': (False, 5.0),
+    'stop_latency_ms': (False, 20.0),
+    'cpu_ms_per_audio_s': (False, 0.5),
+}
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(samplerate: int, channels: int, seconds: float, mode: str) -> dict:
+    """在当前进程中运行一个用例"""
+    from core import AudioRecorder, SyntheticBackend
+
+    recorder = AudioRecorder(SyntheticBackend(kind='noise', channels=channels, seed=0))
+    recorder.set_streaming(mode == 'streaming')
+    # 只测量采集和写盘；峰值伴随文件不属于临时文件，也不应计入与历史基线的比较
+    recorder.set_peaks(False)
+    target = int(samplerate * seconds)
+
+    fd, path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        recorder.set_output_file(path)
+        # 由采集线程在精确的帧位置停止，各用例的帧数相同，RSS 和耗时可直接比较
+        recorder.set_frame_limit(target)
+        rss_before = peak_rss_mb()
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        recorder.start_recording(samplerate)
+        recorder.wait()
+        finished = time.perf_counter()
+        # 停止延迟从采集结束（采集线程停止计时）算起，到落盘完成为止
+        stop_at = recorder.capture_stats.stopped
+        cpu = time.process_time() - cpu_start
+        frames = recorder.frames_captured
+        file_size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+    return {
+        'samplerate': samplerate,
+        'channels': channels,
+        'seconds': seconds,
+        'mode': mode,
+        'frames': frames,
+        'frames_per_s': frames / (stop_at - started),
+        'peak_rss_mb': max(0.0, peak_rss_mb() - rss_before),
+        'stop_latency_ms': (finished - stop_at) * 1000,
+        'cpu_ms_per_audio_s': cpu * 1000 / (frames / samplerate),
+        'file_mb': file_size / 1e6,
+    }
+
+
+def case_key(result: dict) -> str:
+    """用例的唯一标识"""
+    return f"{result['mode']}/{result['samplerate']}Hz/{result['channels']}ch/{result['seconds']:g}s"
+
+
+def run_case_subprocess(samplerate: int, channels: int, seconds: float, mode: str) -> dict:
+    """在子进程中运行一个用例"""
+    spec = json.dumps({'samplerate': samplerate, 'channels': channels, 'seconds': seconds, 'mode': mode})
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', spec],
+                            check=True, capture_output=True, text=True, cwd=ROOT_DIR).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """与基线比较，返回回归描述列表"""
+    previous = {case_key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        for metric, (higher_is_better, slack) in METRICS.items():
+            new_value, old_value = result[metric], old[metric]
+            if higher_is_better:
+                worse = new_value < old_value * (1 - tolerance) - slack
+            else:
+                worse = new_value > old_value * (1 + tolerance) + slack
+            if worse:
+                regressions.append(f"{case_key(result)} {metric}: {old_value:.2f} -> {new_value:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采集→保存流水线基准测试")
+    parser.add_argument('--rates', type=int, nargs='+', default=AUDIO_CONFIG['supported_samplerates'])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--lengths', type=float, nargs='+', default=[10, 60], help="录制时长（秒）")
+    parser.add_argument('--modes', nargs='+', default=['streaming', 'memory'],
+                        choices=['streaming', 'memory'])
+    parser.add_argument('--quick', action='store_true', help="只运行 48000Hz 立体声 10 秒")
+    parser.add_argument('--output', help="结果JSON保存路径")
+    parser.add_argument('--baseline', help="用于比较的历史结果JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="相对容差（默认25%%）")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        spec = json.loads(args.run_case)
+        print(json.dumps(run_case(**spec)))
+        return 0
+
+    if args.quick:
+        args.rates, args.channels, args.lengths = [48000], [2], [10]
+
+    results = []
+    print(f"{'用例':<32} {'帧/秒':>12} {'峰值内存MB':>10} {'停止延迟ms':>10} {'CPU ms/音频秒':>13}")
+    for mode in args.modes:
+        for rate in args.rates:
+            for channels in args.channels:
+                for seconds in args.lengths:
+                    result = run_case_subprocess(rate, channels, seconds, mode)
+                    results.append(result)
+                    print(f"{case_key(result):<32} {result['frames_per_s']:>12.0f} "
+                          f"{result['peak_rss_mb']:>10.1f} {result['stop_latency_ms']:>10.1f} "
+                          f"{result['cpu_ms_per_audio_s']:>13.2f}")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'block_duration': AUDIO_CONFIG['blocksize_factor'],
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n检测到性能回归:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n未检测到性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
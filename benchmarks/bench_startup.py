@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动基准测试
+通过真实入口 main.py 启动，测量从进程启动到窗口首帧绘制的时间，以及音频设备就绪的时间；
+首帧时间的中位数超过预算，或首帧前已加载 numpy / 音频库 / 录制核心时以退出码1结束；
+为使检查结果确定，后台的设备初始化推迟到首帧之后才开始
+
+用法: python benchmarks/bench_startup.py [--runs 5] [--budget-ms 800]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 首帧前不应导入的重量级模块
+HEAVY_MODULES = ('numpy', 'soundcard', 'sounddevice', 'core.recorder')
+
+# 默认首帧时间预算（毫秒）
+DEFAULT_BUDGET_MS = 800
+
+
+def child():
+    """子进程：导入 main.py 并调用 main()，记录首帧和设备就绪时刻后退出"""
+    sys.path.insert(0, ROOT_DIR)
+    import_started = time.time()
+    import main as entry
+    import_done = time.time()
+    marks = {'import_done': import_done, 'import_started': import_started}
+    first_frame = threading.Event()
+
+    class MeasuredGUI(entry.ModernGUI):
+        """在 main() 创建的界面上挂接计时，其余流程与真实入口相同"""
+
+        def __init__(self, master):
+            super().__init__(master)
+            master.bind('<Expose>', self._on_expose, add='+')
+
+        def _load_recorder(self):
+            # 后台加载推迟到首帧之后，首帧时已加载的重量级模块只能来自界面线程的同步导入
+            first_frame.wait(10)
+            super()._load_recorder()
+
+        def _on_expose(self, event):
+            if 'first_frame' not in marks:
+                marks['first_frame'] = time.time()
+                marks['heavy_before_first_frame'] = [m for m in HEAVY_MODULES if m in sys.modules]
+                first_frame.set()
+                self._poll_ready()
+
+        def _poll_ready(self):
+            # 设备初始化完成（或失败）后结束
+            if self._recorder_result is not None or time.time() - marks['first_frame'] > 10:
+                marks['device_ready'] = time.time()
+                self.master.destroy()
+            else:
+                self.master.after(10, self._poll_ready)
+
+    entry.ModernGUI = MeasuredGUI
+    entry.main()
+    print(json.dumps(marks))
+
+
+def run_once() -> dict:
+    """启动一次子进程并返回各阶段耗时（毫秒）"""
+    started = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            check=True, capture_output=True, text=True, cwd=ROOT_DIR).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {
+        'import_ms': (marks['import_done'] - marks['import_started']) * 1000,
+        'first_frame_ms': (marks['first_frame'] - started) * 1000,
+        'device_ready_ms': (marks['device_ready'] - started) * 1000,
+        'heavy_before_first_frame': marks['heavy_before_first_frame'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="首帧时间预算")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return 0
+
+    results = [run_once() for _ in range(args.runs)]
+    for i, r in enumerate(results, 1):
+        print(f"第{i}次: 界面模块导入 {r['import_ms']:.0f} ms, 首帧 {r['first_frame_ms']:.0f} ms, "
+              f"设备就绪 {r['device_ready_ms']:.0f} ms")
+
+    first_frame = statistics.median(r['first_frame_ms'] for r in results)
+    print(f"\n首帧中位数: {first_frame:.0f} ms (预算 {args.budget_ms:.0f} ms)")
+
+    failed = False
+    heavy = sorted({m for r in results for m in r['heavy_before_first_frame']})
+    if heavy:
+        print(f"首帧前已导入重量级模块: {', '.join(heavy)}")
+        failed = True
+    if first_frame > args.budget_ms:
+        print("超出启动时间预算")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
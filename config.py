@@ -26,7 +26,32 @@ AUDIO_CONFIG = {
         88200, 96000, 176400, 192000, 352800, 384000
     ],
     'default_channels': 2,
-    'blocksize_factor': 1  # 块大小因子（秒）
+    'sample_format': 'int16',  # 输出格式: int16 / int24 / int32 / float32
+    'dither': False,  # 整数输出时添加TPDF抖动
+    'large_file_format': 'RF64',  # 数据超过4GB时升级的格式: RF64 / BW64，None表示禁用
+    'blocksize_factor': 0.05,  # 块大小因子（秒），同时决定停止延迟的上限
+    'block_durations': [0.01, 0.05, 0.25, 1.0],  # 可选的块时长（秒）
+    'queue_maxsize': 64,  # 采集队列最多缓存的块数
+    'overflow_policy': 'block',  # 队列满时的策略: block / drop_newest / drop_oldest
+    'queue_put_timeout': 1.0,  # block策略下采集线程最长等待时间（秒）
+    'analysis_queue_maxsize': 4,  # 分析（电平表/UI回调）队列长度，满时丢弃最旧的块
+    'subscriber_queue_maxsize': 16,  # 订阅者（推流、检测器等）队列长度
+    'subscriber_slow_policy': 'drop',  # 订阅者跟不上时: drop（丢弃最旧）/ degrade（隔块投递）/ disconnect（断开）
+    'meter_interval': 0.05,  # 电平表发布间隔（秒），与块大小无关
+    'clip_threshold': 0.999,  # 幅度达到此值的采样计为削波
+    'meter_cpu_budget': 0.01,  # 电平统计每块CPU时间占块时长的上限（基准测试用）
+    'arena_slab_seconds': 60,  # 内存录制时每个预分配slab容纳的时长（秒）
+    'gate_enabled': False,  # 能量门限：不保存静音段
+    'gate_threshold_db': -60.0,  # 门限（dBFS），窗口均方能量低于此值视为静音
+    'gate_hangover': 0.5,  # 声音结束后继续保留的时长（秒）
+    'gate_preroll': 0.2,  # 声音开始前一并保留的时长（秒）
+    'gate_window': 0.01,  # 能量检测窗口（秒）
+    'preroll_seconds': 10,  # 预录状态下保留的最近音频时长（秒）
+    'capture_engine': 'soundcard',  # 采集引擎: soundcard（轮询）/ sounddevice（回调写入预分配环形缓冲区）
+    'callback_latency': 0.01,  # sounddevice 引擎的输入延迟（秒），可低至几毫秒
+    'callback_loopback': True,  # sounddevice 引擎录制输出设备的回放（仅 Windows WASAPI 支持）
+    'capture_process': False,  # 在独立子进程中采集，经共享内存环形缓冲区传回（避免GIL争用）
+    'capture_ring_seconds': 2.0  # 子进程采集环形缓冲区的时长（秒）
 }
 
 # 文件配置
@@ -34,6 +59,8 @@ FILE_CONFIG = {
     'default_extension': '.wav',
     'timestamp_format': '%Y%m%d_%H%M%S',
     'filename_prefix': 'speaker_recording',
+    'rotate_minutes': None,  # 分段录制：每N分钟轮转一个文件（None表示不按时长分段）
+    'rotate_mb': None,  # 分段录制：每N MB轮转一个文件（None表示不按大小分段）
     'supported_formats': [
         ('WAV files', '*.wav'),
         ('All files', '*.*')
@@ -43,6 +70,7 @@ FILE_CONFIG = {
 # UI配置
 UI_CONFIG = {
     'themes': ['clam', 'alt', 'default'],
+    'refresh_ms': 100,  # 录制时界面轮询状态快照的间隔（毫秒）
     'fonts': {
         'title': ('微软雅黑', 14, 'bold'),
         'header': ('微软雅黑', 10, 'bold'),
@@ -65,12 +93,48 @@ UI_CONFIG = {
 PATH_CONFIG = {
     'root_dir': os.path.dirname(os.path.abspath(__file__)),
     'temp_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp'),
-    'logs_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+    'logs_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs'),
+    'device_cache': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'device_capabilities.json')
 }
 
 # 日志配置
 LOGGING_CONFIG = {
+    'enabled': False,  # 是否输出日志（命令行 --log-level 同样会启用）
     'level': 'INFO',
+    'structured': True,  # True: 每条日志一行JSON；False: 按下面的 format 输出，字段追加在消息后
+    'file': None,  # 日志文件路径，None 表示输出到标准错误
+    'stats_interval': 10.0,  # 录制期间输出统计日志的间隔（秒），0 表示只在停止时输出
     'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     'date_format': '%Y-%m-%d %H:%M:%S'
-}
\ No newline at end of file
+}
+
+# 录制服务配置（python -m core.daemon）
+DAEMON_CONFIG = {
+    'socket_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'rec.sock'),
+    'host': '127.0.0.1',  # 不支持 Unix 套接字的平台（Windows）改用本机TCP
+    'port': 8765,
+    'max_sessions': 16,
+    'max_finished_sessions': 64,  # 会话列表中保留的已结束会话数，超出时移除最早结束的
+    'poll_interval': 0.1,  # 检查各会话是否到达时长或已结束的间隔（秒）
+    'request_timeout': 30.0  # 客户端等待应答的超时（秒）
+}
+# 实时推流配置（core/streaming.py，命令行 --stream）
+STREAM_CONFIG = {
+    'protocol': 'http',  # http: 分块传输的WAV；tcp: 原始PCM
+    'host': '127.0.0.1',
+    'port': 8000,  # 0 表示由系统分配
+    'sample_format': 'int16',
+    'channels': 0,  # 1: 下混为单声道；0: 保持原始通道（HTTP 可用 ?channels= 按连接指定）
+    'rate': 0,  # 目标采样率（整数倍降采样），0 表示保持原始采样率（HTTP 可用 ?rate= 指定）
+    'queue_maxsize': 32,  # 每个监听端的缓冲块数
+    'slow_policy': 'drop',  # 监听端跟不上时的处理策略（drop / degrade / disconnect）
+    'send_timeout': 5.0  # 单次发送的超时（秒），超时的监听端被断开
+}
+
+# 波形峰值配置（core/peaks.py）
+PEAK_CONFIG = {
+    'enabled': True,  # 录制时生成 <文件名>.peaks 伴随文件（多级峰值和字节偏移索引）
+    'base_frames': 256,  # 第0级每个点覆盖的帧数
+    'factor': 4,  # 相邻两级的点数之比
+    'levels': 8  # 级数：256 帧到 256×4^7 帧（48kHz 下约 5ms 到 90s）
+}
@@ -0,0 +1,6 @@
+"""
+pytest 配置
+测试位于 tests/ 目录；根目录的 test_layout.py 是需要图形界面的手动布局脚本，不参与收集
+"""
+
+collect_ignore = ['test_layout.py']
@@ -3,7 +3,20 @@
 包含音频录制相关的核心功能
 """
 
+import logging
+
 from .recorder import AudioRecorder
+from .backends import (CaptureBackend, SoundcardBackend, SoundDeviceBackend, SyntheticBackend,
+                       WavReplayBackend)
+from .procbackend import ProcessBackend
+from .multidevice import MultiDeviceBackend
+from .aiorecorder import AsyncRecorder
+from .instrumentation import configure_logging
+
+# 未调用 configure_logging() 时不输出任何日志
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
-__all__ = ['AudioRecorder']
+__all__ = ['AudioRecorder', 'CaptureBackend', 'SoundcardBackend', 'SoundDeviceBackend',
+           'SyntheticBackend', 'WavReplayBackend', 'ProcessBackend', 'MultiDeviceBackend', 'AsyncRecorder',
+           'configure_logging']
 __version__ = '2.0.0'
\ No newline at end of file
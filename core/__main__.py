@@ -0,0 +1,11 @@
+"""
+命令行入口：python -m core
+"""
+
+import sys
+
+from .cli import main
+
+# 子进程采集使用 spawn 启动方式，会以 __mp_main__ 的名义重新导入本模块
+if __name__ == "__main__":
+    sys.exit(main())
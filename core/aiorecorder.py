@@ -0,0 +1,164 @@
+"""
+asyncio 录制接口
+把 AudioRecorder 包装为协程接口，不阻塞事件循环：
+
+    recorder = AsyncRecorder(backend)
+    await recorder.start(48000, output='out.wav')
+    async for block in recorder.blocks():
+        ...
+    path = await recorder.stop()
+
+- 采集到的块经由流水线中单独的 'async' 分支送到事件循环中的有界 asyncio.Queue；
+  消费者跟不上时分支线程等待队列空位，积压转移到分支自己的有界块队列，按溢出策略处理
+- 创建录制器、等待落盘等可能阻塞的操作放到线程池中执行
+"""
+
+import asyncio
+import concurrent.futures
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from config import AUDIO_CONFIG
+from .backends import CaptureBackend
+from .pipeline import OVERFLOW_BLOCK, PipelineStage
+from .recorder import AudioRecorder
+
+# 分支线程等待事件循环中的队列空位时，检查是否已无人读取的间隔（秒）
+_PUT_POLL_INTERVAL = 0.05
+
+
+class _AsyncQueueStage(PipelineStage):
+    """把块转交给事件循环中的队列（在分支线程中运行，队列满时在本线程等待）"""
+
+    name = 'async'
+
+    def __init__(self, owner: 'AsyncRecorder', loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.owner = owner
+        self.loop = loop
+        self.queue = queue
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        if self.owner._abandoned():
+            return block
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(block), self.loop)
+        while True:
+            try:
+                future.result(_PUT_POLL_INTERVAL)
+                break
+            except concurrent.futures.TimeoutError:
+                # 停止后已没有迭代器在读取：丢弃剩余的块，避免停止时互相等待
+                if self.owner._abandoned():
+                    future.cancel()
+                    break
+        return block
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.owner._finish, self.queue)
+
+
+class AsyncRecorder:
+    """
+    AudioRecorder 的 asyncio 接口
+    maxsize / overflow 为 'async' 分支的块队列长度和溢出策略；默认阻塞策略即背压：
+    消费者持续跟不上时采集线程最多等待 queue_put_timeout 秒后丢弃块，不会无限期停住采集
+    """
+
+    def __init__(self, backend: Optional[CaptureBackend] = None, recorder: Optional[AudioRecorder] = None,
+                 maxsize: Optional[int] = None, overflow: str = OVERFLOW_BLOCK):
+        self.backend = backend
+        self.recorder = recorder
+        self.maxsize = maxsize or AUDIO_CONFIG['queue_maxsize']
+        self.overflow = overflow
+        self._queue: Optional[asyncio.Queue] = None
+        self._ended = True
+        self._stopping = False
+        self._readers = 0
+
+    async def _get_recorder(self) -> AudioRecorder:
+        """首次使用时在线程池中创建录制器（初始化设备可能耗时）"""
+        if self.recorder is None:
+            loop = asyncio.get_running_loop()
+            self.recorder = await loop.run_in_executor(None, AudioRecorder, self.backend)
+        return self.recorder
+
+    async def start(self, samplerate: int = AUDIO_CONFIG['default_samplerate'],
+                    output: Optional[str] = None, stream_blocks: bool = True):
+        """
+        开始录制；stream_blocks=True 时采集到的块可通过 blocks() 读取，
+        此时调用方应持续迭代 blocks()（不读取的块会形成背压）
+        """
+        recorder = await self._get_recorder()
+        if recorder.is_recording:
+            raise RuntimeError("已经在录制中")
+        loop = asyncio.get_running_loop()
+        self._stopping = False
+        if stream_blocks:
+            # 事件循环侧只缓冲少量块，积压留在分支的块队列中
+            self._queue = asyncio.Queue(maxsize=2)
+            self._ended = False
+            queue = self._queue
+            recorder.add_sink('async', lambda rate, channels: [_AsyncQueueStage(self, loop, queue)],
+                              self.maxsize, self.overflow)
+        else:
+            self._queue = None
+            self._ended = True
+            recorder.remove_sink('async')
+        if output:
+            recorder.set_output_file(output)
+        started = await loop.run_in_executor(None, recorder.start_recording, samplerate)
+        if not started:
+            recorder.remove_sink('async')
+            raise RuntimeError("无法开始录制")
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        """逐块读取本次录制采集到的音频，形状 (帧数, 通道数)；录制结束后迭代结束"""
+        queue = self._queue
+        if queue is None:
+            raise RuntimeError("未开始录制或开始录制时未启用 stream_blocks")
+        self._readers += 1
+        try:
+            while not (self._ended and queue.empty()):
+                block = await queue.get()
+                if block is None:
+                    break
+                yield block
+        finally:
+            self._readers -= 1
+
+    async def wait(self):
+        """等待录制结束（来源结束或被停止）并完成落盘"""
+        recorder = await self._get_recorder()
+        await asyncio.get_running_loop().run_in_executor(None, recorder.wait)
+
+    async def stop(self) -> Optional[str]:
+        """停止录制，等待落盘完成，返回最终的文件路径（内存模式同样落盘后返回）"""
+        recorder = await self._get_recorder()
+        self._stopping = True
+        recorder.stop_recording()
+        await self.wait()
+        recorder.remove_sink('async')
+        return recorder.last_saved_file
+
+    @property
+    def is_recording(self) -> bool:
+        return self.recorder is not None and self.recorder.is_recording
+
+    def _abandoned(self) -> bool:
+        """已请求停止且没有迭代器在读取（分支线程调用，只读取标志）"""
+        return self._stopping and not self._readers
+
+    def _finish(self, queue: asyncio.Queue):
+        """分支结束（在事件循环中执行）：通知迭代器不会再有新块"""
+        if queue is not self._queue:
+            return
+        self._ended = True
+        if not queue.full():
+            queue.put_nowait(None)
+
+    async def __aenter__(self) -> 'AsyncRecorder':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.is_recording:
+            await self.stop()
@@ -0,0 +1,52 @@
+"""
+帧存储模块
+用预分配的大块numpy数组（slab）保存内存录制的音频帧，避免逐块分配和停止时的合并
+"""
+
+import numpy as np
+from typing import Iterator, List
+
+
+class FrameArena:
+    """分块预分配的帧存储区"""
+
+    def __init__(self, channels: int, slab_frames: int, dtype=None):
+        if slab_frames < 1:
+            raise ValueError(f"slab帧数必须大于0: {slab_frames}")
+        self.channels = channels
+        self.slab_frames = slab_frames
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.frames = 0
+        self._slabs: List[np.ndarray] = []
+        self._fills: List[int] = []  # 每个slab已写入的帧数
+
+    def append(self, data: np.ndarray):
+        """将一个块复制进当前slab的空闲区域（这是块在内存模式下唯一的一次复制）"""
+        if self.dtype is None:
+            # 首个块决定存储精度，与采集设备输出保持一致
+            self.dtype = np.dtype(data.dtype)
+
+        numframes = len(data)
+        if not self._slabs or self._fills[-1] + numframes > len(self._slabs[-1]):
+            # 当前slab放不下时新开一个；超长的块单独分配一个刚好容纳它的slab
+            size = max(self.slab_frames, numframes)
+            self._slabs.append(np.empty((size, self.channels), dtype=self.dtype))
+            self._fills.append(0)
+        fill = self._fills[-1]
+        self._slabs[-1][fill:fill + numframes] = data
+        self._fills[-1] += numframes
+        self.frames += numframes
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        """按顺序返回各slab中已写入部分的视图（不复制）；保存时逐个slab写盘，从不合并为连续数组"""
+        for slab, fill in zip(self._slabs, self._fills):
+            yield slab[:fill]
+
+    def clear(self):
+        """释放所有slab"""
+        self._slabs = []
+        self._fills = []
+        self.frames = 0
+
+    def __len__(self) -> int:
+        return self.frames
@@ -0,0 +1,411 @@
+"""
+采集后端模块
+把具体的音频来源从录制器中抽离出来：
+- SoundcardBackend: 通过 soundcard 录制系统扬声器回放（loopback）
+- SoundDeviceBackend: 基于 sounddevice 回调式输入流，回调直接写入预分配的环形缓冲区
+- SyntheticBackend: 生成正弦波/噪声，可快于实时运行，用于无声卡环境的测试和基准
+- WavReplayBackend: 回放WAV文件作为采集来源
+"""
+
+import threading
+import time
+import wave
+import numpy as np
+from typing import List, Optional
+
+from .devicecache import (DeviceCapabilityCache, default_output_fingerprint, device_fingerprint, probe_device,
+                          probe_devices)
+
+# 常见的采样率列表
+COMMON_RATES = [8000, 11025, 16000, 22050, 32000, 44100, 48000,
+                88200, 96000, 176400, 192000, 352800, 384000]
+
+
+class CaptureReader:
+    """采集读取器基类：open() 返回的上下文对象"""
+
+    def record(self, numframes: int) -> np.ndarray:
+        """读取 numframes 帧，返回形状 (帧数, 通道数) 的float32数组；来源结束时返回空数组"""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class CaptureBackend:
+    """采集后端基类"""
+
+    name = ""
+    max_channels = 2
+
+    @property
+    def default_channels(self) -> int:
+        """默认录制通道数（单设备最多2通道）"""
+        return min(2, self.max_channels)
+
+    def check_channels(self, channels: int):
+        """检查能否以该通道数打开，不能时抛出ValueError"""
+        if not 1 <= channels <= self.max_channels:
+            raise ValueError(f"通道数必须在 1 到 {self.max_channels} 之间: {channels}")
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        """打开采集流"""
+        raise NotImplementedError
+
+    def detect_supported_rates(self) -> List[int]:
+        """检测支持的采样率"""
+        return list(COMMON_RATES)
+
+    def cached_rates(self, cache: DeviceCapabilityCache) -> Optional[List[int]]:
+        """从设备能力缓存读取支持的采样率，未缓存时返回None"""
+        return None
+
+    def probe_capabilities(self, cache: DeviceCapabilityCache):
+        """探测设备能力并写入缓存（在后台线程中调用）"""
+        pass
+
+    def shutdown(self):
+        """释放后端占用的资源（如采集子进程）；之后不能再打开"""
+        pass
+
+
+class SoundcardBackend(CaptureBackend):
+    """基于 soundcard 的系统回放录制后端"""
+
+    def __init__(self):
+        # 延迟导入，只有实际使用声卡时才需要 soundcard
+        import soundcard as sc
+        self._sc = sc
+        try:
+            self.speaker = sc.default_speaker()
+            self.name = self.speaker.name
+            self.max_channels = self.speaker.channels
+        except Exception as e:
+            raise RuntimeError(f"无法获取默认扬声器: {e}")
+
+    def open(self, samplerate: int, channels: int, blocksize: int):
+        # 获取回放设备的麦克风接口
+        microphone = self._sc.get_microphone(id=str(self.name), include_loopback=True)
+        return microphone.recorder(samplerate=samplerate, blocksize=blocksize, channels=channels)
+
+    def detect_supported_rates(self) -> List[int]:
+        # 与设备能力缓存使用同一探测：回放录制来源的采样率，而不是输出流参数
+        try:
+            import sounddevice as sd
+
+            _, entry = probe_device(sd.default.device[1], COMMON_RATES)
+        except Exception:
+            return [44100, 48000]
+        return entry['loopback_rates'] or [44100, 48000]
+
+    def cached_rates(self, cache: DeviceCapabilityCache) -> Optional[List[int]]:
+        try:
+            fingerprint = default_output_fingerprint()
+        except Exception:
+            return None
+        entry = cache.get(fingerprint) if fingerprint else None
+        if entry and entry.get('loopback_rates'):
+            return list(entry['loopback_rates'])
+        return None
+
+    def probe_capabilities(self, cache: DeviceCapabilityCache):
+        # 探测所有设备（而不仅是默认设备），设备切换后缓存依然命中
+        for fingerprint, entry in probe_devices(COMMON_RATES).items():
+            cache.put(fingerprint, entry)
+
+
+class _CallbackReader(CaptureReader):
+    """回调式读取器：PortAudio 回调把数据复制进预分配的环形缓冲区，record() 从中取出"""
+
+    def __init__(self, backend: 'SoundDeviceBackend', samplerate: int, channels: int, blocksize: int):
+        self.backend = backend
+        self.channels = channels
+        self.capacity = max(blocksize * 4, int(backend.ring_seconds * samplerate))
+        self._ring = np.zeros((self.capacity, channels), dtype=np.float32)
+        # 单生产者（回调线程）/单消费者（采集线程）：各自只推进自己的位置
+        self._write_pos = 0
+        self._read_pos = 0
+        self._data_ready = threading.Event()
+        self.callbacks = 0
+        self.input_overflows = 0  # PortAudio 报告的输入溢出次数
+        self.ring_overflow_frames = 0  # 环形缓冲区满而丢弃的帧数
+
+        self._stream = backend._sd.InputStream(
+            device=backend.device, samplerate=samplerate, channels=channels, dtype='float32',
+            blocksize=backend.callback_frames, latency=backend.latency,
+            extra_settings=backend.extra_settings, callback=self._callback
+        )
+        self._stream.start()
+
+    def _callback(self, indata, frames, time_info, status):
+        """运行在 PortAudio 线程：只做复制和计数，不分配数组"""
+        self.callbacks += 1
+        # 只统计输入溢出；输出下溢、预充等标志与采集丢帧无关
+        if status.input_overflow:
+            self.input_overflows += 1
+        write_pos = self._write_pos
+        free = self.capacity - (write_pos - self._read_pos)
+        if frames > free:
+            self.ring_overflow_frames += frames - free
+            frames = free
+        start = write_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        self._ring[start:start + first] = indata[:first]
+        if first < frames:
+            self._ring[:frames - first] = indata[first:frames]
+        self._write_pos = write_pos + frames
+        self._data_ready.set()
+
+    def record(self, numframes: int) -> np.ndarray:
+        while self._write_pos - self._read_pos < numframes and self._stream.active:
+            self._data_ready.clear()
+            # clear() 之后再检查一次，避免错过刚好发生的回调
+            if self._write_pos - self._read_pos >= numframes:
+                break
+            self._data_ready.wait(0.5)
+
+        read_pos = self._read_pos
+        frames = min(numframes, self._write_pos - read_pos)
+        out = np.empty((frames, self.channels), dtype=np.float32)
+        start = read_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        out[:first] = self._ring[start:start + first]
+        out[first:] = self._ring[:frames - first]
+        self._read_pos = read_pos + frames
+        return out
+
+    def get_stats(self) -> dict:
+        """回调和溢出计数"""
+        return {
+            'callbacks': self.callbacks,
+            'input_overflows': self.input_overflows,
+            'ring_overflow_frames': self.ring_overflow_frames,
+            'latency': self._stream.latency,
+        }
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stream.stop()
+        self._stream.close()
+        self.backend.last_stats = self.get_stats()
+
+
+class SoundDeviceBackend(CaptureBackend):
+    """
+    基于 sounddevice 回调式输入流的采集后端
+    - latency: 输入延迟（秒，可低至几毫秒）或 'low' / 'high'
+    - callback_frames: 每次回调的帧数，0 表示由 PortAudio 决定
+    - loopback: 录制输出设备的回放（仅 WASAPI 支持）
+    """
+
+    def __init__(self, device=None, latency=0.01, callback_frames: int = 0,
+                 loopback: bool = False, ring_seconds: float = 2.0):
+        # 延迟导入，只有实际使用该后端时才需要 sounddevice
+        import sounddevice as sd
+        self._sd = sd
+        self.latency = latency
+        self.callback_frames = callback_frames
+        self.ring_seconds = ring_seconds
+        self.extra_settings = None
+        self.last_stats: dict = {}
+        try:
+            if loopback:
+                # 回放录制：以输出设备作为输入
+                self.device = sd.default.device[1] if device is None else device
+                try:
+                    self.extra_settings = sd.WasapiSettings(loopback=True)
+                except TypeError:
+                    raise RuntimeError("当前 sounddevice 版本不支持 WASAPI 回放录制")
+            else:
+                self.device = sd.default.device[0] if device is None else device
+            info = sd.query_devices(self.device)
+            self.hostapi = sd.query_hostapis(info['hostapi'])['name']
+            self._info = info
+            self.name = info['name']
+            self.max_channels = info['max_output_channels'] if loopback else info['max_input_channels']
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"无法获取音频设备: {e}")
+        self.loopback = loopback
+        if self.max_channels < 1:
+            raise RuntimeError(f"设备 {self.name} 没有可用的输入通道")
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        return _CallbackReader(self, samplerate, channels, blocksize)
+
+    def detect_supported_rates(self) -> List[int]:
+        supported = []
+        for rate in COMMON_RATES:
+            try:
+                self._sd.check_input_settings(device=self.device, samplerate=rate,
+                                              channels=min(self.max_channels, 2),
+                                              extra_settings=self.extra_settings)
+                supported.append(rate)
+            except Exception:
+                pass
+        return supported if supported else [44100, 48000]
+
+    def cached_rates(self, cache: DeviceCapabilityCache) -> Optional[List[int]]:
+        fingerprint = device_fingerprint(self._info['name'], self.hostapi,
+                                         self._info['max_input_channels'],
+                                         self._info['max_output_channels'])
+        entry = cache.get(fingerprint)
+        key = 'loopback_rates' if self.loopback else 'input_rates'
+        if entry and entry.get(key):
+            return list(entry[key])
+        return None
+
+    def probe_capabilities(self, cache: DeviceCapabilityCache):
+        for fingerprint, entry in probe_devices(COMMON_RATES).items():
+            cache.put(fingerprint, entry)
+
+
+class _PacedReader(CaptureReader):
+    """按实时速度节流的读取器基类（realtime=False 时尽可能快地产生数据）"""
+
+    def __init__(self, samplerate: int, realtime: bool):
+        self.samplerate = samplerate
+        self.realtime = realtime
+        self.frames_read = 0
+        self._started = time.perf_counter()
+
+    def _pace(self, numframes: int):
+        """实时模式下等待到这些帧"应当"到达的时刻"""
+        self.frames_read += numframes
+        if self.realtime:
+            due = self._started + self.frames_read / self.samplerate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class _SyntheticReader(_PacedReader):
+    """合成信号读取器"""
+
+    def __init__(self, backend: 'SyntheticBackend', samplerate: int, channels: int):
+        super().__init__(samplerate, backend.realtime)
+        self.backend = backend
+        self.channels = channels
+        self.total_frames = int(backend.duration * samplerate) if backend.duration else None
+        self._rng = np.random.default_rng(backend.seed)
+        # 每个通道使用略有不同的频率，便于区分声道
+        freqs = backend.frequency * (1.0 + 0.01 * np.arange(channels))
+        self._omega = (2 * np.pi * freqs / samplerate).astype(np.float64)
+        self._phase = np.zeros(channels)
+        self._ramp: Optional[np.ndarray] = None
+
+    def record(self, numframes: int) -> np.ndarray:
+        if self.total_frames is not None:
+            numframes = min(numframes, self.total_frames - self.frames_read)
+            if numframes <= 0:
+                return np.empty((0, self.channels), dtype=np.float32)
+
+        amplitude = self.backend.amplitude
+        if self.backend.kind == 'noise':
+            data = self._rng.uniform(-amplitude, amplitude, (numframes, self.channels)).astype(np.float32)
+        elif self.backend.kind == 'silence':
+            data = np.zeros((numframes, self.channels), dtype=np.float32)
+        else:
+            if self._ramp is None or len(self._ramp) < numframes:
+                self._ramp = np.arange(numframes, dtype=np.float64)[:, None]
+            phases = self._phase + self._ramp[:numframes] * self._omega
+            data = (amplitude * np.sin(phases)).astype(np.float32)
+            self._phase = (self._phase + numframes * self._omega) % (2 * np.pi)
+
+        self._pace(numframes)
+        return data
+
+
+class SyntheticBackend(CaptureBackend):
+    """合成信号后端：正弦波、白噪声或静音，任意采样率和通道数"""
+
+    KINDS = ('sine', 'noise', 'silence')
+
+    def __init__(self, kind: str = 'sine', frequency: float = 440.0, amplitude: float = 0.5,
+                 channels: int = 2, realtime: bool = False, duration: Optional[float] = None,
+                 seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"不支持的合成信号类型: {kind}")
+        self.kind = kind
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.realtime = realtime
+        self.duration = duration  # 为None时无限产生数据
+        self.seed = seed
+        self.name = f"Synthetic {kind}"
+        self.max_channels = channels
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        return _SyntheticReader(self, samplerate, channels)
+
+
+class _WavReplayReader(_PacedReader):
+    """WAV回放读取器"""
+
+    def __init__(self, backend: 'WavReplayBackend', samplerate: int, channels: int):
+        super().__init__(samplerate, backend.realtime)
+        self.backend = backend
+        self.channels = channels
+        if backend.samplerate != samplerate:
+            raise RuntimeError(f"回放文件采样率为 {backend.samplerate} Hz，与请求的 {samplerate} Hz 不一致")
+        self._wav = wave.open(backend.path, 'rb')
+        self._sampwidth = self._wav.getsampwidth()
+        self._file_channels = self._wav.getnchannels()
+
+    def _decode(self, raw: bytes) -> np.ndarray:
+        """把PCM字节解码为 [-1, 1] 的float32（与 PCMConverter 的对称缩放互逆）"""
+        full_scale = float(2 ** (8 * self._sampwidth - 1) - 1)
+        if self._sampwidth == 3:
+            packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            wide = np.zeros((len(packed), 4), dtype=np.uint8)
+            wide[:, 1:] = packed
+            samples = (wide.view('<i4').reshape(-1) >> 8) / full_scale
+        elif self._sampwidth == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128) / 127
+        else:
+            dtype = {2: '<i2', 4: '<i4'}[self._sampwidth]
+            samples = np.frombuffer(raw, dtype=dtype) / full_scale
+        samples = samples.astype(np.float32)
+        return samples.reshape(-1, self._file_channels)
+
+    def record(self, numframes: int) -> np.ndarray:
+        raw = self._wav.readframes(numframes)
+        if not raw and self.backend.loop:
+            self._wav.rewind()
+            raw = self._wav.readframes(numframes)
+        data = self._decode(raw)
+
+        # 通道数不一致时：单声道复制到各通道，多余通道截断
+        if self._file_channels != self.channels:
+            if self._file_channels == 1:
+                data = np.repeat(data, self.channels, axis=1)
+            else:
+                data = data[:, :self.channels]
+        self._pace(len(data))
+        return np.ascontiguousarray(data)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._wav.close()
+
+
+class WavReplayBackend(CaptureBackend):
+    """WAV文件回放后端"""
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        with wave.open(path, 'rb') as wf:
+            self.samplerate = wf.getframerate()
+            self.max_channels = wf.getnchannels()
+        self.name = f"Replay {path}"
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        return _WavReplayReader(self, samplerate, channels)
+
+    def detect_supported_rates(self) -> List[int]:
+        # 不做重采样，只能按文件本身的采样率回放
+        return [self.samplerate]
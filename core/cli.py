@@ -0,0 +1,241 @@
+"""
+命令行录制入口
+无需图形界面（不导入tkinter），适合服务器上的脚本化和批量录制；
+进度以JSON行输出到标准输出，收到 SIGINT/SIGTERM 时正常结束并回填文件头
+
+用法: python -m core --rate 48000 --duration 60 --output out.wav
+"""
+
+import argparse
+import functools
+import json
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from config import AUDIO_CONFIG, FILE_CONFIG, LOGGING_CONFIG, STREAM_CONFIG
+from .backends import SoundcardBackend, SoundDeviceBackend, SyntheticBackend, WavReplayBackend
+from .instrumentation import configure_logging
+from .meter import to_dbfs
+from .multidevice import MultiDeviceBackend
+from .pcm import SAMPLE_FORMATS
+from .procbackend import ProcessBackend
+from .recorder import AudioRecorder
+from .streaming import PROTOCOLS, LiveStreamServer
+
+
+def emit(event: str, **fields):
+    """输出一行机器可读的进度信息"""
+    fields['event'] = event
+    fields['time'] = round(time.time(), 3)
+    print(json.dumps(fields, ensure_ascii=False), flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数"""
+    parser = argparse.ArgumentParser(prog='python -m core', description="命令行录制系统音频")
+    parser.add_argument('--rate', type=int, default=AUDIO_CONFIG['default_samplerate'], help="采样率（Hz）")
+    parser.add_argument('--channels', type=int, help="通道数（默认为设备通道数，最多2）")
+    parser.add_argument('--duration', type=float, help="录制时长（秒），不指定则录制到收到信号为止")
+    parser.add_argument('--output', help="输出文件路径（默认按时间戳生成）")
+    parser.add_argument('--block-ms', type=float, default=AUDIO_CONFIG['blocksize_factor'] * 1000,
+                        help="采集块时长（毫秒）")
+    parser.add_argument('--format', choices=list(SAMPLE_FORMATS), default=AUDIO_CONFIG['sample_format'],
+                        help="输出采样格式")
+    parser.add_argument('--dither', action='store_true', help="整数输出时添加TPDF抖动")
+    parser.add_argument('--memory', action='store_true', help="录制期间缓存在内存中，停止后再写盘")
+    parser.add_argument('--rotate-minutes', type=float, default=FILE_CONFIG['rotate_minutes'],
+                        help="每N分钟轮转一个文件")
+    parser.add_argument('--rotate-mb', type=float, default=FILE_CONFIG['rotate_mb'],
+                        help="每N MB轮转一个文件")
+    parser.add_argument('--gate', action='store_true', help="能量门限：不保存静音段")
+    parser.add_argument('--gate-threshold-db', type=float, default=AUDIO_CONFIG['gate_threshold_db'],
+                        help="门限（dBFS）")
+    parser.add_argument('--gate-hangover', type=float, default=AUDIO_CONFIG['gate_hangover'],
+                        help="声音结束后继续保留的时长（秒）")
+    parser.add_argument('--gate-preroll', type=float, default=AUDIO_CONFIG['gate_preroll'],
+                        help="声音开始前一并保留的时长（秒）")
+    parser.add_argument('--backend', choices=['soundcard', 'sounddevice', 'synthetic', 'replay'],
+                        default=AUDIO_CONFIG['capture_engine'], help="采集来源")
+    parser.add_argument('--latency-ms', type=float, default=AUDIO_CONFIG['callback_latency'] * 1000,
+                        help="sounddevice 引擎的输入延迟（毫秒）")
+    parser.add_argument('--process', action='store_true', default=AUDIO_CONFIG['capture_process'],
+                        help="在独立子进程中采集（共享内存传输）")
+    parser.add_argument('--mic', action='append', default=[], metavar='DEVICE',
+                        help="同时录制的输入设备（sounddevice 设备名或编号，可重复）；"
+                             "与 --backend 指定的来源对齐后合并为一个多通道文件")
+    parser.add_argument('--split', action='store_true', help="多设备录制时每个设备写入单独的文件")
+    parser.add_argument('--no-peaks', action='store_true', help="不生成波形峰值伴随文件（.peaks）")
+    parser.add_argument('--replay-file', help="replay 来源使用的WAV文件")
+    parser.add_argument('--realtime', action='store_true', help="synthetic/replay 来源按实时速度产生数据")
+    parser.add_argument('--progress-interval', type=float, default=1.0, help="进度输出间隔（秒）")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="启用结构化日志（输出到标准错误或 --log-file）")
+    parser.add_argument('--log-file', help="日志文件路径")
+    parser.add_argument('--stats', action='store_true', help="停止时在 stop 事件中附带完整的采集统计")
+    parser.add_argument('--stream', choices=PROTOCOLS,
+                        help="录制期间实时推流：http 为分块传输的WAV，tcp 为原始PCM")
+    parser.add_argument('--stream-host', default=STREAM_CONFIG['host'], help="推流监听地址")
+    parser.add_argument('--stream-port', type=int, default=STREAM_CONFIG['port'], help="推流端口（0 由系统分配）")
+    parser.add_argument('--stream-mono', action='store_true', help="推流时下混为单声道")
+    parser.add_argument('--stream-rate', type=int, default=STREAM_CONFIG['rate'],
+                        help="推流采样率（整数倍降采样，0 保持原始采样率）")
+    return parser
+
+
+def create_backend(args):
+    """按参数创建采集后端（指定了 --mic 时与麦克风合并为多设备后端）"""
+    backend = create_source_backend(args)
+    if not args.mic:
+        return backend
+    try:
+        mics = [SoundDeviceBackend(device=int(mic) if mic.isdigit() else mic, latency=args.latency_ms / 1000)
+                for mic in args.mic]
+        return MultiDeviceBackend([backend] + mics, ring_seconds=AUDIO_CONFIG['capture_ring_seconds'])
+    except Exception:
+        backend.shutdown()
+        raise
+
+
+def create_source_backend(args):
+    """按参数创建主采集来源"""
+    if args.backend == 'synthetic':
+        factory = functools.partial(SyntheticBackend, channels=args.channels or 2, realtime=args.realtime)
+    elif args.backend == 'replay':
+        if not args.replay_file:
+            raise ValueError("replay 来源需要 --replay-file")
+        factory = functools.partial(WavReplayBackend, args.replay_file, realtime=args.realtime)
+    elif args.backend == 'sounddevice':
+        factory = functools.partial(SoundDeviceBackend, latency=args.latency_ms / 1000,
+                                    loopback=AUDIO_CONFIG['callback_loopback'])
+    else:
+        factory = SoundcardBackend
+    if args.process:
+        # 非实时来源可以等待，不应因父进程处理较慢而丢帧
+        lossless = args.backend in ('synthetic', 'replay') and not args.realtime
+        return ProcessBackend(factory, AUDIO_CONFIG['capture_ring_seconds'], lossless)
+    return factory()
+
+
+def create_recorder(args) -> AudioRecorder:
+    """按参数创建并配置录制器（录制服务的会话同样使用）；配置失败时释放已创建的后端"""
+    backend = create_backend(args)
+    try:
+        recorder = AudioRecorder(backend)
+        if args.channels:
+            recorder.set_channels(args.channels)
+        recorder.set_block_duration(args.block_ms / 1000)
+        recorder.set_sample_format(args.format, args.dither)
+        recorder.set_streaming(not args.memory)
+        recorder.set_rotation(args.rotate_minutes, args.rotate_mb)
+        recorder.set_gate(args.gate or AUDIO_CONFIG['gate_enabled'], args.gate_threshold_db,
+                          args.gate_hangover, args.gate_preroll)
+        if args.output:
+            recorder.set_output_file(args.output)
+        if args.duration:
+            # 由采集线程在精确的帧位置停止，不依赖轮询
+            recorder.set_frame_limit(int(args.duration * args.rate))
+        if args.split:
+            recorder.set_split_output(True)
+        if args.no_peaks:
+            recorder.set_peaks(False)
+    except Exception:
+        backend.shutdown()
+        raise
+    return recorder
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    args = build_parser().parse_args(argv)
+    if args.log_level or args.log_file or LOGGING_CONFIG['enabled']:
+        configure_logging(args.log_level, args.log_file)
+
+    try:
+        recorder = create_recorder(args)
+    except Exception as e:
+        emit('error', message=str(e))
+        return 1
+
+    try:
+        return run(recorder, args)
+    finally:
+        # 采集子进程等后端资源在退出前释放
+        recorder.backend.shutdown()
+
+
+def run(recorder: AudioRecorder, args) -> int:
+    """录制到结束（时长、信号或出错），输出 stop 事件，返回退出码"""
+    # 信号处理函数只设置标志，停止和落盘在主循环中完成
+    stop_requested = threading.Event()
+
+    def on_signal(signum, frame):
+        stop_requested.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, on_signal)
+
+    stream = None
+    if args.stream:
+        try:
+            stream = LiveStreamServer(recorder, args.stream, args.stream_host, args.stream_port,
+                                      channels=1 if args.stream_mono else 0, rate=args.stream_rate)
+        except (OSError, ValueError) as e:
+            emit('error', message=f"无法启动推流: {e}")
+            return 1
+        stream.start()
+
+    if not recorder.start_recording(args.rate):
+        emit('error', message="无法开始录制")
+        if stream is not None:
+            stream.stop()
+        return 1
+    emit('start', device=recorder.speaker_name, rate=args.rate, channels=recorder.channels,
+         block_ms=args.block_ms, format=args.format)
+    if stream is not None:
+        emit('stream', protocol=args.stream, url=stream.url)
+
+    # 轮询间隔取块时长与进度间隔中较小者，停止延迟不超过一个块
+    poll = min(args.block_ms / 1000, args.progress_interval)
+    next_progress = time.monotonic() + args.progress_interval
+    while recorder.is_recording and not stop_requested.is_set():
+        stop_requested.wait(poll)
+        if time.monotonic() >= next_progress:
+            next_progress += args.progress_interval
+            status = recorder.get_status()
+            emit('progress', frames=status.frames, seconds=round(status.elapsed, 3),
+                 peak_db=[round(to_dbfs(v), 1) for v in status.peak],
+                 rms_db=[round(to_dbfs(v), 1) for v in status.rms],
+                 clips=list(status.clips), queue=status.queue_depth,
+                 dropped=status.dropped_blocks)
+
+    recorder.stop_recording()
+    recorder.wait()
+    stream_stats = None
+    if stream is not None:
+        stream_stats = stream.get_stats()
+        stream.stop()
+    # 采集或处理出错时同样输出 stop 事件（附带错误），但以非零退出码结束
+    if recorder.last_error:
+        reason = 'error'
+    else:
+        reason = 'signal' if stop_requested.is_set() else 'complete'
+    emit('stop', file=recorder.last_saved_file, segments=list(recorder.segment_files),
+         split_files=list(recorder.split_files), gate_map=recorder.last_gate_map,
+         peak_files=list(recorder.peak_files),
+         frames=recorder.frames_captured, seconds=round(recorder.frames_captured / args.rate, 3),
+         reason=reason, **({'error': recorder.last_error} if recorder.last_error else {}),
+         **({'capture_process': recorder.backend.last_stats}
+            if isinstance(recorder.backend, ProcessBackend) else {}),
+         **({'devices': recorder.backend.last_stats}
+            if isinstance(recorder.backend, MultiDeviceBackend) else {}),
+         **({'stats': recorder.get_stats()} if args.stats else {}),
+         **({'stream': stream_stats} if stream_stats is not None else {}))
+    return 1 if recorder.last_error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+录制服务客户端
+同步实现（标准库 socket），每个请求一次连接，便于脚本和测试中使用；
+命令行中 start 的选项与 python -m core 相同
+
+用法:
+    python -m core.client start --backend synthetic --realtime --duration 10 --output a.wav
+    python -m core.client list
+    python -m core.client status 1 [--stats]
+    python -m core.client stop 1
+    python -m core.client shutdown
+"""
+
+import argparse
+import json
+import socket
+import sys
+from typing import List, Optional
+
+from config import DAEMON_CONFIG
+from .cli import build_parser
+
+
+class DaemonClient:
+    """录制服务的客户端；指定 port 或平台不支持 Unix 套接字时连接本机TCP"""
+
+    def __init__(self, socket_path: Optional[str] = None, host: Optional[str] = None,
+                 port: Optional[int] = None, timeout: float = DAEMON_CONFIG['request_timeout']):
+        self.socket_path = socket_path or DAEMON_CONFIG['socket_path']
+        self.host = host or DAEMON_CONFIG['host']
+        self.port = port
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        if self.port is None and hasattr(socket, 'AF_UNIX'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            return sock
+        return socket.create_connection((self.host, self.port or DAEMON_CONFIG['port']), self.timeout)
+
+    def request(self, command: str, **fields) -> dict:
+        """发送一条命令并返回应答；服务端报告错误时抛出 RuntimeError"""
+        message = dict(fields, command=command)
+        with self._connect() as sock:
+            sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        if not line:
+            raise RuntimeError("录制服务关闭了连接")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise RuntimeError(reply.get('error') or "录制服务返回错误")
+        return reply
+
+    def start(self, **params) -> dict:
+        """开始一个会话，参数与命令行选项同名（如 backend、rate、duration、output）"""
+        return self.request('start', params=params)
+
+    def stop(self, session, stats: bool = False) -> dict:
+        """停止会话，服务端落盘完成后返回"""
+        return self.request('stop', session=str(session), stats=stats)
+
+    def status(self, session, stats: bool = False) -> dict:
+        return self.request('status', session=str(session), stats=stats)
+
+    def list(self) -> List[dict]:
+        return self.request('list')['sessions']
+
+    def shutdown(self) -> dict:
+        """停止所有会话并结束服务"""
+        return self.request('shutdown')
+
+
+def start_params(argv: List[str]) -> dict:
+    """按 python -m core 的选项解析 start 的参数，只发送与默认值不同的部分"""
+    parser = build_parser()
+    defaults = vars(parser.parse_args([]))
+    values = vars(parser.parse_args(argv))
+    return {key: value for key, value in values.items() if value != defaults[key]}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """客户端命令行入口"""
+    parser = argparse.ArgumentParser(prog='python -m core.client', description="录制服务客户端")
+    parser.add_argument('--socket', help="Unix 套接字路径")
+    parser.add_argument('--host', help="TCP 地址")
+    parser.add_argument('--port', type=int, help="TCP 端口")
+    parser.add_argument('command', choices=['start', 'stop', 'status', 'list', 'shutdown'])
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help="start: 录制选项（同 python -m core）；stop / status: 会话编号 [--stats]")
+    args = parser.parse_args(argv)
+
+    client = DaemonClient(args.socket, args.host, args.port)
+    try:
+        if args.command == 'start':
+            reply = client.start(**start_params(args.args))
+        elif args.command in ('stop', 'status'):
+            session_parser = argparse.ArgumentParser(prog=f'python -m core.client {args.command}')
+            session_parser.add_argument('session', help="会话编号")
+            session_parser.add_argument('--stats', action='store_true', help="附带完整的采集统计")
+            session_args = session_parser.parse_args(args.args)
+            method = client.stop if args.command == 'stop' else client.status
+            reply = method(session_args.session, session_args.stats)
+        elif args.args:
+            parser.error(f"{args.command} 不接受参数: {' '.join(args.args)}")
+        elif args.command == 'list':
+            reply = {'sessions': client.list()}
+        else:
+            reply = client.shutdown()
+    except (OSError, RuntimeError) as e:
+        print(json.dumps({'ok': False, 'error': str(e)}, ensure_ascii=False))
+        return 1
+    print(json.dumps(reply, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
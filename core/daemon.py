@@ -0,0 +1,346 @@
+"""
+录制服务
+在一个长期运行的进程中管理多个录制会话（不同设备、采样率和输出文件），
+通过 Unix 套接字（不支持时改用本机TCP）上的JSON行协议提供控制命令：
+- 每个会话是一个独立的 AudioRecorder，拥有自己的采集线程、队列和写入线程，
+  某个会话写盘变慢只会让它自己的队列积压，不会拖慢其他会话
+- 事件循环只负责协议和会话管理；创建后端、等待落盘等可能阻塞的操作放到线程池中执行
+
+协议：每行一个JSON请求，每行一个JSON应答
+    {"command": "start", "params": {"backend": "synthetic", "duration": 10, "output": "a.wav"}}
+    {"command": "stop", "session": "1"}
+    {"command": "status", "session": "1", "stats": true}
+    {"command": "list"}
+    {"command": "shutdown"}
+应答为 {"ok": true, ...} 或 {"ok": false, "error": "..."}；start 的参数与命令行选项同名（横线换成下划线）
+
+用法: python -m core.daemon [--socket PATH] [--port N]
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config import DAEMON_CONFIG, FILE_CONFIG, LOGGING_CONFIG
+from .cli import build_parser, create_recorder
+from .instrumentation import configure_logging, log_event
+from .meter import to_dbfs
+from .recorder import AudioRecorder
+
+# 以 python -m core.daemon 运行时 __name__ 为 __main__，显式使用包内的记录器名称
+logger = logging.getLogger('core.daemon')
+
+# 会话状态
+STATE_RECORDING = 'recording'
+STATE_STOPPING = 'stopping'
+STATE_FINISHED = 'finished'
+STATE_FAILED = 'failed'
+
+# 只对命令行有意义、会话中不接受的参数
+_CLI_ONLY_PARAMS = ('help', 'progress_interval', 'log_level', 'log_file', 'stats',
+                    'stream', 'stream_host', 'stream_port', 'stream_mono', 'stream_rate')
+
+# 开关参数接受的取值（JSON 布尔值、数字或字符串）
+_TRUE_VALUES = (True, 1, 'true', '1', 'yes', 'on')
+_FALSE_VALUES = (False, 0, 'false', '0', 'no', 'off')
+
+
+def _to_bool(key: str, value) -> bool:
+    """把开关参数的取值转换为布尔值；字符串 "false" 等不能按真值判断"""
+    if isinstance(value, str):
+        value = value.strip().lower()
+    elif not isinstance(value, (bool, int)):
+        raise ValueError(f"参数 {key} 必须是布尔值: {value!r}")
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(f"参数 {key} 必须是布尔值: {value!r}")
+
+
+def session_args(params: dict) -> argparse.Namespace:
+    """把 start 请求的参数转换为与命令行相同的参数对象（未指定的取命令行默认值）"""
+    parser = build_parser()
+    args = parser.parse_args([])
+    actions = {action.dest: action for action in parser._actions}
+    for key, value in params.items():
+        action = actions.get(key)
+        if action is None or key in _CLI_ONLY_PARAMS:
+            raise ValueError(f"未知的会话参数: {key}")
+        if action.nargs == 0 and isinstance(action.const, bool):
+            # store_true/store_false 开关：取值为真时设置为 const，否则为相反值
+            value = action.const if _to_bool(key, value) else not action.const
+        elif action.type is not None and value is not None:
+            # JSON 中的数值可能以字符串给出，按命令行选项的类型转换
+            try:
+                value = action.type(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"参数 {key} 的取值无效: {value!r}")
+        if action.choices is not None and value not in action.choices:
+            raise ValueError(f"参数 {key} 的取值必须是 {list(action.choices)} 之一: {value}")
+        setattr(args, key, value)
+    return args
+
+
+class Session:
+    """一个录制会话"""
+
+    def __init__(self, session_id: str, recorder: AudioRecorder, params: dict, samplerate: int,
+                 target_frames: Optional[int]):
+        self.id = session_id
+        self.recorder = recorder
+        self.params = params
+        self.samplerate = samplerate
+        self.target_frames = target_frames
+        self.state = STATE_RECORDING
+        self.stop_reason: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def describe(self, stats: bool = False) -> dict:
+        """会话状态（读取无锁状态快照，不会阻塞事件循环）"""
+        recorder = self.recorder
+        status = recorder.get_status()
+        info = {
+            'session': self.id,
+            'state': self.state,
+            'device': recorder.speaker_name,
+            'samplerate': self.samplerate,
+            'channels': recorder.channels,
+            'frames': status.frames,
+            'seconds': round(status.elapsed, 3),
+            'peak_db': [round(to_dbfs(v), 1) for v in status.peak],
+            'rms_db': [round(to_dbfs(v), 1) for v in status.rms],
+            'clips': list(status.clips),
+            'queue': status.queue_depth,
+            'dropped': status.dropped_blocks,
+            'file': recorder.last_saved_file or recorder.output_file,
+            'segments': list(recorder.segment_files),
+            'split_files': list(recorder.split_files),
+            'gate_map': recorder.last_gate_map,
+            'peak_files': list(recorder.peak_files),
+            'stop_reason': self.stop_reason,
+            'error': recorder.last_error,
+            'created': round(self.created, 3),
+            'finished': round(self.finished, 3) if self.finished else None,
+        }
+        if stats:
+            info['stats'] = recorder.get_stats()
+        return info
+
+
+class RecorderDaemon:
+    """录制服务：会话管理 + JSON行协议"""
+
+    def __init__(self, max_sessions: int = DAEMON_CONFIG['max_sessions'],
+                 poll_interval: float = DAEMON_CONFIG['poll_interval'],
+                 max_finished: int = DAEMON_CONFIG['max_finished_sessions']):
+        self.max_sessions = max_sessions
+        self.poll_interval = poll_interval
+        self.max_finished = max_finished
+        self.sessions: Dict[str, Session] = {}
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._closed: Optional[asyncio.Event] = None
+
+    def active_sessions(self) -> List[Session]:
+        """仍在录制或正在停止的会话"""
+        return [s for s in self.sessions.values() if s.state in (STATE_RECORDING, STATE_STOPPING)]
+
+    def _prune_finished(self):
+        """已结束的会话只保留最近 max_finished 个，长期运行时会话表不会无限增长"""
+        finished = sorted((s for s in self.sessions.values() if s.state in (STATE_FINISHED, STATE_FAILED)),
+                          key=lambda s: s.finished)
+        for session in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.sessions[session.id]
+
+    def get_session(self, session_id) -> Session:
+        session = self.sessions.get(str(session_id))
+        if session is None:
+            raise ValueError(f"会话不存在: {session_id}")
+        return session
+
+    async def start_session(self, params: dict) -> Session:
+        """创建并开始一个会话"""
+        if len(self.active_sessions()) >= self.max_sessions:
+            raise RuntimeError(f"同时录制的会话数已达上限 {self.max_sessions}")
+        args = session_args(params)
+        session_id = str(next(self._ids))
+        if not args.output:
+            # 多个会话可能在同一秒开始，默认文件名加上会话编号
+            timestamp = datetime.datetime.now().strftime(FILE_CONFIG['timestamp_format'])
+            args.output = (f"{FILE_CONFIG['filename_prefix']}_{timestamp}_{session_id}"
+                           f"{FILE_CONFIG['default_extension']}")
+
+        if args.rate <= 0 or args.duration is not None and args.duration <= 0:
+            raise ValueError("采样率和时长必须大于0")
+        target_frames = int(args.duration * args.rate) if args.duration else None
+
+        # 打开设备、启动子进程等可能耗时，放到线程池中执行；可能失败的步骤都在开始录制之前完成
+        loop = asyncio.get_running_loop()
+        recorder = await loop.run_in_executor(None, create_recorder, args)
+        if not recorder.start_recording(args.rate):
+            await loop.run_in_executor(None, recorder.backend.shutdown)
+            raise RuntimeError("无法开始录制")
+        session = Session(session_id, recorder, params, args.rate, target_frames)
+        self.sessions[session_id] = session
+        session.task = asyncio.create_task(self._watch(session))
+        log_event(logger, logging.INFO, 'session_started', session=session_id, params=params)
+        return session
+
+    async def stop_session(self, session_id) -> Session:
+        """停止会话，等待落盘完成"""
+        session = self.get_session(session_id)
+        if session.state == STATE_RECORDING:
+            session.state = STATE_STOPPING
+            session.stop_reason = 'request'
+            session.recorder.stop_recording()
+        # 多个客户端同时停止同一会话时都等待同一个任务，取消其中一个请求不会取消会话的收尾
+        await asyncio.shield(session.task)
+        return session
+
+    async def _watch(self, session: Session):
+        """跟踪会话：录制结束（到达时长、停止、来源结束或出错）后在线程池中等待落盘"""
+        recorder = session.recorder
+        try:
+            # 时长由录制器的帧数上限精确控制，这里只等待录制结束
+            while recorder.is_recording:
+                await asyncio.sleep(self.poll_interval)
+            await asyncio.get_running_loop().run_in_executor(None, recorder.wait)
+        finally:
+            if session.stop_reason is None:
+                if recorder.last_error:
+                    session.stop_reason = 'error'
+                elif session.target_frames is not None and recorder.frames_captured >= session.target_frames:
+                    session.stop_reason = 'duration'
+                else:
+                    session.stop_reason = 'source_ended'
+            session.state = STATE_FAILED if recorder.last_error else STATE_FINISHED
+            session.finished = time.time()
+            log_event(logger, logging.INFO, 'session_finished', session=session.id,
+                      state=session.state, reason=session.stop_reason,
+                      file=recorder.last_saved_file, error=recorder.last_error)
+            self._prune_finished()
+            # 会话结束后释放后端（结束采集子进程），等待子进程退出同样放到线程池中
+            await asyncio.get_running_loop().run_in_executor(None, recorder.backend.shutdown)
+
+    async def handle_request(self, request: dict) -> dict:
+        """执行一条命令，返回应答"""
+        command = request.get('command')
+        try:
+            if command == 'start':
+                session = await self.start_session(request.get('params') or {})
+                return {'ok': True, **session.describe()}
+            if command == 'stop':
+                session = await self.stop_session(request.get('session'))
+                return {'ok': True, **session.describe(request.get('stats', False))}
+            if command == 'status':
+                session = self.get_session(request.get('session'))
+                return {'ok': True, **session.describe(request.get('stats', False))}
+            if command == 'list':
+                return {'ok': True, 'sessions': [s.describe() for s in self.sessions.values()]}
+            if command == 'shutdown':
+                asyncio.get_running_loop().create_task(self.shutdown())
+                return {'ok': True}
+            raise ValueError(f"未知的命令: {command}")
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """一个客户端连接：按行读取请求，逐条应答"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("请求必须是JSON对象")
+                except ValueError as e:
+                    reply = {'ok': False, 'error': f"无法解析请求: {e}"}
+                else:
+                    reply = await self.handle_request(request)
+                writer.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Optional[str] = None, host: Optional[str] = None,
+                    port: Optional[int] = None):
+        """开始监听并一直运行到 shutdown；指定 port 或平台不支持 Unix 套接字时使用本机TCP"""
+        self._closed = asyncio.Event()
+        if port is None and hasattr(socket, 'AF_UNIX'):
+            socket_path = socket_path or DAEMON_CONFIG['socket_path']
+            os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+            if os.path.exists(socket_path):
+                # 上次未正常退出留下的套接字文件
+                os.unlink(socket_path)
+            self._server = await asyncio.start_unix_server(self._handle_client, path=socket_path)
+            address = socket_path
+        else:
+            host = host or DAEMON_CONFIG['host']
+            port = DAEMON_CONFIG['port'] if port is None else port
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+            address = '%s:%d' % self._server.sockets[0].getsockname()[:2]
+        # 收到 SIGINT/SIGTERM 时先停止所有会话并回填文件头再退出
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, getattr(signal, 'SIGTERM', None)):
+            if signum is not None:
+                try:
+                    loop.add_signal_handler(signum, lambda: loop.create_task(self.shutdown()))
+                except (NotImplementedError, RuntimeError):
+                    pass
+        log_event(logger, logging.INFO, 'daemon_listening', address=address)
+        print(json.dumps({'event': 'listening', 'address': address}, ensure_ascii=False), flush=True)
+        try:
+            await self._closed.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            if socket_path and port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    async def shutdown(self):
+        """停止所有会话（等待落盘）后结束服务"""
+        await asyncio.gather(*(self.stop_session(s.id) for s in self.active_sessions()),
+                             return_exceptions=True)
+        if self._closed is not None:
+            self._closed.set()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """录制服务入口"""
+    parser = argparse.ArgumentParser(prog='python -m core.daemon', description="多会话录制服务")
+    parser.add_argument('--socket', help="Unix 套接字路径（默认见 DAEMON_CONFIG）")
+    parser.add_argument('--host', help="TCP 监听地址（仅在指定 --port 或不支持 Unix 套接字时使用）")
+    parser.add_argument('--port', type=int, help="改用本机TCP端口（0 表示自动分配）")
+    parser.add_argument('--max-sessions', type=int, default=DAEMON_CONFIG['max_sessions'])
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help="启用结构化日志")
+    args = parser.parse_args(argv)
+    if args.log_level or LOGGING_CONFIG['enabled']:
+        configure_logging(args.log_level)
+
+    daemon = RecorderDaemon(args.max_sessions)
+    try:
+        asyncio.run(daemon.serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# 子进程采集使用 spawn 启动方式，会重新导入主模块
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+设备能力缓存模块
+按设备指纹（名称、主机API、通道数）缓存各设备支持的采样率并持久化到磁盘，
+启动时直接读取缓存，探测工作放到后台线程中完成
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import PATH_CONFIG
+
+# 缓存文件格式版本，结构变化时递增以丢弃旧缓存
+# （2: 非 WASAPI 设备同样记录 loopback_rates，旧缓存中这些设备为空）
+CACHE_VERSION = 2
+
+
+def device_fingerprint(name: str, hostapi: str, input_channels: int, output_channels: int) -> str:
+    """生成设备指纹"""
+    return f"{hostapi}|{name}|{input_channels}in|{output_channels}out"
+
+
+class DeviceCapabilityCache:
+    """设备能力缓存（线程安全，写入时原子替换文件）"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or PATH_CONFIG['device_cache']
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """从磁盘读取缓存，文件不存在或损坏时视为空缓存"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            entries = data.get('devices', {}) if data.get('version') == CACHE_VERSION else {}
+        except (OSError, ValueError):
+            entries = {}
+        with self._lock:
+            self._entries = entries
+
+    def save(self):
+        """写入磁盘"""
+        with self._lock:
+            data = {'version': CACHE_VERSION, 'devices': dict(self._entries)}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        """按指纹查询设备能力"""
+        with self._lock:
+            return self._entries.get(fingerprint)
+
+    def put(self, fingerprint: str, entry: dict):
+        """更新设备能力"""
+        with self._lock:
+            self._entries[fingerprint] = entry
+
+    def entries(self) -> Dict[str, dict]:
+        """全部缓存条目的副本"""
+        with self._lock:
+            return dict(self._entries)
+
+
+def default_output_fingerprint() -> Optional[str]:
+    """默认输出设备（回放录制来源）的指纹；只查询设备列表，不做采样率探测"""
+    import sounddevice as sd
+
+    try:
+        device = sd.query_devices(sd.default.device[1])
+        hostapi = sd.query_hostapis(device['hostapi'])['name']
+    except Exception:
+        return None
+    return device_fingerprint(device['name'], hostapi,
+                              device['max_input_channels'], device['max_output_channels'])
+
+
+def _supported(check, rates: List[int], **settings) -> List[int]:
+    """逐个采样率调用 sounddevice 的参数检查，返回通过的采样率"""
+    supported = []
+    for rate in rates:
+        try:
+            check(samplerate=rate, **settings)
+            supported.append(rate)
+        except Exception:
+            pass
+    return supported
+
+
+def probe_device(index: int, rates: List[int]) -> Tuple[str, dict]:
+    """
+    探测单个设备的能力，返回 (指纹, 缓存条目)
+    - input_rates: 作为普通输入设备支持的采样率
+    - loopback_rates: 作为回放录制来源时支持的采样率。WASAPI 设备与 SoundDeviceBackend 相同，
+      以 loopback 输入流探测；其他主机API上回放录制经由声音服务器的监视源（如 PulseAudio），
+      由服务器重采样，全部候选采样率都可用。不探测输出流参数：输出能力与回放录制无关
+    """
+    import sounddevice as sd
+
+    device = sd.query_devices(index)
+    hostapi = sd.query_hostapis(device['hostapi'])['name']
+    input_channels = device['max_input_channels']
+    output_channels = device['max_output_channels']
+
+    input_rates = []
+    if input_channels:
+        input_rates = _supported(sd.check_input_settings, rates, device=index,
+                                 channels=min(input_channels, 2))
+    loopback_rates = []
+    if output_channels and 'WASAPI' in hostapi:
+        try:
+            loopback_settings = sd.WasapiSettings(loopback=True)
+        except (TypeError, AttributeError):
+            # sounddevice 版本不支持 WASAPI 回放录制
+            loopback_settings = None
+        if loopback_settings is not None:
+            loopback_rates = _supported(sd.check_input_settings, rates, device=index,
+                                        channels=min(output_channels, 2),
+                                        extra_settings=loopback_settings)
+    elif output_channels:
+        # 声音服务器的监视源按请求的采样率重采样，不受输出设备参数限制
+        loopback_rates = list(rates)
+
+    fingerprint = device_fingerprint(device['name'], hostapi, input_channels, output_channels)
+    return fingerprint, {
+        'name': device['name'],
+        'hostapi': hostapi,
+        'input_channels': input_channels,
+        'output_channels': output_channels,
+        'default_samplerate': device['default_samplerate'],
+        'input_rates': input_rates,
+        'loopback_rates': loopback_rates,
+        'probed_at': time.time(),
+    }
+
+
+def probe_devices(rates: List[int]) -> Dict[str, dict]:
+    """探测所有设备的能力（条目内容见 probe_device）"""
+    import sounddevice as sd
+
+    return dict(probe_device(index, rates) for index in range(len(sd.query_devices())))
@@ -0,0 +1,111 @@
+"""
+块订阅模块
+同一次录制的每个块可以同时交给多个订阅者（网络推流、检测器等），不复制数据：
+- 流水线把块包装为只读视图后分发，所有分支和订阅者看到的是同一块内存，任何一方都不能修改它
+- 每个订阅者有自己的有界队列，由订阅者自己的线程读取；采集线程投递时从不等待
+- 订阅者跟不上时按策略处理：丢弃最旧的块、降级为隔块投递，或直接断开，都不会拖慢采集
+"""
+
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from .pipeline import BlockQueue, OVERFLOW_DROP_OLDEST
+
+# 订阅者跟不上时的处理策略
+SLOW_DROP = 'drop'  # 队列满时丢弃最旧的块
+SLOW_DEGRADE = 'degrade'  # 队列满时投递间隔加倍（只投递每 N 个块中的一个），积压消化后逐步恢复
+SLOW_DISCONNECT = 'disconnect'  # 队列满时断开该订阅者，已入队的块仍可读完
+SLOW_POLICIES = (SLOW_DROP, SLOW_DEGRADE, SLOW_DISCONNECT)
+
+# 降级策略下投递间隔的上限（块）
+MAX_STRIDE = 64
+
+
+class TimedBlock(NamedTuple):
+    """投递给订阅者的块：frame 为块首帧在本次录制中的位置，有块被跳过时据此判断缺口"""
+    frame: int
+    data: np.ndarray  # 只读视图，形状 (帧数, 通道数)
+
+
+class Subscription:
+    """
+    一个订阅者
+    采集线程调用 offer()（不阻塞），订阅者线程调用 get() 或直接迭代；
+    录制结束或被断开后，读完剩余的块即结束
+    """
+
+    def __init__(self, name: str, maxsize: int, slow_policy: str = SLOW_DROP):
+        if slow_policy not in SLOW_POLICIES:
+            raise ValueError(f"不支持的慢订阅者策略: {slow_policy}")
+        self.name = name
+        self.slow_policy = slow_policy
+        self._queue = BlockQueue(maxsize, OVERFLOW_DROP_OLDEST)
+        self._stride = 1  # 降级策略下的投递间隔
+        self._offered = 0
+
+        # 统计（只由采集线程写入）
+        self.delivered = 0
+        self.skipped = 0  # 降级时跳过的块
+        self.disconnected = False
+
+    @property
+    def maxsize(self) -> int:
+        return self._queue.maxsize
+
+    @property
+    def closed(self) -> bool:
+        """已结束（录制结束或被断开），不会再有新块"""
+        return self._queue.closed
+
+    def offer(self, frame: int, block: np.ndarray) -> bool:
+        """采集线程：投递一个块（只读视图），返回订阅者是否仍然有效"""
+        if self.closed:
+            return False
+        depth = len(self._queue)
+        if depth >= self.maxsize:
+            if self.slow_policy == SLOW_DISCONNECT:
+                self.disconnected = True
+                self._queue.close()
+                return False
+            if self.slow_policy == SLOW_DEGRADE:
+                self._stride = min(self._stride * 2, MAX_STRIDE)
+        elif self._stride > 1 and depth <= self.maxsize // 4:
+            self._stride //= 2
+
+        self._offered += 1
+        if self._offered % self._stride:
+            self.skipped += 1
+            return True
+        self._queue.put(TimedBlock(frame, block))
+        self.delivered += 1
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[TimedBlock]:
+        """订阅者线程：取出下一个块；已结束且读完，或等待超时时返回None"""
+        return self._queue.get(timeout)
+
+    def __iter__(self) -> Iterator[TimedBlock]:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+    def close(self):
+        """结束订阅：订阅者读完剩余的块后迭代结束"""
+        self._queue.close()
+
+    def get_stats(self) -> dict:
+        stats = self._queue.get_stats()
+        return {
+            'slow_policy': self.slow_policy,
+            'maxsize': self.maxsize,
+            'depth': stats['depth'],
+            'high_watermark': stats['high_watermark'],
+            'delivered': self.delivered,
+            'dropped': stats['drops'],
+            'skipped': self.skipped,
+            'stride': self._stride,
+            'disconnected': self.disconnected,
+        }
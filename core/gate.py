@@ -0,0 +1,183 @@
+"""
+能量门限模块
+按短窗口计算能量（向量化），低于门限的静音段不写入文件；
+支持保持时间（hangover）和预录（pre-roll），并记录被移除的区间，便于还原原始时间轴
+"""
+
+import json
+import os
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+
+def gate_map_path(audio_path: str) -> str:
+    """录音文件对应的静音区间映射文件路径"""
+    root, _ = os.path.splitext(audio_path)
+    return root + '.gate.json'
+
+
+def source_frame(gate_map: dict, output_frame: int) -> int:
+    """把输出文件中的帧位置换算为原始时间轴上的帧位置"""
+    frame = output_frame
+    for span in gate_map['removed']:
+        # 在该位置之前（含恰好在该位置）被移除的区间都要加回来
+        if span['output_frame'] > output_frame:
+            break
+        frame += span['frames']
+    return frame
+
+
+class EnergyGate:
+    """
+    能量门限
+    - 每个窗口的均方能量达到门限即视为有声，有声窗口结束后继续保留 hangover 秒
+    - 门限打开时把之前 preroll 秒的静音一并写入，避免切掉起音
+    - removed 记录每个被移除区间的原始起点、帧数以及它在输出文件中的位置
+    """
+
+    def __init__(self, samplerate: int, channels: int, threshold_db: float = -60.0,
+                 hangover: float = 0.5, preroll: float = 0.2, window: float = 0.01):
+        if hangover < 0 or preroll < 0:
+            raise ValueError("保持时间和预录时间不能为负数")
+        if window <= 0:
+            raise ValueError(f"检测窗口必须大于0: {window}")
+        self.samplerate = samplerate
+        self.channels = channels
+        self.threshold_db = threshold_db
+        self.hangover = hangover
+        self.preroll = preroll
+        self.window_frames = max(1, int(round(samplerate * window)))
+        self.hangover_frames = int(round(samplerate * hangover))
+        self.preroll_frames = int(round(samplerate * preroll))
+        # 均方能量门限（与 dBFS 对应的幅度的平方）
+        self._threshold = (10 ** (threshold_db / 20)) ** 2
+
+        self.frames_in = 0  # 已输入的帧数（原始时间轴位置）
+        self.frames_out = 0  # 已输出的帧数
+        self.removed: List[dict] = []
+        self._last_active_end = -(self.hangover_frames + 1)  # 最近一个有声窗口的结束位置
+        self._kept_until = 0  # 最近一次输出的结束位置（原始时间轴）
+        self._history = deque()  # 尚未输出的最近静音块，用作预录
+        self._history_frames = 0
+
+    def _window_energy(self, block: np.ndarray) -> np.ndarray:
+        """逐窗口均方能量（所有通道合并）"""
+        n = len(block)
+        w = self.window_frames
+        full = n // w
+        energy = np.empty(-(-n // w), dtype=np.float64)
+        # 交错数据按窗口重排为 (窗口数, 窗口帧数 × 通道数)，每行一次点积
+        flat = np.ascontiguousarray(block).reshape(-1)
+        if full:
+            rows = flat[:full * w * self.channels].reshape(full, -1)
+            energy[:full] = np.einsum('ij,ij->i', rows, rows) / rows.shape[1]
+        if n % w:
+            tail = flat[full * w * self.channels:]
+            energy[full] = np.dot(tail, tail) / len(tail)
+        return energy
+
+    def _take_history(self, frames: int) -> Optional[np.ndarray]:
+        """取出历史静音中最后 frames 帧"""
+        frames = min(frames, self._history_frames)
+        if frames <= 0:
+            return None
+        pieces = []
+        needed = frames
+        for chunk in reversed(self._history):
+            if needed <= 0:
+                break
+            pieces.append(chunk[-needed:] if len(chunk) > needed else chunk)
+            needed -= len(pieces[-1])
+        pieces.reverse()
+        return pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+
+    def _push_history(self, chunk: np.ndarray):
+        """记录未输出的静音，只保留最近 preroll 帧"""
+        if not self.preroll_frames or not len(chunk):
+            return
+        self._history.append(chunk)
+        self._history_frames += len(chunk)
+        while self._history_frames - len(self._history[0]) >= self.preroll_frames:
+            self._history_frames -= len(self._history.popleft())
+
+    def _emit(self, piece: np.ndarray, start: int, pieces: list):
+        """输出一段数据，并记录它之前被移除的区间"""
+        if start > self._kept_until:
+            self.removed.append({'start': self._kept_until, 'frames': start - self._kept_until,
+                                 'output_frame': self.frames_out})
+        pieces.append(piece)
+        self.frames_out += len(piece)
+        self._kept_until = start + len(piece)
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        """处理一个块，返回需要保留的数据；整块都是静音时返回None"""
+        n = len(block)
+        if not n:
+            return None
+        base = self.frames_in
+        w = self.window_frames
+
+        # 逐窗口判定：窗口起点落在（最近有声窗口结束 + 保持时间）之前即保留
+        active = self._window_energy(block) >= self._threshold
+        starts = base + np.arange(len(active), dtype=np.int64) * w
+        ends = np.minimum(starts + w, base + n)
+        last_end = np.maximum.accumulate(np.where(active, ends, self._last_active_end))
+        last_end = np.maximum(last_end, self._last_active_end)
+        keep = starts < last_end + self.hangover_frames
+        self._last_active_end = int(last_end[-1])
+        self.frames_in += n
+
+        # 找出连续保留的窗口段，换算为块内帧区间
+        edges = np.diff(np.concatenate(([0], keep.view(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1) * w
+        run_ends = np.minimum(np.flatnonzero(edges == -1) * w, n)
+
+        pieces = []
+        cursor = 0  # 块内已输出（或已确定丢弃）的位置
+        for index, (s, e) in enumerate(zip(run_starts.tolist(), run_ends.tolist())):
+            local_start = max(s - self.preroll_frames, cursor)
+            if index == 0 and s - self.preroll_frames < 0:
+                # 预录跨到上一个块：从历史静音中补足
+                history = self._take_history(self.preroll_frames - s)
+                if history is not None:
+                    self._emit(history, base - len(history), pieces)
+            self._emit(block[local_start:e], base + local_start, pieces)
+            cursor = e
+
+        if pieces:
+            self._history.clear()
+            self._history_frames = 0
+        self._push_history(block[cursor:])
+
+        if not pieces:
+            return None
+        return pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+
+    def finish(self):
+        """录制结束：记录末尾被移除的区间"""
+        if self.frames_in > self._kept_until:
+            self.removed.append({'start': self._kept_until, 'frames': self.frames_in - self._kept_until,
+                                 'output_frame': self.frames_out})
+            self._kept_until = self.frames_in
+        self._history.clear()
+        self._history_frames = 0
+
+    def get_map(self) -> dict:
+        """被移除区间的映射（帧为单位）"""
+        return {
+            'samplerate': self.samplerate,
+            'channels': self.channels,
+            'threshold_db': self.threshold_db,
+            'hangover': self.hangover,
+            'preroll': self.preroll,
+            'source_frames': self.frames_in,
+            'output_frames': self.frames_out,
+            'removed': list(self.removed),
+        }
+
+    def write_map(self, path: str):
+        """把映射写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_map(), f, indent=2, ensure_ascii=False)
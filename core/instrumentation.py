@@ -0,0 +1,187 @@
+"""
+采集侧统计与结构化日志模块
+- LatencyHistogram：固定分桶的耗时直方图，记录一次只做一次二分查找，适合在采集/消费线程中逐块调用
+- CaptureStats：采集线程的帧时钟（已采集帧数 vs 按经过时间应采集的帧数）、record() 耗时和短块计数
+- configure_logging()：按 LOGGING_CONFIG 启用结构化日志（默认关闭，未启用时日志不输出）
+"""
+
+import bisect
+import json
+import logging
+import sys
+import time
+from typing import Optional, Sequence
+
+from config import LOGGING_CONFIG
+
+# 耗时直方图的分桶上界（毫秒），最后一个桶收集超过最大上界的样本
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+# 所有模块日志的父记录器（core.recorder、core.pipeline 等）
+LOGGER_NAME = 'core'
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图（单写入方，不加锁）"""
+
+    def __init__(self, bounds_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._bounds = [bound / 1000 for bound in self.bounds_ms]
+        self.counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        """记录一次耗时（秒）"""
+        self.counts[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """估计第 q 百分位的耗时（毫秒），取所在分桶的上界；落在最后一个桶时取最大值"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.bounds_ms):
+                    return min(self.bounds_ms[index], self.max * 1000)
+                break
+        return self.max * 1000
+
+    def to_dict(self) -> dict:
+        """统计摘要（毫秒）和各分桶计数；le_ms 中的 None 表示超过最大上界"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total * 1000 / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max * 1000,
+            'le_ms': list(self.bounds_ms) + [None],
+            'counts': list(self.counts),
+        }
+
+
+class CaptureStats:
+    """
+    采集线程的统计（只由采集线程写入）
+    帧时钟从第一次调用 record() 时开始：经过的时间 × 采样率即应采集的帧数，
+    已采集帧数持续落后说明有音频丢失（设备溢出或来源停顿）
+    """
+
+    def __init__(self, samplerate: int, blocksize: int):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.record_time = LatencyHistogram()
+        self.frames = 0
+        self.blocks = 0
+        self.short_blocks = 0  # 返回帧数少于请求帧数的块
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+
+    def start(self):
+        """开始计时（第一次调用 record() 之前）"""
+        self.started = time.perf_counter()
+        self.stopped = None
+
+    def stop(self):
+        """停止计时，之后的统计不再随时间变化"""
+        if self.started is not None and self.stopped is None:
+            self.stopped = time.perf_counter()
+
+    def add_block(self, frames: int, seconds: float):
+        """记录一次 record() 的返回帧数和耗时"""
+        self.record_time.add(seconds)
+        self.blocks += 1
+        self.frames += frames
+        if frames < self.blocksize:
+            self.short_blocks += 1
+
+    def elapsed(self) -> float:
+        """帧时钟开始以来的时间（秒）"""
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def to_dict(self) -> dict:
+        """统计摘要；快于实时的来源（合成、回放）采集帧数会远超期望值"""
+        elapsed = self.elapsed()
+        expected = int(elapsed * self.samplerate)
+        return {
+            'samplerate': self.samplerate,
+            'blocksize': self.blocksize,
+            'elapsed_seconds': elapsed,
+            'frames_captured': self.frames,
+            'frames_expected': expected,
+            # 正值为落后（可能丢失）的帧数；包含最后一个块尚未返回的部分，正常情况下不超过一个块
+            'frames_missing': expected - self.frames,
+            'clock_ratio': self.frames / expected if expected else 0.0,
+            'blocks': self.blocks,
+            'short_blocks': self.short_blocks,
+            'record_time': self.record_time.to_dict(),
+        }
+
+
+class _JsonFormatter(logging.Formatter):
+    """每条日志输出一行JSON：时间、级别、记录器、事件名以及附带的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _KeyValueFormatter(logging.Formatter):
+    """按 LOGGING_CONFIG['format'] 输出，附带的字段以 key=value 形式追加在消息后"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            text += ' ' + ' '.join(f"{key}={json.dumps(value, ensure_ascii=False, default=str)}"
+                                   for key, value in fields.items())
+        return text
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """记录一条结构化日志：event 为事件名，fields 为附带的字段"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+
+def configure_logging(level: Optional[str] = None, path: Optional[str] = None,
+                      structured: Optional[bool] = None) -> logging.Logger:
+    """
+    启用 core 包的日志输出（未指定的参数取 LOGGING_CONFIG）
+    path 为None时输出到标准错误；重复调用会替换之前添加的处理器
+    """
+    level = level or LOGGING_CONFIG['level']
+    path = path if path is not None else LOGGING_CONFIG['file']
+    structured = LOGGING_CONFIG['structured'] if structured is None else structured
+
+    handler = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler(sys.stderr)
+    if structured:
+        handler.setFormatter(_JsonFormatter())
+    else:
+        handler.setFormatter(_KeyValueFormatter(LOGGING_CONFIG['format'], LOGGING_CONFIG['date_format']))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    for old in [h for h in logger.handlers if getattr(h, '_rec_handler', False)]:
+        logger.removeHandler(old)
+        old.close()
+    handler._rec_handler = True
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
@@ -0,0 +1,108 @@
+"""
+电平表模块
+在分析线程中对每个块做向量化的逐通道统计（峰值、RMS、削波采样数），
+按固定间隔汇总一次并发布，发布频率与块大小无关
+"""
+
+import math
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# 低于此值的电平按静音显示（dBFS）
+METER_FLOOR_DB = -90.0
+
+
+def to_dbfs(value: float) -> float:
+    """线性幅度转换为 dBFS"""
+    if value <= 0:
+        return METER_FLOOR_DB
+    return max(METER_FLOOR_DB, 20 * math.log10(value))
+
+
+class LevelReading(NamedTuple):
+    """一个发布间隔内的电平读数（不可变）"""
+    peak: Tuple[float, ...]  # 各通道峰值（线性，0~1）
+    rms: Tuple[float, ...]  # 各通道RMS（线性）
+    clips: Tuple[int, ...]  # 本间隔内各通道的削波采样数
+    total_clips: Tuple[int, ...]  # 录制开始以来各通道的削波采样数
+    frames: int  # 本间隔包含的帧数
+
+    @property
+    def peak_db(self) -> Tuple[float, ...]:
+        return tuple(to_dbfs(v) for v in self.peak)
+
+    @property
+    def rms_db(self) -> Tuple[float, ...]:
+        return tuple(to_dbfs(v) for v in self.rms)
+
+
+class LevelMeter:
+    """
+    逐块电平统计
+    - process() 每块只做少量整块的numpy归约，转置缓冲区预分配并复用
+    - 累计帧数达到发布间隔时调用 on_reading 发布一次汇总读数
+    """
+
+    def __init__(self, channels: int, samplerate: int, interval: float = 0.05,
+                 clip_threshold: float = 0.999,
+                 on_reading: Optional[Callable[[LevelReading], None]] = None):
+        if interval <= 0:
+            raise ValueError(f"发布间隔必须大于0: {interval}")
+        self.channels = channels
+        self.samplerate = samplerate
+        self.interval_frames = max(1, int(round(samplerate * interval)))
+        self.clip_threshold = clip_threshold
+        self.on_reading = on_reading
+        self.last_reading = LevelReading((0.0,) * channels, (0.0,) * channels,
+                                         (0,) * channels, (0,) * channels, 0)
+
+        self._abs: Optional[np.ndarray] = None
+        self._total_clips = np.zeros(channels, dtype=np.int64)
+        self._reset_window()
+
+    def _reset_window(self):
+        """清空当前发布间隔的累计值"""
+        self._peak = np.zeros(self.channels, dtype=np.float64)
+        self._sum_squares = np.zeros(self.channels, dtype=np.float64)
+        self._clips = np.zeros(self.channels, dtype=np.int64)
+        self._frames = 0
+
+    def process(self, block: np.ndarray):
+        """统计一个块，形状为 (帧数, 通道数)"""
+        frames = len(block)
+        if not frames:
+            return
+        if self._abs is None or self._abs.shape[1] < frames or self._abs.dtype != block.dtype:
+            self._abs = np.empty((self.channels, frames), dtype=block.dtype)
+        # 交错数据沿 axis=0 归约时内层循环只有通道数那么长，非常慢；
+        # 取绝对值的同时转置到 (通道数, 帧数) 的连续缓冲区，之后的归约都沿连续内存进行
+        magnitude = np.abs(block.T, out=self._abs[:, :frames])
+
+        peak = magnitude.max(axis=1)
+        np.maximum(self._peak, peak, out=self._peak)
+        self._sum_squares += np.einsum('ij,ij->i', magnitude, magnitude)
+        # 只有峰值达到阈值的块才需要逐采样计数
+        if peak.max() >= self.clip_threshold:
+            self._clips += np.count_nonzero(magnitude >= self.clip_threshold, axis=1)
+        self._frames += frames
+
+        if self._frames >= self.interval_frames:
+            self.flush()
+
+    def flush(self):
+        """发布当前间隔的汇总读数"""
+        if not self._frames:
+            return
+        self._total_clips += self._clips
+        reading = LevelReading(
+            peak=tuple(self._peak.tolist()),
+            rms=tuple(np.sqrt(self._sum_squares / self._frames).tolist()),
+            clips=tuple(self._clips.tolist()),
+            total_clips=tuple(self._total_clips.tolist()),
+            frames=self._frames,
+        )
+        self._reset_window()
+        self.last_reading = reading
+        if self.on_reading:
+            self.on_reading(reading)
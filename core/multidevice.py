@@ -0,0 +1,332 @@
+"""
+多设备同步采集模块
+把多个采集后端合并为一个多通道来源：
+- 每个设备在自己的采集线程中运行，数据写入各自的环形缓冲区，慢设备不会拖住其他设备
+- 第一个设备作为主时钟，开始时在同一时刻清空所有缓冲区，按帧计数对齐
+- 每个设备记录帧计数随时间的增长，按相对主设备的速率比估计时钟漂移，
+  再按缓冲区积压做缓慢的比例修正，用线性插值重采样到主时钟
+- 设备来不及提供数据时补零并记录；停顿后补发的数据使积压远超目标时丢弃多余部分，重新对齐
+"""
+
+import os
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .backends import CaptureBackend, CaptureReader
+
+# 漂移估计参数：开始估计速率前的观测时长（秒）、积压误差（秒）到比例修正的系数、
+# 积压平滑时间常数（秒）以及重采样比例的上下限
+RATE_WARMUP = 1.0
+DRIFT_KP = 0.1
+DRIFT_SMOOTHING = 0.5
+DRIFT_LIMIT = 0.01
+# 积压超过目标这么多秒即视为设备停顿后补发了数据，直接丢弃多余部分重新对齐
+RESYNC_SECONDS = 0.1
+
+
+def split_output_path(audio_path: str, index: int) -> str:
+    """分文件写入时第 index 个设备（从0开始）的输出文件路径"""
+    root, ext = os.path.splitext(audio_path)
+    return f"{root}.dev{index + 1}{ext}"
+
+
+class ChannelGroup(NamedTuple):
+    """合并输出中某个设备占用的通道范围"""
+    name: str
+    start: int
+    channels: int
+
+
+class _DeviceWorker:
+    """单个设备的采集线程 + 单生产者/单消费者环形缓冲区"""
+
+    def __init__(self, index: int, backend: CaptureBackend, samplerate: int, channels: int,
+                 blocksize: int, capacity: int):
+        self.index = index
+        self.backend = backend
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.capacity = capacity
+        self._ring = np.zeros((capacity, channels), dtype=np.float32)
+        self.write_pos = 0  # 只由采集线程推进
+        self.read_pos = 0  # 只由合并读取方推进
+        self.data_ready = threading.Event()
+        self.opened = threading.Event()
+        self.open_error: Optional[BaseException] = None
+        self.running = True
+        self.finished = False
+        self.error: Optional[BaseException] = None
+
+        # 统计
+        self.overflow_frames = 0  # 环形缓冲区满而丢弃的帧数（读取方跟不上）
+        self.underrun_frames = 0  # 读取时数据未到、补零的帧数
+        self.resync_frames = 0  # 重新对齐时丢弃的帧数
+        self.ratio = 1.0  # 当前重采样比例（设备帧 / 主时钟帧）
+        self._base_ratio = 1.0  # 最近一次按帧时钟估计的速率比
+        self._backlog_avg: Optional[float] = None
+        # 帧时钟：(时间, 累计产生的帧数)，每次写入后整体替换，读取方不会看到不一致的一对值；
+        # 速率从锚点开始估计，对齐或停顿后重新设置锚点
+        self.clock: Optional[tuple] = None
+        self._anchor: Optional[tuple] = None
+        self._frac = 1.0  # 下一个输出帧在 [历史帧, 新数据...] 中的位置
+        self._history = np.zeros((1, channels), dtype=np.float32)
+
+        self.thread = threading.Thread(target=self._run, name=f"capture-device-{index}", daemon=True)
+
+    @property
+    def backlog(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def _run(self):
+        try:
+            with self.backend.open(self.samplerate, self.channels, self.blocksize) as reader:
+                self.opened.set()
+                while self.running:
+                    data = reader.record(numframes=self.blocksize)
+                    frames = len(data)
+                    if not frames:
+                        break
+                    write_pos = self.write_pos
+                    free = self.capacity - (write_pos - self.read_pos)
+                    if frames > free:
+                        self.overflow_frames += frames - free
+                        frames = free
+                    start = write_pos % self.capacity
+                    first = min(frames, self.capacity - start)
+                    self._ring[start:start + first] = data[:first]
+                    self._ring[:frames - first] = data[first:frames]
+                    self.write_pos = write_pos + frames
+                    self.clock = (time.perf_counter(), self.write_pos + self.overflow_frames)
+                    self.data_ready.set()
+        except BaseException as e:
+            self.error = e
+            if not self.opened.is_set():
+                self.open_error = e
+        finally:
+            self.finished = True
+            self.opened.set()
+            self.data_ready.set()
+
+    def wait_for(self, frames: int, deadline: Optional[float]):
+        """等待积压达到 frames 帧，deadline 为None时一直等到设备结束"""
+        while self.backlog < frames and not self.finished:
+            self.data_ready.clear()
+            if self.backlog >= frames:
+                break
+            timeout = 0.5 if deadline is None else deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            self.data_ready.wait(timeout)
+
+    def peek(self, frames: int) -> np.ndarray:
+        """读取最早的 frames 帧（不足时补零），不推进读取位置"""
+        available = min(frames, self.backlog)
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        start = self.read_pos % self.capacity
+        first = min(available, self.capacity - start)
+        out[:first] = self._ring[start:start + first]
+        out[first:available] = self._ring[:available - first]
+        return out
+
+    def consume(self, frames: int):
+        """推进读取位置"""
+        self.read_pos += frames
+
+    def discard_backlog(self):
+        """丢弃当前积压并重新设置速率锚点（对齐时使用）"""
+        self.read_pos = self.write_pos
+        self._anchor = None
+
+    def rate(self) -> Optional[float]:
+        """从锚点开始按帧计数和时间估计的实际采样速率（帧/秒），观测时间不足时返回None"""
+        clock = self.clock
+        if clock is None:
+            return None
+        if self._anchor is None:
+            self._anchor = clock
+        anchor = self._anchor
+        if clock[0] - anchor[0] < RATE_WARMUP:
+            return None
+        return (clock[1] - anchor[1]) / (clock[0] - anchor[0])
+
+    def resync(self, target: int):
+        """停顿后设备补发的数据会让积压远超目标：丢弃多余部分，速率从此处重新估计"""
+        excess = self.backlog - target
+        if excess > RESYNC_SECONDS * self.samplerate:
+            self.consume(excess)
+            self.resync_frames += excess
+            self._backlog_avg = float(target)
+            self._anchor = None
+
+    def update_ratio(self, master_rate: Optional[float], target: int, block_seconds: float):
+        """更新重采样比例：速率比 × 积压修正"""
+        self.resync(target)
+        rate = self.rate()
+        if rate and master_rate:
+            self._base_ratio = rate / master_rate
+        # 积压随设备块的到达呈锯齿波动，先做指数平滑
+        if self._backlog_avg is None:
+            self._backlog_avg = float(target)
+        alpha = min(1.0, block_seconds / DRIFT_SMOOTHING)
+        self._backlog_avg += alpha * (self.backlog - self._backlog_avg)
+        error = (self._backlog_avg - target) / self.samplerate
+        ratio = self._base_ratio * (1.0 + DRIFT_KP * error)
+        self.ratio = min(1.0 + DRIFT_LIMIT, max(1.0 - DRIFT_LIMIT, ratio))
+
+    def resample(self, frames: int, deadline: float) -> np.ndarray:
+        """按当前比例从缓冲区取出数据并插值为 frames 帧"""
+        positions = self._frac + self.ratio * np.arange(frames)
+        end = self._frac + self.ratio * frames
+        needed = max(int(np.ceil(positions[-1])), int(end))
+        self.wait_for(needed, deadline)
+        available = self.backlog
+        chunk = self.peek(needed)
+
+        if available < needed:
+            self.underrun_frames += needed - available
+        # [历史帧, chunk...] 上做线性插值
+        buffer = np.concatenate((self._history, chunk))
+        base = positions.astype(np.int64)
+        weight = (positions - base)[:, None].astype(np.float32)
+        upper = np.minimum(base + 1, len(buffer) - 1)
+        out = buffer[base] * (1 - weight) + buffer[upper] * weight
+
+        consumed = int(end)
+        if consumed:
+            self._history = buffer[consumed:consumed + 1].copy()
+        self._frac = end - consumed
+        # 补零的部分对应的真实数据若之后补发，由 resync 丢弃
+        self.consume(min(consumed, available))
+        return out
+
+    def get_stats(self) -> dict:
+        return {
+            'name': self.backend.name,
+            'ratio': self.ratio,
+            'backlog_frames': self.backlog,
+            'overflow_frames': self.overflow_frames,
+            'underrun_frames': self.underrun_frames,
+            'resync_frames': self.resync_frames,
+            'error': str(self.error) if self.error else None,
+        }
+
+
+class _MultiDeviceReader(CaptureReader):
+    """合并读取器：主设备决定节奏，其余设备重采样后拼接到对应通道"""
+
+    def __init__(self, backend: 'MultiDeviceBackend', samplerate: int, channels: int, blocksize: int):
+        backend.check_channels(channels)
+        self.backend = backend
+        self.channels = channels
+        self.blocksize = blocksize
+        self.block_seconds = blocksize / samplerate
+        capacity = max(blocksize * 8, int(backend.ring_seconds * samplerate))
+        self.workers = [_DeviceWorker(i, device, samplerate, group.channels, blocksize, capacity)
+                        for i, (device, group) in enumerate(zip(backend.devices, backend.groups))]
+        for worker in self.workers:
+            worker.thread.start()
+        try:
+            for worker in self.workers:
+                worker.opened.wait()
+                if worker.open_error is not None:
+                    raise RuntimeError(f"设备 {worker.backend.name} 打开失败: {worker.open_error}")
+        except Exception:
+            self._stop_workers()
+            raise
+
+        # 对齐：在同一时刻清空所有缓冲区，此后各设备的帧计数从同一时间点开始
+        for worker in self.workers:
+            worker.discard_backlog()
+
+    def record(self, numframes: int) -> np.ndarray:
+        master, others = self.workers[0], self.workers[1:]
+        master.wait_for(numframes, None)
+        if master.error is not None:
+            raise RuntimeError(f"主设备 {master.backend.name} 采集失败: {master.error}")
+        frames = min(numframes, master.backlog)
+        if not frames:
+            # 主设备结束即整个来源结束
+            return np.empty((0, self.channels), dtype=np.float32)
+
+        out = np.empty((frames, self.channels), dtype=np.float32)
+        group = self.backend.groups[0]
+        out[:, group.start:group.start + group.channels] = master.peek(frames)
+        master.consume(frames)
+
+        # 其他设备最多再等半个块，慢设备只会补零，不会拖住整体
+        deadline = time.perf_counter() + self.block_seconds / 2
+        master_rate = master.rate()
+        for worker, group in zip(others, self.backend.groups[1:]):
+            worker.update_ratio(master_rate, self.blocksize, self.block_seconds)
+            out[:, group.start:group.start + group.channels] = worker.resample(frames, deadline)
+        return out
+
+    def get_stats(self) -> List[dict]:
+        return [worker.get_stats() for worker in self.workers]
+
+    def _stop_workers(self):
+        for worker in self.workers:
+            worker.running = False
+        for worker in self.workers:
+            worker.thread.join(2.0)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_workers()
+        self.backend.last_stats = self.get_stats()
+
+
+class MultiDeviceBackend(CaptureBackend):
+    """
+    多设备采集后端
+    devices[0] 为主时钟设备；各设备以同一采样率打开，通道按顺序拼接，
+    channel_counts 指定每个设备使用的通道数（默认取各设备的默认通道数）
+    """
+
+    def __init__(self, devices: Sequence[CaptureBackend], channel_counts: Optional[Sequence[int]] = None,
+                 ring_seconds: float = 2.0):
+        if not devices:
+            raise ValueError("至少需要一个设备")
+        if channel_counts is None:
+            channel_counts = [device.default_channels for device in devices]
+        if len(channel_counts) != len(devices):
+            raise ValueError("通道数列表与设备数量不一致")
+        self.devices = list(devices)
+        self.ring_seconds = ring_seconds
+        self.last_stats: List[dict] = []
+        self.groups: List[ChannelGroup] = []
+        start = 0
+        for device, count in zip(self.devices, channel_counts):
+            if not 1 <= count <= device.max_channels:
+                raise ValueError(f"设备 {device.name} 的通道数必须在 1 到 {device.max_channels} 之间: {count}")
+            self.groups.append(ChannelGroup(device.name, start, count))
+            start += count
+        self.max_channels = start
+        self.name = " + ".join(device.name for device in self.devices)
+
+    @property
+    def default_channels(self) -> int:
+        # 合并后的通道数固定，不受单设备2通道的默认限制
+        return self.max_channels
+
+    def check_channels(self, channels: int):
+        # 各设备的通道分配在构造时确定，合并后的通道数不能再改
+        if channels != self.max_channels:
+            raise ValueError(f"多设备采集的通道数固定为 {self.max_channels}，请求的是 {channels}")
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        return _MultiDeviceReader(self, samplerate, channels, blocksize)
+
+    def detect_supported_rates(self) -> List[int]:
+        # 所有设备都支持的采样率
+        rates = set(self.devices[0].detect_supported_rates())
+        for device in self.devices[1:]:
+            rates &= set(device.detect_supported_rates())
+        return sorted(rates) if rates else [44100, 48000]
+
+    def shutdown(self):
+        for device in self.devices:
+            device.shutdown()
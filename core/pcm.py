@@ -0,0 +1,144 @@
+"""
+PCM转换模块
+将采集到的浮点采样转换为WAV所需的整数或浮点格式，
+所有中间结果写入预分配缓冲区，峰值内存不超过一个块
+"""
+
+import numpy as np
+from typing import Iterator, Optional
+
+# WAV格式标签
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+# 支持的输出格式: 名称 -> (每采样字节数, 格式标签)
+SAMPLE_FORMATS = {
+    'int16': (2, WAVE_FORMAT_PCM),
+    'int24': (3, WAVE_FORMAT_PCM),
+    'int32': (4, WAVE_FORMAT_PCM),
+    'float32': (4, WAVE_FORMAT_IEEE_FLOAT),
+}
+
+# 默认分块帧数（转换大数组时每次处理的帧数）
+DEFAULT_CHUNK_FRAMES = 65536
+
+
+class PCMConverter:
+    """带饱和处理和可选TPDF抖动的PCM转换器"""
+
+    def __init__(self, sample_format: str = 'int16', dither: bool = False,
+                 chunk_frames: int = DEFAULT_CHUNK_FRAMES, seed: Optional[int] = None):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"不支持的采样格式: {sample_format}")
+        self.sample_format = sample_format
+        self.sampwidth, self.format_tag = SAMPLE_FORMATS[sample_format]
+        self.is_float = self.format_tag == WAVE_FORMAT_IEEE_FLOAT
+        self.dither = dither and not self.is_float
+        self.chunk_frames = chunk_frames
+        self._rng = np.random.default_rng(seed)
+
+        if self.is_float:
+            self.out_dtype = np.dtype('<f4')
+        elif sample_format == 'int16':
+            self.out_dtype = np.dtype('<i2')
+        elif sample_format == 'int32':
+            self.out_dtype = np.dtype('<i4')
+        else:
+            # 24位输出为紧凑排列的3字节小端整数
+            self.out_dtype = np.dtype(np.uint8)
+
+        # 满量程与饱和边界（沿用原先 x * 32767 的对称缩放）
+        bits = self.sampwidth * 8
+        self.max_value = float(2 ** (bits - 1) - 1)
+        self.min_value = float(-2 ** (bits - 1))
+
+        # 24/32位整数需要float64中间精度（float32在满量程附近的间隔达到0.5~256 LSB），16位float32足够
+        self._work_dtype = np.float64 if sample_format in ('int24', 'int32') else np.float32
+
+        # 预分配缓冲区，按需增长到最大块大小
+        self._capacity = 0
+        self._work: Optional[np.ndarray] = None
+        self._noise: Optional[np.ndarray] = None
+        self._noise2: Optional[np.ndarray] = None
+        self._out: Optional[np.ndarray] = None
+        self._wide: Optional[np.ndarray] = None
+
+    def _ensure_capacity(self, numsamples: int):
+        """确保缓冲区至少能容纳 numsamples 个采样"""
+        if numsamples <= self._capacity:
+            return
+        self._capacity = numsamples
+        self._work = np.empty(numsamples, dtype=self._work_dtype)
+        if self.dither:
+            self._noise = np.empty(numsamples, dtype=self._work_dtype)
+            self._noise2 = np.empty(numsamples, dtype=self._work_dtype)
+        if self.sample_format == 'int24':
+            self._wide = np.empty(numsamples, dtype='<i4')
+            self._out = np.empty((numsamples, 3), dtype=np.uint8)
+        else:
+            self._out = np.empty(numsamples, dtype=self.out_dtype)
+
+    def convert(self, data: np.ndarray) -> np.ndarray:
+        """
+        转换一个块，返回形状为 (帧数, 通道数 * 字节或1) 的输出视图
+        返回值指向内部缓冲区，下一次调用前必须用完
+        """
+        frames = len(data)
+        samples = data.reshape(-1)
+        n = samples.size
+        self._ensure_capacity(n)
+        work = self._work[:n]
+
+        # 归一化到 [-1, 1] 的缩放系数（整数输入按其满量程换算）
+        if np.issubdtype(data.dtype, np.integer):
+            scale = 1.0 / float(np.iinfo(data.dtype).max)
+        else:
+            scale = 1.0
+
+        if self.is_float:
+            out = self._out[:n]
+            if scale == 1.0:
+                np.clip(samples, -1.0, 1.0, out=out, casting='unsafe')
+            else:
+                np.multiply(samples, scale, out=work, casting='unsafe')
+                np.clip(work, -1.0, 1.0, out=out, casting='unsafe')
+            return out.reshape(frames, -1)
+
+        # 显式指定计算类型：否则 float32 输入按 float32 相乘，只是结果再存入 float64 缓冲区
+        np.multiply(samples, scale * self.max_value, out=work, dtype=self._work_dtype, casting='unsafe')
+        if self.dither:
+            # TPDF抖动：两个均匀分布之差，幅度 ±1 LSB
+            noise = self._noise[:n]
+            noise2 = self._noise2[:n]
+            self._rng.random(out=noise, dtype=self._work_dtype)
+            self._rng.random(out=noise2, dtype=self._work_dtype)
+            np.subtract(noise, noise2, out=noise)
+            np.add(work, noise, out=work)
+        np.rint(work, out=work)
+        # 饱和处理，避免越界采样回绕
+        np.clip(work, self.min_value, self.max_value, out=work)
+
+        if self.sample_format == 'int24':
+            wide = self._wide[:n]
+            np.copyto(wide, work, casting='unsafe')
+            out = self._out[:n]
+            np.copyto(out, wide.view(np.uint8).reshape(n, 4)[:, :3])
+            return out.reshape(frames, -1)
+
+        out = self._out[:n]
+        np.copyto(out, work, casting='unsafe')
+        return out.reshape(frames, -1)
+
+    def iter_convert(self, data: np.ndarray) -> Iterator[np.ndarray]:
+        """分块转换大数组，每次只占用一个分块的缓冲区"""
+        step = max(1, self.chunk_frames)
+        for start in range(0, len(data), step):
+            yield self.convert(data[start:start + step])
+
+    def is_encoded(self, data: np.ndarray) -> bool:
+        """
+        数据是否是本转换器输出缓冲区的视图（即 convert() 的结果，可直接写入文件）
+        只看数据类型无法区分：float32 输入与 float32 输出类型相同，却仍需饱和处理
+        """
+        return self._out is not None and (data is self._out or data.base is self._out)
+
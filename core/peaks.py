@@ -0,0 +1,269 @@
+"""
+波形峰值金字塔模块
+录制时在写入分支中逐块计算多级分辨率的 最小值/最大值/RMS：第0级每 base_frames 帧一个点，
+之后每级把上一级的 factor 个点合并为一个点；停止时连同 时间→字节偏移 索引写入 <文件名>.peaks 伴随文件
+- 任意缩放级别下按像素数取最接近的一级，绘制耗时只与像素宽度有关，与录音时长无关
+- 伴随文件按级别连续存放 int16 数据，读取时内存映射，数小时的录音也能立即打开
+- 索引记录每个音频文件（分段录制时为每个分段）的起始帧和数据起始位置，PCM WAV 中任意帧的字节偏移由此直接算出
+- 峰值描述的是写入文件的音频；启用能量门限时，文件时间轴与原始时间轴的对应关系见 .gate.json
+"""
+
+import bisect
+import json
+import os
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import PEAK_CONFIG
+
+# 伴随文件格式：魔数、版本、JSON元数据长度，随后为JSON元数据和各级数据（按级别顺序，int16小端）
+PEAK_MAGIC = b'RPKS'
+PEAK_VERSION = 1
+_PREAMBLE = struct.Struct('<4sHI')
+
+# 每个点的三个值：最小值、最大值、RMS，按满量程量化为 int16
+_SCALE = 32767.0
+MIN, MAX, RMS = 0, 1, 2
+
+
+def peak_file_path(audio_path: str) -> str:
+    """录音文件对应的峰值伴随文件路径"""
+    root, _ = os.path.splitext(audio_path)
+    return root + '.peaks'
+
+
+def _quantize(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values * _SCALE), -_SCALE, _SCALE).astype('<i2')
+
+
+class _LevelBuffer:
+    """
+    一级峰值数据的增长缓冲区（采集线程追加，界面线程可随时读取已发布的部分）
+    数组和点数作为一个元组整体替换发布，读取方不会拿到新点数配旧数组（旧数组超出部分未初始化）
+    """
+
+    def __init__(self, channels: int, capacity: int = 1024):
+        self._published = (np.empty((capacity, channels, 3), dtype='<i2'), 0)
+
+    @property
+    def count(self) -> int:
+        return self._published[1]
+
+    def append(self, values: np.ndarray):
+        data, count = self._published
+        needed = count + len(values)
+        if needed > len(data):
+            # 容量翻倍；读取方持有的旧数组仍然有效
+            grown = np.empty((max(needed, len(data) * 2),) + data.shape[1:], dtype='<i2')
+            grown[:count] = data[:count]
+            data = grown
+        data[count:needed] = values
+        self._published = (data, needed)  # 数据写入后再发布
+
+    def view(self) -> np.ndarray:
+        data, count = self._published
+        return data[:count]
+
+
+class PeakPyramid:
+    """
+    多级峰值金字塔
+    录制时由 process() 逐块追加、flush() 结束（每级最后一个点可能只覆盖不足一个点的帧数）；
+    已保存的伴随文件用 PeakPyramid.load() 打开，两者都可用 render() 绘制任意区间
+    """
+
+    def __init__(self, samplerate: int, channels: int, base_frames: int = PEAK_CONFIG['base_frames'],
+                 factor: int = PEAK_CONFIG['factor'], levels: int = PEAK_CONFIG['levels']):
+        if base_frames < 1 or factor < 2 or levels < 1:
+            raise ValueError(f"无效的峰值金字塔参数: base_frames={base_frames}, factor={factor}, levels={levels}")
+        self.samplerate = samplerate
+        self.channels = channels
+        self.base_frames = base_frames
+        self.factor = factor
+        self.frames = 0
+        self._levels: List = [_LevelBuffer(channels) for _ in range(levels)]
+
+        # 不足一个点的尾部帧，以及各级等待凑满 factor 个点再向上合并的点（最小值、最大值、平方和、帧数）
+        self._carry = np.empty((base_frames, channels), dtype=np.float32)
+        self._carry_frames = 0
+        self._pending: List[Optional[tuple]] = [None] * levels
+
+        # 时间→字节偏移索引：[(起始帧, 文件名, 数据起始位置)]，保存时写入
+        self.index: List[Tuple[int, str, int]] = []
+        self.block_align = 0
+
+    @property
+    def levels(self) -> int:
+        return len(self._levels)
+
+    def level_frames(self, level: int) -> int:
+        """第 level 级每个点覆盖的帧数"""
+        return self.base_frames * self.factor ** level
+
+    def level(self, level: int) -> np.ndarray:
+        """第 level 级的峰值数据，形状 (点数, 通道数, 3)，int16"""
+        buffer = self._levels[level]
+        return buffer.view() if isinstance(buffer, _LevelBuffer) else buffer
+
+    def process(self, block: np.ndarray):
+        """追加一个块（浮点采样，形状 (帧数, 通道数)）"""
+        frames = len(block)
+        if not frames:
+            return
+        self.frames += frames
+        start = 0
+        if self._carry_frames:
+            start = min(frames, self.base_frames - self._carry_frames)
+            self._carry[self._carry_frames:self._carry_frames + start] = block[:start]
+            self._carry_frames += start
+            if self._carry_frames < self.base_frames:
+                return
+            self._push(0, *self._reduce_frames(self._carry[np.newaxis]))
+            self._carry_frames = 0
+        # 整点部分直接在块的视图上计算，不复制
+        whole = (frames - start) // self.base_frames * self.base_frames
+        if whole:
+            bins = block[start:start + whole].reshape(-1, self.base_frames, self.channels)
+            self._push(0, *self._reduce_frames(bins))
+        rest = frames - start - whole
+        if rest:
+            self._carry[:rest] = block[start + whole:]
+            self._carry_frames = rest
+
+    def _reduce_frames(self, bins: np.ndarray) -> tuple:
+        """(点数, 每点帧数, 通道数) 的采样 -> 每点的最小值、最大值、平方和、帧数"""
+        counts = np.full(len(bins), bins.shape[1], dtype=np.int64)
+        return (bins.min(axis=1), bins.max(axis=1),
+                np.einsum('ijk,ijk->ik', bins, bins, dtype=np.float64), counts)
+
+    def _push(self, level: int, mins: np.ndarray, maxs: np.ndarray, sumsq: np.ndarray, counts: np.ndarray):
+        """向第 level 级追加完整的点，凑满 factor 个点时合并到上一级"""
+        rms = np.sqrt(sumsq / counts[:, np.newaxis])
+        self._levels[level].append(np.stack((_quantize(mins), _quantize(maxs), _quantize(rms)), axis=-1))
+        if level + 1 >= self.levels:
+            return
+        pending = self._pending[level + 1]
+        if pending is not None:
+            mins, maxs, sumsq, counts = (np.concatenate((a, b)) for a, b in zip(pending, (mins, maxs, sumsq, counts)))
+        whole = len(mins) // self.factor * self.factor
+        self._pending[level + 1] = (mins[whole:], maxs[whole:], sumsq[whole:], counts[whole:]) \
+            if whole < len(mins) else None
+        if whole:
+            shape = (-1, self.factor, self.channels)
+            self._push(level + 1, mins[:whole].reshape(shape).min(axis=1),
+                       maxs[:whole].reshape(shape).max(axis=1),
+                       sumsq[:whole].reshape(shape).sum(axis=1),
+                       counts[:whole].reshape(-1, self.factor).sum(axis=1))
+
+    def flush(self):
+        """录制结束：把尾部不足一个点的帧和各级未合并的点作为每级的最后一个点"""
+        partial = None
+        if self._carry_frames:
+            partial = self._reduce_frames(self._carry[np.newaxis, :self._carry_frames])
+            self._carry_frames = 0
+        for level in range(self.levels):
+            if level:
+                parts = [p for p in (self._pending[level], partial) if p is not None]
+                self._pending[level] = None
+                if not parts:
+                    break
+                mins, maxs, sumsq, counts = (np.concatenate(values) for values in zip(*parts))
+                partial = (mins.min(axis=0, keepdims=True), maxs.max(axis=0, keepdims=True),
+                           sumsq.sum(axis=0, keepdims=True), counts.sum(keepdims=True))
+            elif partial is None:
+                continue
+            mins, maxs, sumsq, counts = partial
+            rms = np.sqrt(sumsq / counts[:, np.newaxis])
+            self._levels[level].append(np.stack((_quantize(mins), _quantize(maxs), _quantize(rms)), axis=-1))
+
+    def render(self, start_frame: int, end_frame: int, width: int) -> np.ndarray:
+        """
+        把 [start_frame, end_frame) 区间绘制为 width 个像素列，返回 (width, 通道数, 3) 的浮点数组（最小值、最大值、RMS）；
+        取每点帧数不超过每像素帧数的最粗一级，每个像素最多合并 factor 个点
+        """
+        width = max(1, int(width))
+        end_frame = max(end_frame, start_frame + 1)
+        frames_per_pixel = (end_frame - start_frame) / width
+        level = 0
+        while level + 1 < self.levels and self.level_frames(level + 1) <= frames_per_pixel:
+            level += 1
+        data = self.level(level)
+        out = np.zeros((width, self.channels, 3), dtype=np.float32)
+        if not len(data):
+            return out
+
+        # 每个像素列的起止点（左闭右开），区间超出已有数据的像素保持为0
+        step = self.level_frames(level)
+        edges = np.floor(np.linspace(start_frame, end_frame, width + 1) / step).astype(np.int64)
+        first = np.clip(edges[:-1], 0, len(data))
+        last = np.clip(np.maximum(edges[1:], edges[:-1] + 1), 0, len(data))
+        valid = last > first
+        if not valid.any():
+            return out
+        lo, hi = first[valid][0], last[valid][-1]
+        window = data[lo:hi].astype(np.float32) / _SCALE
+        starts = first[valid] - lo
+        # reduceat 的每段到下一个起点为止；起点相同的像素只取该点
+        counts = np.maximum(np.diff(starts, append=hi - lo), 1)[:, np.newaxis]
+        out[valid, :, MIN] = np.minimum.reduceat(window[:, :, MIN], starts, axis=0)
+        out[valid, :, MAX] = np.maximum.reduceat(window[:, :, MAX], starts, axis=0)
+        out[valid, :, RMS] = np.sqrt(np.add.reduceat(window[:, :, RMS] ** 2, starts, axis=0) / counts)
+        return out
+
+    def set_index(self, entries: Sequence[Tuple[int, str, int]], block_align: int):
+        """设置时间→字节偏移索引：每个音频文件的 (起始帧, 路径, 数据起始位置) 和每帧字节数"""
+        self.index = [(int(frame), path, int(offset)) for frame, path, offset in entries]
+        self.block_align = block_align
+
+    def seek(self, seconds: float) -> Tuple[str, int]:
+        """时间（秒）-> (音频文件路径, 该帧在文件中的字节偏移)"""
+        if not self.index:
+            raise RuntimeError("峰值数据没有字节偏移索引")
+        frame = min(max(0, int(seconds * self.samplerate)), max(0, self.frames - 1))
+        position = bisect.bisect_right([entry[0] for entry in self.index], frame) - 1
+        start, path, offset = self.index[max(0, position)]
+        return path, offset + (frame - start) * self.block_align
+
+    def save(self, path: str):
+        """写出伴随文件；索引中的音频路径保存为相对伴随文件所在目录的文件名"""
+        folder = os.path.dirname(os.path.abspath(path))
+        meta = {
+            'samplerate': self.samplerate, 'channels': self.channels, 'frames': self.frames,
+            'base_frames': self.base_frames, 'factor': self.factor,
+            'counts': [len(self.level(level)) for level in range(self.levels)],
+            'block_align': self.block_align,
+            'index': [[frame, os.path.relpath(os.path.abspath(audio), folder), offset]
+                      for frame, audio, offset in self.index],
+        }
+        header = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_PREAMBLE.pack(PEAK_MAGIC, PEAK_VERSION, len(header)))
+            f.write(header)
+            for level in range(self.levels):
+                f.write(np.ascontiguousarray(self.level(level)).data)
+
+    @classmethod
+    def load(cls, path: str) -> 'PeakPyramid':
+        """打开伴随文件（各级数据内存映射，不整体读入）"""
+        with open(path, 'rb') as f:
+            magic, version, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != PEAK_MAGIC or version != PEAK_VERSION:
+                raise ValueError(f"不是有效的峰值文件: {path}")
+            meta = json.loads(f.read(header_size).decode('utf-8'))
+        pyramid = cls(meta['samplerate'], meta['channels'], meta['base_frames'], meta['factor'],
+                      len(meta['counts']))
+        pyramid.frames = meta['frames']
+        offset = _PREAMBLE.size + header_size
+        levels = []
+        for count in meta['counts']:
+            shape = (count, meta['channels'], 3)
+            levels.append(np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=shape)
+                          if count else np.empty(shape, dtype='<i2'))
+            offset += count * meta['channels'] * 3 * 2
+        pyramid._levels = levels
+        folder = os.path.dirname(os.path.abspath(path))
+        pyramid.set_index([(frame, os.path.join(folder, audio), data_offset)
+                           for frame, audio, data_offset in meta['index']], meta['block_align'])
+        return pyramid
@@ -0,0 +1,387 @@
+"""
+采集处理流水线模块
+采集线程只负责把音频块放入有界队列，由独立的消费线程完成转换、写入和分析；
+每个块以只读视图分发给所有分支和订阅者，不复制数据
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .arena import FrameArena
+from .gate import EnergyGate
+from .instrumentation import LatencyHistogram
+from .meter import LevelMeter
+from .pcm import PCMConverter
+from .peaks import PeakPyramid
+from .segments import SegmentedWavWriter
+from .wavwriter import StreamingWavWriter
+
+# 队列溢出策略
+OVERFLOW_BLOCK = 'block'              # 阻塞采集线程等待空位（超时后丢弃新块）
+OVERFLOW_DROP_NEWEST = 'drop_newest'  # 丢弃新到达的块
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # 丢弃队列中最旧的块
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+
+def readonly_view(block: np.ndarray) -> np.ndarray:
+    """返回块的只读视图（不复制数据）"""
+    if not block.flags.writeable:
+        return block
+    view = block.view()
+    view.flags.writeable = False
+    return view
+
+
+class BlockQueue:
+    """带溢出策略和水位统计的有界块队列"""
+
+    def __init__(self, maxsize: int, overflow: str = OVERFLOW_BLOCK, put_timeout: float = 1.0):
+        if maxsize < 1:
+            raise ValueError(f"队列长度必须大于0: {maxsize}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 统计计数
+        self.puts = 0
+        self.drops = 0
+        self.high_watermark = 0
+        self.blocked_puts = 0
+        self.blocked_seconds = 0.0
+
+    def put(self, block) -> bool:
+        """放入一个块，返回是否成功入队（未被丢弃）"""
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    self.drops += 1
+                    return False
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self.drops += 1
+                else:
+                    # 阻塞等待消费者腾出空位
+                    self.blocked_puts += 1
+                    started = time.perf_counter()
+                    self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed,
+                                        timeout=self.put_timeout)
+                    self.blocked_seconds += time.perf_counter() - started
+                    if len(self._items) >= self.maxsize:
+                        self.drops += 1
+                        return False
+
+            self._items.append(block)
+            self.puts += 1
+            self.high_watermark = max(self.high_watermark, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None):
+        """取出一个块；队列已关闭且为空时返回None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                return None
+            if not self._items:
+                return None
+            block = self._items.popleft()
+            self._cond.notify_all()
+            return block
+
+    def close(self):
+        """关闭队列，消费者取完剩余块后退出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def get_stats(self) -> dict:
+        """获取队列统计信息"""
+        return {
+            'maxsize': self.maxsize,
+            'overflow': self.overflow,
+            'depth': len(self._items),
+            'high_watermark': self.high_watermark,
+            'peak_fill_ratio': self.high_watermark / self.maxsize,
+            'puts': self.puts,
+            'drops': self.drops,
+            'blocked_puts': self.blocked_puts,
+            'blocked_seconds': self.blocked_seconds,
+        }
+
+
+class PipelineStage:
+    """流水线处理阶段基类"""
+
+    name = 'stage'  # 统计信息中使用的阶段名称
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        """处理一个块，返回交给下一阶段的块（返回None则终止本块的后续处理）"""
+        return block
+
+    def close(self):
+        """流水线结束时调用"""
+        pass
+
+
+class GateStage(PipelineStage):
+    """门限阶段：丢弃静音段，只把需要保留的数据交给后续阶段"""
+
+    name = 'gate'
+
+    def __init__(self, gate: EnergyGate):
+        self.gate = gate
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        return self.gate.process(block)
+
+    def close(self):
+        self.gate.finish()
+
+
+class ChannelSelectStage(PipelineStage):
+    """通道选择阶段：取出连续的若干通道（多设备分文件写入时每个设备一个分支）"""
+
+    name = 'select'
+
+    def __init__(self, start: int, channels: int):
+        self.start = start
+        self.stop = start + channels
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        return block[:, self.start:self.stop]
+
+
+class ConvertStage(PipelineStage):
+    """转换阶段：浮点采样转换为目标PCM格式（结果位于转换器的复用缓冲区中）"""
+
+    name = 'convert'
+
+    def __init__(self, converter: PCMConverter):
+        self.converter = converter
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        return self.converter.convert(block)
+
+
+class WriteStage(PipelineStage):
+    """写入阶段：逐块写入WAV文件（单文件或分段文件）"""
+
+    name = 'write'
+
+    def __init__(self, writer: Union[StreamingWavWriter, SegmentedWavWriter]):
+        self.writer = writer
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        self.writer.write(block)
+        return block
+
+    def close(self):
+        self.writer.close()
+
+
+class MemoryStage(PipelineStage):
+    """内存缓存阶段：将块复制进预分配的帧存储区，停止后统一保存"""
+
+    name = 'memory'
+
+    def __init__(self, storage: FrameArena):
+        self.storage = storage
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        self.storage.append(block)
+        return block
+
+
+class CallbackStage(PipelineStage):
+    """分析阶段：调用外部回调（如UI进度更新）"""
+
+    name = 'callback'
+
+    def __init__(self, callback: Callable[[np.ndarray], None]):
+        self.callback = callback
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        self.callback(block)
+        return block
+
+
+class MeterStage(PipelineStage):
+    """分析阶段：逐块统计电平，按固定间隔发布读数"""
+
+    name = 'meter'
+
+    def __init__(self, meter: LevelMeter):
+        self.meter = meter
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        self.meter.process(block)
+        return block
+
+    def close(self):
+        self.meter.flush()
+
+
+class PeakStage(PipelineStage):
+    """峰值阶段：为写入的音频增量计算多级波形峰值（位于门限之后、格式转换之前）"""
+
+    name = 'peaks'
+
+    def __init__(self, pyramid: PeakPyramid):
+        self.pyramid = pyramid
+
+    def process(self, block: np.ndarray) -> Optional[np.ndarray]:
+        self.pyramid.process(block)
+        return block
+
+    def close(self):
+        self.pyramid.flush()
+
+
+class _Branch:
+    """流水线分支：一个有界队列 + 一个消费线程 + 若干顺序执行的阶段"""
+
+    def __init__(self, name: str, stages: Sequence[PipelineStage], queue: BlockQueue):
+        self.name = name
+        self.stages = list(stages)
+        self.queue = queue
+        self.error: Optional[BaseException] = None
+        # 每个阶段处理一个块的耗时
+        self.timings = [LatencyHistogram() for _ in self.stages]
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+
+    def _run(self):
+        while True:
+            block = self.queue.get()
+            if block is None:
+                break
+            if self.error is not None:
+                # 出错后继续取空队列，避免采集线程被阻塞
+                continue
+            try:
+                started = time.perf_counter()
+                for stage, timing in zip(self.stages, self.timings):
+                    block = stage.process(block)
+                    now = time.perf_counter()
+                    timing.add(now - started)
+                    started = now
+                    if block is None:
+                        break
+            except BaseException as e:
+                self.error = e
+
+    def close(self):
+        for stage in self.stages:
+            try:
+                stage.close()
+            except BaseException as e:
+                if self.error is None:
+                    self.error = e
+
+
+class RecordingPipeline:
+    """录制流水线：采集线程调用push()，每个分支在自己的线程中消费"""
+
+    def __init__(self):
+        self._branches: List[_Branch] = []
+        self._started = False
+        # 订阅者（见 fanout.Subscription）：录制中可随时增减，整体替换元组，采集线程遍历时无需加锁
+        self._subscriptions: tuple = ()
+        self._sub_lock = threading.Lock()
+        self._all_subscriptions = []  # 本次录制挂过的全部订阅者（含已断开的），用于统计
+        self.frames_pushed = 0
+
+    def add_branch(self, name: str, stages: Sequence[PipelineStage], maxsize: int,
+                   overflow: str = OVERFLOW_BLOCK, put_timeout: float = 1.0):
+        """添加一个消费分支"""
+        if self._started:
+            raise RuntimeError("流水线已启动，无法添加分支")
+        self._branches.append(_Branch(name, stages, BlockQueue(maxsize, overflow, put_timeout)))
+
+    def start(self):
+        """启动所有消费线程"""
+        self._started = True
+        for branch in self._branches:
+            branch.thread.start()
+
+    def add_subscription(self, subscription):
+        """挂上一个订阅者，从下一个块开始投递"""
+        with self._sub_lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+            self._all_subscriptions.append(subscription)
+
+    def remove_subscription(self, subscription):
+        """摘下订阅者（不关闭它）"""
+        with self._sub_lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def push(self, block: np.ndarray, borrowed: bool = False):
+        """
+        由采集线程调用：把块的只读视图分发到各分支队列和订阅者（块本身不会被复制）
+        borrowed=True 表示块的内存在流水线关闭后会被复用（如预录环形缓冲区）：
+        分支在 close() 返回前处理完，仍用视图；订阅者可能在此之后才读取，改为投递一份副本
+        """
+        view = readonly_view(block)
+        for branch in self._branches:
+            branch.queue.put(view)
+        frame = self.frames_pushed
+        self.frames_pushed += len(view)
+        subscriptions = self._subscriptions
+        if borrowed and subscriptions:
+            view = readonly_view(block.copy())
+        for subscription in subscriptions:
+            if not subscription.offer(frame, view):
+                # 被断开的慢订阅者不再投递
+                self.remove_subscription(subscription)
+
+    def close(self):
+        """关闭队列和订阅，等待消费线程处理完剩余块，并结束各阶段"""
+        with self._sub_lock:
+            subscriptions, self._subscriptions = self._subscriptions, ()
+        for subscription in subscriptions:
+            subscription.close()
+        for branch in self._branches:
+            branch.queue.close()
+        for branch in self._branches:
+            if self._started:
+                branch.thread.join()
+            branch.close()
+
+        for branch in self._branches:
+            if branch.error is not None:
+                raise RuntimeError(f"流水线分支 {branch.name} 处理失败: {branch.error}")
+
+    def get_depth(self) -> tuple:
+        """不加锁地读取写入分支（第一个分支）的队列深度、容量和全部分支的丢弃总数，供状态快照使用"""
+        if not self._branches:
+            return 0, 0, 0
+        queue = self._branches[0].queue
+        return len(queue), queue.maxsize, sum(branch.queue.drops for branch in self._branches)
+
+    def get_stats(self) -> dict:
+        """获取各分支队列统计信息"""
+        return {branch.name: branch.queue.get_stats() for branch in self._branches}
+
+    def get_subscription_stats(self) -> dict:
+        """获取各订阅者的投递、丢弃、降级和断开统计"""
+        return {subscription.name: subscription.get_stats() for subscription in list(self._all_subscriptions)}
+
+    def get_stage_stats(self) -> dict:
+        """获取各分支每个阶段的处理耗时直方图"""
+        return {branch.name: {stage.name: timing.to_dict()
+                              for stage, timing in zip(branch.stages, branch.timings)}
+                for branch in self._branches}
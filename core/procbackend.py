@@ -0,0 +1,270 @@
+"""
+子进程采集后端
+在独立的子进程中运行任意采集后端，避免界面重绘、格式转换等工作占用GIL导致采集不及时：
+- 控制命令（打开、停止、查询）通过 multiprocessing 管道传递
+- 音频数据经由 multiprocessing.shared_memory 中的单生产者/单消费者环形缓冲区传给父进程
+- 子进程和父进程各自统计溢出计数，用于验证该模式确实消除了丢帧
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .backends import CaptureBackend, CaptureReader
+
+# 共享内存头部：int64 计数器的下标
+_WRITE_POS = 0  # 子进程累计写入的帧数
+_READ_POS = 1  # 父进程累计读取的帧数
+_STATE = 2  # 子进程状态
+_RING_OVERRUN_FRAMES = 3  # 环形缓冲区满，子进程丢弃的帧数
+_LATE_BLOCKS = 4  # 子进程两次 record() 返回间隔超过块时长容差的次数（设备侧溢出的风险）
+_CAPTURED_FRAMES = 5  # 子进程从设备读取的帧数
+_HEADER_SLOTS = 8
+
+# 子进程状态
+STATE_RUNNING = 1
+STATE_FINISHED = 2  # 来源结束或已停止
+STATE_FAILED = 3
+
+# 两次 record() 返回的间隔超过块时长的此倍数即计为一次延迟
+LATE_TOLERANCE = 1.5
+
+
+def _capture_main(conn, factory: Callable[[], CaptureBackend]):
+    """子进程入口：创建后端，按父进程的命令打开采集并写入共享内存环形缓冲区"""
+    try:
+        backend = factory()
+    except Exception as e:
+        conn.send(('error', f"子进程初始化采集后端失败: {e}"))
+        return
+    conn.send(('info', backend.name, backend.max_channels))
+
+    while True:
+        try:
+            command, *args = conn.recv()
+        except EOFError:
+            return
+        if command == 'shutdown':
+            return
+        if command == 'rates':
+            conn.send(('rates', backend.detect_supported_rates()))
+        elif command == 'open':
+            _capture_loop(conn, backend, *args)
+
+
+def _capture_loop(conn, backend: CaptureBackend, shm_name: str, capacity: int,
+                  samplerate: int, channels: int, blocksize: int, lossless: bool):
+    """子进程：采集直到父进程发出 stop 或来源结束"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+    ring = np.ndarray((capacity, channels), dtype=np.float32, buffer=shm.buf, offset=header.nbytes)
+    late_after = LATE_TOLERANCE * blocksize / samplerate
+    try:
+        with backend.open(samplerate, channels, blocksize) as reader:
+            header[_STATE] = STATE_RUNNING
+            conn.send(('opened',))
+            last = time.perf_counter()
+            while not conn.poll():
+                data = reader.record(numframes=blocksize)
+                now = time.perf_counter()
+                if now - last > late_after:
+                    header[_LATE_BLOCKS] += 1
+                last = now
+                frames = len(data)
+                if not frames:
+                    break
+                header[_CAPTURED_FRAMES] += frames
+
+                # 父进程来不及读取时丢弃新数据（不覆盖父进程可能正在读取的区域）；
+                # 无损模式用于文件/合成等可以等待的来源，等父进程腾出空间
+                write_pos = int(header[_WRITE_POS])
+                free = capacity - (write_pos - int(header[_READ_POS]))
+                while lossless and frames > free and not conn.poll():
+                    time.sleep(0.001)
+                    free = capacity - (write_pos - int(header[_READ_POS]))
+                if frames > free:
+                    if lossless:
+                        # 等待中收到了停止命令：父进程不再读取，剩余数据直接丢弃，不计为溢出
+                        break
+                    header[_RING_OVERRUN_FRAMES] += frames - free
+                    frames = free
+                start = write_pos % capacity
+                first = min(frames, capacity - start)
+                ring[start:start + first] = data[:first]
+                ring[:frames - first] = data[first:frames]
+                # 数据写完后再推进写位置，父进程看到新位置时数据已就绪
+                header[_WRITE_POS] = write_pos + frames
+        header[_STATE] = STATE_FINISHED
+    except Exception as e:
+        header[_STATE] = STATE_FAILED
+        conn.send(('error', f"子进程采集失败: {e}"))
+    finally:
+        # 等待父进程的 stop，保证命令与应答一一对应
+        try:
+            conn.recv()
+            conn.send(('stopped',))
+        except (EOFError, OSError):
+            pass
+        del header, ring
+        shm.close()
+
+
+class _ProcessReader(CaptureReader):
+    """父进程一侧的读取器：从共享内存环形缓冲区取出数据"""
+
+    def __init__(self, backend: 'ProcessBackend', samplerate: int, channels: int, blocksize: int):
+        self.backend = backend
+        self.channels = channels
+        self.capacity = max(blocksize * 4, int(backend.ring_seconds * samplerate))
+        self.poll_interval = min(0.002, blocksize / samplerate / 4)
+        self.late_reads = 0  # 读取时积压超过环形缓冲区一半的次数（父进程跟不上）
+        self.max_backlog = 0
+
+        header_bytes = _HEADER_SLOTS * 8
+        self._shm = shared_memory.SharedMemory(create=True, size=header_bytes + self.capacity * channels * 4)
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self._shm.buf)
+        self._header[:] = 0
+        self._ring = np.ndarray((self.capacity, channels), dtype=np.float32,
+                                buffer=self._shm.buf, offset=header_bytes)
+        self._closed = False
+        backend._command('open', self._shm.name, self.capacity, samplerate, channels, blocksize,
+                         backend.lossless)
+        reply = backend._reply('opened')
+        if reply[0] != 'opened':
+            self.__exit__(None, None, None)
+            raise RuntimeError(reply[1])
+
+    def record(self, numframes: int) -> np.ndarray:
+        header = self._header
+        while True:
+            read_pos = int(header[_READ_POS])
+            available = int(header[_WRITE_POS]) - read_pos
+            if available >= numframes or header[_STATE] != STATE_RUNNING:
+                break
+            time.sleep(self.poll_interval)
+        if header[_STATE] == STATE_FAILED:
+            raise RuntimeError(self.backend._pending_error() or "子进程采集失败")
+
+        self.max_backlog = max(self.max_backlog, available)
+        if available > self.capacity // 2:
+            self.late_reads += 1
+        frames = min(numframes, available)
+        out = np.empty((frames, self.channels), dtype=np.float32)
+        start = read_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        out[:first] = self._ring[start:start + first]
+        out[first:] = self._ring[:frames - first]
+        header[_READ_POS] = read_pos + frames
+        return out
+
+    def get_overrun_stats(self) -> dict:
+        """两侧的溢出计数"""
+        header = self._header
+        return {
+            'child_captured_frames': int(header[_CAPTURED_FRAMES]),
+            'child_ring_overrun_frames': int(header[_RING_OVERRUN_FRAMES]),
+            'child_late_blocks': int(header[_LATE_BLOCKS]),
+            'parent_late_reads': self.late_reads,
+            'parent_max_backlog_frames': self.max_backlog,
+            'ring_capacity_frames': self.capacity,
+        }
+
+    def _release(self):
+        """释放共享内存"""
+        if self._closed:
+            return
+        self._closed = True
+        self.backend.last_stats = self.get_overrun_stats()
+        del self._header, self._ring
+        self._shm.close()
+        self._shm.unlink()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.backend._command('stop')
+        self.backend._reply('stopped')
+        self._release()
+
+
+class ProcessBackend(CaptureBackend):
+    """
+    子进程采集后端
+    factory 在子进程中调用以创建实际的后端，必须可以被 pickle（如后端类本身或 functools.partial）；
+    lossless=True 时环形缓冲区满了子进程会等待而不是丢弃，只适用于快于实时运行的来源
+    """
+
+    def __init__(self, factory: Callable[[], CaptureBackend], ring_seconds: float = 2.0,
+                 lossless: bool = False):
+        self.ring_seconds = ring_seconds
+        self.lossless = lossless
+        self.last_stats: dict = {}
+        self._errors: List[str] = []
+        # 使用 spawn，避免在已有线程的进程中 fork
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_capture_main, args=(child_conn, factory),
+                                        name="capture-process", daemon=True)
+        self._process.start()
+        child_conn.close()
+
+        reply = self._reply('info')
+        if reply[0] != 'info':
+            self.shutdown()
+            raise RuntimeError(reply[1])
+        _, self.name, self.max_channels = reply
+
+    def _command(self, *message):
+        """向子进程发送控制命令"""
+        try:
+            self._conn.send(message)
+        except OSError:
+            raise RuntimeError("采集子进程已意外退出")
+
+    def _reply(self, expected: str, timeout: float = 10.0) -> tuple:
+        """等待指定类型的应答；等待 stopped 时跳过错误消息，其余情况下错误消息直接返回"""
+        while True:
+            if not self._conn.poll(timeout):
+                raise RuntimeError("等待采集子进程应答超时")
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                raise RuntimeError("采集子进程已意外退出")
+            if message[0] == 'error':
+                self._errors.append(message[1])
+                if expected != 'stopped':
+                    return message
+            elif message[0] == expected:
+                return message
+
+    def _pending_error(self) -> Optional[str]:
+        """取出子进程报告的错误"""
+        while self._conn.poll(0):
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == 'error':
+                self._errors.append(message[1])
+        return self._errors[-1] if self._errors else None
+
+    def open(self, samplerate: int, channels: int, blocksize: int) -> CaptureReader:
+        return _ProcessReader(self, samplerate, channels, blocksize)
+
+    def detect_supported_rates(self) -> List[int]:
+        self._command('rates')
+        reply = self._reply('rates')
+        return list(reply[1]) if reply[0] == 'rates' else [44100, 48000]
+
+    def shutdown(self):
+        """结束子进程"""
+        if self._process.is_alive():
+            try:
+                self._command('shutdown')
+            except RuntimeError:
+                pass
+            self._process.join(2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._conn.close()
@@ -3,82 +3,184 @@
 负责音频设备检测、录制和保存功能
 """
 
-import soundcard as sc
-import sounddevice as sd
-import numpy as np
-import wave
 import datetime
+import functools
+import logging
 import threading
-from typing import List, Optional, Callable
+import time
+from typing import Dict, List, Optional, Callable, Sequence
+
+from config import AUDIO_CONFIG, FILE_CONFIG, LOGGING_CONFIG, PEAK_CONFIG
+from .arena import FrameArena
+from .backends import CaptureBackend, SoundcardBackend, SoundDeviceBackend
+from .devicecache import DeviceCapabilityCache
+from .fanout import Subscription
+from .gate import EnergyGate, gate_map_path
+from .instrumentation import CaptureStats, log_event
+from .meter import LevelMeter
+from .multidevice import MultiDeviceBackend, split_output_path
+from .pipeline import (RecordingPipeline, ConvertStage, WriteStage, MemoryStage, CallbackStage,
+                       MeterStage, GateStage, ChannelSelectStage, PeakStage, PipelineStage,
+                       OVERFLOW_DROP_OLDEST, OVERFLOW_POLICIES)
+from .pcm import SAMPLE_FORMATS
+from .peaks import PeakPyramid, peak_file_path
+from .procbackend import ProcessBackend
+from .ringbuffer import RingBuffer
+from .segments import SegmentedWavWriter
+from .status import RecorderStatus, StatusBoard
+from .wavwriter import StreamingWavWriter
+
+logger = logging.getLogger(__name__)
 
 
 class AudioRecorder:
     """音频录制器核心类"""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[CaptureBackend] = None):
+        self.backend = backend
         self.recording = False
         self.record_thread = None
-        self.recorded_data: List[np.ndarray] = []
+        self.recorded_data = FrameArena(channels=1, slab_frames=1)
         self.output_file: Optional[str] = None
         self.start_time: Optional[datetime.datetime] = None
         self.speaker = None
         self.speaker_name = ""
         self.channels = 0
+        self.streaming = False  # 流式写盘模式：逐块写入，不在内存中缓存整段录音
+        self.block_duration = float(AUDIO_CONFIG['blocksize_factor'])  # 每块时长（秒）
+        self.sample_format = AUDIO_CONFIG['sample_format']  # 输出格式: int16 / int24 / int32 / float32
+        self.dither = AUDIO_CONFIG['dither']  # 整数输出时是否添加TPDF抖动
+        self.queue_maxsize = AUDIO_CONFIG['queue_maxsize']
+        self.overflow_policy = AUDIO_CONFIG['overflow_policy']
+        self._pipeline: Optional[RecordingPipeline] = None
+        self.frames_captured = 0  # 本次录制已采集的帧数
+        self.frame_limit: Optional[int] = None  # 采集到该帧数（含预录）时自动停止，None 表示不限
+        self.last_saved_file: Optional[str] = None  # 最近一次录制落盘的文件（分段录制时为最后一段）
+        self.last_error: Optional[str] = None  # 最近一次录制在采集线程中出现的错误
+        self._disk_writer = None
+        self.capability_cache = DeviceCapabilityCache()
+        self.status = StatusBoard()  # 供界面轮询的无锁状态快照
+        self.capture_stats: Optional[CaptureStats] = None  # 最近一次录制的帧时钟和 record() 耗时
+        
+        # 分段录制：按时长/大小轮转文件（均为None时不分段）
+        minutes = FILE_CONFIG['rotate_minutes']
+        megabytes = FILE_CONFIG['rotate_mb']
+        self.rotate_seconds: Optional[float] = minutes * 60 if minutes else None
+        self.rotate_bytes: Optional[int] = int(megabytes * 1024 * 1024) if megabytes else None
+        self.segment_files: List[str] = []
+        
+        # 多设备分文件写入：每个设备的通道写入各自的文件，所有文件逐块同步推进
+        self.split_output = False
+        self.split_files: List[str] = []
+        
+        # 附加的消费分支（如异步接口的块迭代器），每次录制开始时按工厂函数创建阶段
+        self._sinks: Dict[str, tuple] = {}
+        
+        # 订阅者：等待下一次录制的订阅，以及正在录制（可直接挂上订阅者）的流水线
+        self._pending_subscriptions: List[Subscription] = []
+        self._live_pipeline: Optional[RecordingPipeline] = None
+        self._subscription_lock = threading.Lock()
+        
+        # 能量门限：静音段不写入文件，被移除的区间记录在 <文件名>.gate.json 中
+        self.gate_enabled = AUDIO_CONFIG['gate_enabled']
+        self.gate_threshold_db = AUDIO_CONFIG['gate_threshold_db']
+        self.gate_hangover = AUDIO_CONFIG['gate_hangover']
+        self.gate_preroll = AUDIO_CONFIG['gate_preroll']
+        self._gate: Optional[EnergyGate] = None
+        self.last_gate_map: Optional[str] = None
+        
+        # 波形峰值：写入分支中增量计算多级峰值，停止时写出 <文件名>.peaks（分文件写入时每个文件一个）
+        self.peaks_enabled = PEAK_CONFIG['enabled']
+        self.peaks: Optional[PeakPyramid] = None  # 本次（或最近一次）录制主文件的峰值，录制中可随时读取
+        self.peak_files: List[str] = []
+        self._peak_outputs: List[tuple] = []  # (峰值金字塔, 写入器)；内存模式下写入器在落盘时确定
+        
+        # 预录（armed）状态：持续采集最近N秒到环形缓冲区，开始录制时放在录音开头
+        self.armed = False
+        self.preroll_buffer: Optional[RingBuffer] = None
+        self._armed_rate = 0
+        self._arm_thread: Optional[threading.Thread] = None
+        self._session_callback: Optional[Callable] = None
+        self._session_done = threading.Event()  # 本次录制已结束并落盘
+        self._session_done.set()
         
         # 初始化音频设备
         self._initialize_audio_device()
     
     def _initialize_audio_device(self):
-        """初始化音频设备"""
-        try:
-            self.speaker = sc.default_speaker()
-            self.speaker_name = self.speaker.name
-            self.channels = min(2, self.speaker.channels)
-        except Exception as e:
-            raise RuntimeError(f"无法获取默认扬声器: {e}")
+        """初始化音频设备（未指定后端时按 AUDIO_CONFIG 选择采集引擎录制默认扬声器的回放）"""
+        if self.backend is None:
+            if AUDIO_CONFIG['capture_engine'] == 'sounddevice':
+                factory = functools.partial(SoundDeviceBackend, latency=AUDIO_CONFIG['callback_latency'],
+                                            loopback=AUDIO_CONFIG['callback_loopback'])
+            else:
+                factory = SoundcardBackend
+            if AUDIO_CONFIG['capture_process']:
+                self.backend = ProcessBackend(factory, AUDIO_CONFIG['capture_ring_seconds'])
+            else:
+                self.backend = factory()
+        self.speaker = getattr(self.backend, 'speaker', None)
+        self.speaker_name = self.backend.name
+        self.channels = self.backend.default_channels
     
-    def detect_supported_rates(self) -> List[int]:
-        """检测支持的采样率"""
-        try:
-            # 获取默认音频设备信息
-            devices = sd.query_devices()
-            default_device_idx = sd.default.device[1]  # 默认输出设备索引
-            default_device = devices[default_device_idx]
-            
-            # 获取通道数
-            channels = default_device['max_output_channels']
-            
-            # 常见的采样率列表
-            common_rates = [8000, 11025, 16000, 22050, 32000, 44100, 48000, 
-                          88200, 96000, 176400, 192000, 352800, 384000]
-            
-            # 检查设备支持的采样率
-            supported_samplerates = []
-            for rate in common_rates:
-                try:
-                    sd.check_output_settings(device=default_device_idx, 
-                                           samplerate=rate, 
-                                           channels=min(channels, 2))
-                    supported_samplerates.append(rate)
-                except Exception:
-                    # 不支持的采样率
-                    pass
-                    
-            return supported_samplerates if supported_samplerates else [44100, 48000]
-        except Exception:
-            # 出现异常时返回默认值
-            return [44100, 48000]
+    def detect_supported_rates(self, use_cache: bool = True) -> List[int]:
+        """检测支持的采样率（优先使用设备能力缓存）"""
+        if use_cache:
+            rates = self.get_cached_rates()
+            if rates:
+                return rates
+        return self.backend.detect_supported_rates()
+    
+    def get_cached_rates(self) -> Optional[List[int]]:
+        """从设备能力缓存读取当前设备支持的采样率，不做任何探测"""
+        return self.backend.cached_rates(self.capability_cache)
+    
+    def refresh_device_capabilities(self, callback: Optional[Callable[[List[int]], None]] = None) -> threading.Thread:
+        """在后台线程中重新探测所有设备并更新缓存，完成后以当前设备的采样率调用callback"""
+        def worker():
+            try:
+                self.backend.probe_capabilities(self.capability_cache)
+                self.capability_cache.save()
+            except Exception:
+                # 探测失败时保留旧缓存
+                pass
+            if callback:
+                callback(self.detect_supported_rates())
+        
+        thread = threading.Thread(target=worker, name="device-probe", daemon=True)
+        thread.start()
+        return thread
     
     def start_recording(self, samplerate: int, callback: Optional[Callable] = None):
-        """开始录制"""
+        """开始录制（预录状态下，环形缓冲区中的音频会放在录音开头）"""
         if self.recording:
             return False
+        if self.armed and samplerate != self._armed_rate:
+            raise ValueError(f"预录采样率为 {self._armed_rate} Hz，与请求的 {samplerate} Hz 不一致")
             
-        self.recording = True
-        self.recorded_data = []
+        self.frames_captured = 0
+        self.last_saved_file = None
+        self.last_error = None
+        self.last_gate_map = None
+        self.peaks = None
+        self.peak_files = []
+        # 内存模式下的帧存储区，按slab预分配，停止时无需合并
+        self.recorded_data = FrameArena(
+            channels=self.channels,
+            slab_frames=int(samplerate * AUDIO_CONFIG['arena_slab_seconds'])
+        )
         self.start_time = datetime.datetime.now()
+        self.status.reset(samplerate, self.channels)
+        self._session_done.clear()
+        
+        if self.armed:
+            # 预录线程已在采集，由它接手本次录制
+            self._session_callback = callback
+            self.recording = True
+            return True
         
         # 在新线程中开始录制
+        self.recording = True
         self.record_thread = threading.Thread(
             target=self._record_audio, 
             args=(samplerate, callback),
@@ -95,59 +197,300 @@ class AudioRecorder:
         self.recording = False
         return True
     
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待本次录制结束（含保存/回填文件头），返回是否已结束"""
+        return self._session_done.wait(timeout)
+    
+    def arm(self, samplerate: int, seconds: float) -> bool:
+        """进入预录状态：在后台持续采集最近 seconds 秒（块时长在此时确定），内存占用固定"""
+        if self.armed or self.recording:
+            return False
+        if seconds <= 0:
+            raise ValueError(f"预录时长必须大于0: {seconds}")
+        self.preroll_buffer = RingBuffer(int(round(seconds * samplerate)), self.channels)
+        self._armed_rate = samplerate
+        self.armed = True
+        self._arm_thread = threading.Thread(
+            target=self._armed_capture,
+            args=(samplerate, self.preroll_buffer),
+            name="armed-capture",
+            daemon=True
+        )
+        self._arm_thread.start()
+        return True
+    
+    def disarm(self) -> bool:
+        """退出预录状态（进行中的录制不受影响，结束后预录线程退出）"""
+        if not self.armed:
+            return False
+        self.armed = False
+        return True
+    
+    def _armed_capture(self, samplerate: int, ring: RingBuffer):
+        """预录线程：未录制时写入环形缓冲区，开始录制时接手本次录制"""
+        blocksize = self.get_blocksize(samplerate)
+        try:
+            with self.backend.open(samplerate, self.channels, blocksize) as reader:
+                # 重新预录后旧线程的缓冲区不再是当前缓冲区，旧线程随即退出
+                while self.armed and self.preroll_buffer is ring:
+                    if self.recording:
+                        # 缓冲区内容以视图形式直接送入流水线分支；录制结束、流水线关闭前不会再写入缓冲区
+                        preroll = ring.views()
+                        seconds = sum(len(view) for view in preroll) / samplerate
+                        self.start_time -= datetime.timedelta(seconds=seconds)
+                        try:
+                            self._capture_session(reader, samplerate, blocksize,
+                                                  self._session_callback, preroll)
+                        finally:
+                            ring.clear()
+                            self._session_done.set()
+                        continue
+                    
+                    data = reader.record(numframes=blocksize)
+                    if not len(data):
+                        break
+                    ring.write(data)
+        finally:
+            if self.preroll_buffer is ring:
+                self.armed = False
+    
     def _record_audio(self, samplerate: int, callback: Optional[Callable]):
-        """在独立线程中录制音频"""
+        """在独立线程中录制音频（采集线程只负责把块放入流水线）"""
+        # 块越小，停止延迟和进度刷新延迟越低（上限为一个块的时长）
+        blocksize = self.get_blocksize(samplerate)
+        try:
+            try:
+                reader = self.backend.open(samplerate, self.channels, blocksize)
+            except Exception as e:
+                self.recording = False
+                self.last_error = str(e)
+                self.status.publish_capture(0, recording=False)
+                raise RuntimeError(f"录制过程中出现错误: {e}")
+            # 读取器在采集结束后、排空流水线和落盘之前关闭，来源不会在收尾期间继续运行
+            self._capture_session(reader, samplerate, blocksize, callback,
+                                  release=lambda: reader.__exit__(None, None, None))
+        finally:
+            self._session_done.set()
+    
+    def _capture_session(self, reader, samplerate: int, blocksize: int,
+                         callback: Optional[Callable], preroll: Sequence = (),
+                         release: Optional[Callable[[], None]] = None):
+        """采集一次录制：先送入预录数据，再逐块采集直到停止，最后落盘（release 在落盘前关闭读取器）"""
+        # 分段录制和按设备分文件写入同样逐块写盘
+        streaming = self.streaming or self.is_rotating() or self.split_output
+        pipeline = None
+        branch_error = None
+        stats = self.capture_stats = CaptureStats(samplerate, blocksize)
+        log_interval = LOGGING_CONFIG['stats_interval'] if logger.isEnabledFor(logging.INFO) else 0
         try:
-            blocksize = samplerate  # 1秒的块大小
+            pipeline = self._build_pipeline(samplerate, callback, streaming)
+            self._pipeline = pipeline
+            self.status.attach_pipeline(pipeline)
+            pipeline.start()
+            with self._subscription_lock:
+                for subscription in self._pending_subscriptions:
+                    pipeline.add_subscription(subscription)
+                self._pending_subscriptions = []
+                self._live_pipeline = pipeline
+            log_event(logger, logging.INFO, 'recording_started', samplerate=samplerate,
+                      channels=self.channels, blocksize=blocksize, device=self.speaker_name,
+                      streaming=streaming, preroll_frames=sum(len(view) for view in preroll))
             
-            # 获取回放设备的麦克风接口
-            microphone = sc.get_microphone(id=str(self.speaker_name), include_loopback=True)
+            for view in preroll:
+                # 预录缓冲区在本次录制结束后会被覆盖，订阅者拿到的是副本
+                pipeline.push(view, borrowed=True)
+                self.frames_captured += len(view)
             
-            with microphone.recorder(samplerate=samplerate, blocksize=blocksize, channels=self.channels) as recorder:
-                while self.recording:
-                    data = recorder.record(numframes=blocksize)
-                    self.recorded_data.append(data.copy())
+            # 帧时钟从第一次 record() 开始；预录数据不计入
+            stats.start()
+            next_log = stats.started + log_interval
+            while self.recording:
+                numframes = blocksize
+                if self.frame_limit is not None:
+                    # 最后一块只取到限制为止，录音长度精确到帧
+                    numframes = min(blocksize, self.frame_limit - self.frames_captured)
+                    if numframes <= 0:
+                        self.recording = False
+                        break
+                # record() 每次返回新数组，直接交给流水线，无需再复制
+                started = time.perf_counter()
+                data = reader.record(numframes=numframes)[:numframes]
+                stats.add_block(len(data), time.perf_counter() - started)
+                if not len(data):
+                    # 来源已结束（如回放文件读完），按正常停止处理
+                    self.recording = False
+                    break
+                pipeline.push(data)
+                self.frames_captured += len(data)
+                self.status.publish_capture(self.frames_captured)
+                if log_interval and started >= next_log:
+                    next_log = started + log_interval
+                    log_event(logger, logging.INFO, 'recording_stats', **self.get_stats())
                     
-                    # 调用回调函数更新UI（如果有）
-                    if callback:
-                        elapsed = (datetime.datetime.now() - self.start_time).total_seconds()
-                        callback(elapsed)
-                    
-            # 保存录制的数据
-            if self.recorded_data and not self.recording:  # 确保是正常停止
-                self._save_recording(samplerate)
-                
         except Exception as e:
             self.recording = False
+            self.last_error = str(e)
+            log_event(logger, logging.ERROR, 'recording_failed', error=str(e))
             raise RuntimeError(f"录制过程中出现错误: {e}")
+        finally:
+            stats.stop()
+            if release is not None:
+                # 先停止采集来源（如采集子进程），再等待流水线处理剩余的块
+                try:
+                    release()
+                except Exception as e:
+                    log_event(logger, logging.WARNING, 'reader_close_failed', error=str(e))
+            # 等待消费线程处理完队列中剩余的块（流式模式下同时回填文件头）
+            self.status.publish_capture(self.frames_captured, recording=False)
+            with self._subscription_lock:
+                self._live_pipeline = None
+            if pipeline is not None:
+                try:
+                    pipeline.close()
+                except RuntimeError as e:
+                    # 某个分支（写入、分析或附加分支）处理失败：记录错误，本次录制不视为已保存
+                    branch_error = e
+                    self.recording = False
+                    if self.last_error is None:
+                        self.last_error = str(e)
+                    log_event(logger, logging.ERROR, 'recording_failed', error=str(e))
+                log_event(logger, logging.INFO, 'recording_stopped', **self.get_stats())
+            if streaming:
+                if self._disk_writer is not None and branch_error is None:
+                    self.last_saved_file = self._disk_writer.path
+                self.output_file = None
+                self.start_time = None
+        
+        if branch_error is not None:
+            self.recorded_data.clear()
+            return
+                
+        # 保存录制的数据
+        if not streaming and self.recorded_data and not self.recording:  # 确保是正常停止
+            self.last_saved_file = self._save_recording(samplerate)
+        
+        # 门限模式下写出被移除区间的映射（分段录制时与第一个分段同名）
+        if self._gate is not None and self.last_saved_file:
+            audio_path = self.segment_files[0] if self.segment_files else self.last_saved_file
+            self.last_gate_map = gate_map_path(audio_path)
+            self._gate.write_map(self.last_gate_map)
+        
+        # 写出波形峰值伴随文件（分段录制时与第一个分段同名）
+        if self.last_saved_file:
+            self._write_peak_files()
+    
+    def _build_pipeline(self, samplerate: int, callback: Optional[Callable],
+                        streaming: bool) -> RecordingPipeline:
+        """构建采集后的处理流水线"""
+        pipeline = RecordingPipeline()
+        self._disk_writer = None
+        self._gate = None
+        self.peaks = None
+        self._peak_outputs = []
+        if self.gate_enabled:
+            self._gate = EnergyGate(samplerate, self.channels, self.gate_threshold_db,
+                                    self.gate_hangover, self.gate_preroll, AUDIO_CONFIG['gate_window'])
+        
+        # 写入分支：流式模式逐块转换写盘，否则缓存在内存中
+        if self.split_output:
+            self._add_split_branches(pipeline, samplerate)
+        elif self.is_rotating():
+            self.segment_files = []
+            writer = SegmentedWavWriter(
+                self.output_file or FILE_CONFIG['filename_prefix'] + FILE_CONFIG['default_extension'],
+                samplerate, self.channels, self.start_time, FILE_CONFIG['timestamp_format'],
+                max_seconds=self.rotate_seconds, max_bytes=self.rotate_bytes,
+                sample_format=self.sample_format, dither=self.dither,
+                large_file_format=AUDIO_CONFIG['large_file_format']
+            )
+            self.segment_files = writer.segments
+            self._disk_writer = writer
+            stages = [ConvertStage(writer.converter), WriteStage(writer)]
+        elif streaming:
+            writer = StreamingWavWriter(self._resolve_output_file(), samplerate, self.channels,
+                                        self.sample_format, self.dither,
+                                        AUDIO_CONFIG['large_file_format'])
+            self._disk_writer = writer
+            stages = [ConvertStage(writer.converter), WriteStage(writer)]
+        else:
+            stages = [MemoryStage(self.recorded_data)]
+        if not self.split_output:
+            if self.peaks_enabled:
+                # 峰值在门限之后计算，与写入文件的内容一致
+                self.peaks = PeakPyramid(samplerate, self.channels)
+                self._peak_outputs.append((self.peaks, self._disk_writer))
+                stages.insert(0, PeakStage(self.peaks))
+            if self._gate is not None:
+                # 门限位于写入分支最前面，静音段不经过转换和写盘；分析分支仍能看到全部数据
+                stages.insert(0, GateStage(self._gate))
+            pipeline.add_branch('writer', stages, self.queue_maxsize, self.overflow_policy,
+                                AUDIO_CONFIG['queue_put_timeout'])
+        
+        # 分析分支：计算电平并按固定间隔发布到状态快照，界面卡顿时只丢弃过期的块，不会阻塞采集
+        meter = LevelMeter(self.channels, samplerate, AUDIO_CONFIG['meter_interval'],
+                           AUDIO_CONFIG['clip_threshold'], on_reading=self.status.publish_level)
+        stages = [MeterStage(meter)]
+        if callback:
+            # 兼容旧接口：回调在分析线程中调用，界面应改为轮询 get_status()
+            start_time = self.start_time
+            
+            def notify(block):
+                callback((datetime.datetime.now() - start_time).total_seconds())
+                
+            stages.append(CallbackStage(notify))
+        pipeline.add_branch('analysis', stages,
+                            AUDIO_CONFIG['analysis_queue_maxsize'], OVERFLOW_DROP_OLDEST)
+        
+        for name, (factory, maxsize, overflow) in self._sinks.items():
+            pipeline.add_branch(name, factory(samplerate, self.channels), maxsize, overflow,
+                                AUDIO_CONFIG['queue_put_timeout'])
+        return pipeline
+    
+    def _add_split_branches(self, pipeline: RecordingPipeline, samplerate: int):
+        """多设备分文件写入：每个设备一个写入分支，只取出该设备的通道"""
+        if self.is_rotating() or self._gate is not None:
+            raise RuntimeError("按设备分文件写入不支持分段录制和能量门限")
+        path = self._resolve_output_file()
+        self.split_files = []
+        for index, group in enumerate(self.backend.groups):
+            writer = StreamingWavWriter(split_output_path(path, index), samplerate, group.channels,
+                                        self.sample_format, self.dither,
+                                        AUDIO_CONFIG['large_file_format'])
+            self.split_files.append(writer.path)
+            if index == 0:
+                self._disk_writer = writer
+            stages = [ChannelSelectStage(group.start, group.channels),
+                      ConvertStage(writer.converter), WriteStage(writer)]
+            if self.peaks_enabled:
+                pyramid = PeakPyramid(samplerate, group.channels)
+                self._peak_outputs.append((pyramid, writer))
+                stages.insert(1, PeakStage(pyramid))
+                if index == 0:
+                    self.peaks = pyramid
+            name = 'writer' if index == 0 else f'writer-{index + 1}'
+            pipeline.add_branch(name, stages, self.queue_maxsize, self.overflow_policy,
+                                AUDIO_CONFIG['queue_put_timeout'])
+    
+    def _resolve_output_file(self) -> str:
+        """确定输出文件路径（未设置时按时间戳自动生成）"""
+        if not self.output_file:
+            timestamp = datetime.datetime.now().strftime(FILE_CONFIG['timestamp_format'])
+            return f"{FILE_CONFIG['filename_prefix']}_{timestamp}{FILE_CONFIG['default_extension']}"
+        return self.output_file
     
     def _save_recording(self, samplerate: int):
         """保存录制的音频"""
         try:
             # 生成文件名
-            if not self.output_file:
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = f"speaker_recording_{timestamp}.wav"
-            else:
-                output_file = self.output_file
+            output_file = self._resolve_output_file()
                 
-            # 合并所有数据
-            full_data = np.concatenate(self.recorded_data, axis=0)
-            
-            # 转换数据格式
-            if full_data.dtype == np.float64:
-                audio_data = (full_data * np.iinfo(np.int16).max).astype(np.int16)
-            elif full_data.dtype == np.float32:
-                audio_data = (full_data * 32767).astype(np.int16)
-            else:
-                audio_data = full_data.astype(np.int16)
-            
-            # 保存为WAV文件
-            with wave.open(output_file, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)
-                wf.setframerate(samplerate)
-                wf.writeframes(audio_data.tobytes())
+            # 逐个slab写入WAV文件，无需先合并全部数据
+            with StreamingWavWriter(output_file, samplerate, self.channels,
+                                    self.sample_format, self.dither,
+                                    AUDIO_CONFIG['large_file_format']) as writer:
+                for chunk in self.recorded_data.chunks():
+                    writer.write(chunk)
+            self._peak_outputs = [(pyramid, writer) for pyramid, _ in self._peak_outputs]
                 
             return output_file
             
@@ -155,26 +498,185 @@ class AudioRecorder:
             raise RuntimeError(f"保存文件时出现错误: {e}")
         finally:
             # 清理临时变量
-            self.recorded_data = []
+            self.recorded_data.clear()
             self.output_file = None
             self.start_time = None
     
+    def _write_peak_files(self):
+        """写出峰值伴随文件（附带每个音频文件的数据起始位置），失败时只记录日志，不影响录音本身"""
+        for pyramid, writer in self._peak_outputs:
+            if writer is None or not writer.index:
+                continue
+            path = peak_file_path(writer.index[0][1])
+            try:
+                pyramid.set_index(writer.index, writer.channels * writer.converter.sampwidth)
+                pyramid.save(path)
+                self.peak_files.append(path)
+            except OSError as e:
+                log_event(logger, logging.WARNING, 'peaks_failed', path=path, error=str(e))
+    
     def set_output_file(self, filepath: str):
         """设置输出文件路径"""
         self.output_file = filepath
     
+    def set_channels(self, channels: int):
+        """设置录制通道数（由后端检查，如多设备采集的通道数固定）"""
+        self.backend.check_channels(channels)
+        self.channels = channels
+    
+    def set_frame_limit(self, frames: Optional[int]):
+        """设置录制帧数上限（含预录），到达后录制自动结束；None 表示不限"""
+        if frames is not None and frames < 1:
+            raise ValueError(f"帧数上限必须大于0: {frames}")
+        self.frame_limit = frames
+    
+    def set_streaming(self, enabled: bool):
+        """设置是否使用流式写盘模式"""
+        self.streaming = enabled
+    
+    def set_rotation(self, minutes: Optional[float] = None, megabytes: Optional[float] = None):
+        """设置分段录制：每 minutes 分钟或 megabytes MB 轮转一个新文件（均为None时关闭）"""
+        self.rotate_seconds = minutes * 60 if minutes else None
+        self.rotate_bytes = int(megabytes * 1024 * 1024) if megabytes else None
+    
+    def set_split_output(self, enabled: bool):
+        """设置多设备录制时是否每个设备写入单独的文件（仅支持流式写盘，不支持分段和门限）"""
+        if enabled:
+            if not isinstance(self.backend, MultiDeviceBackend):
+                raise ValueError("只有多设备采集才能按设备分文件写入")
+            if self.is_rotating() or self.gate_enabled:
+                raise ValueError("按设备分文件写入不支持分段录制和能量门限")
+            self.streaming = True
+        self.split_output = enabled
+    
+    def set_peaks(self, enabled: bool):
+        """设置录制时是否生成波形峰值伴随文件"""
+        self.peaks_enabled = enabled
+    
+    def is_rotating(self) -> bool:
+        """是否启用了分段录制"""
+        return bool(self.rotate_seconds or self.rotate_bytes)
+    
+    def set_gate(self, enabled: bool, threshold_db: Optional[float] = None,
+                 hangover: Optional[float] = None, preroll: Optional[float] = None):
+        """设置能量门限（未指定的参数保持不变）"""
+        if hangover is not None and hangover < 0 or preroll is not None and preroll < 0:
+            raise ValueError("保持时间和预录时间不能为负数")
+        self.gate_enabled = enabled
+        if threshold_db is not None:
+            self.gate_threshold_db = threshold_db
+        if hangover is not None:
+            self.gate_hangover = hangover
+        if preroll is not None:
+            self.gate_preroll = preroll
+    
+    def set_sample_format(self, sample_format: str, dither: bool = False):
+        """设置输出采样格式和是否抖动"""
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"不支持的采样格式: {sample_format}")
+        self.sample_format = sample_format
+        self.dither = dither
+    
+    def set_block_duration(self, seconds: float):
+        """设置每个采集块的时长（秒），如 0.01 / 0.05 / 0.25"""
+        if seconds <= 0:
+            raise ValueError(f"块时长必须大于0: {seconds}")
+        self.block_duration = float(seconds)
+    
+    def get_blocksize(self, samplerate: int) -> int:
+        """按块时长计算每块帧数"""
+        return max(1, int(round(samplerate * self.block_duration)))
+    
+    def set_queue_policy(self, maxsize: int, overflow: str):
+        """设置采集队列长度和溢出策略（block / drop_newest / drop_oldest）"""
+        if maxsize < 1:
+            raise ValueError(f"队列长度必须大于0: {maxsize}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self.queue_maxsize = maxsize
+        self.overflow_policy = overflow
+    
+    def add_sink(self, name: str, factory: Callable[[int, int], Sequence[PipelineStage]],
+                 maxsize: Optional[int] = None, overflow: str = OVERFLOW_DROP_OLDEST):
+        """
+        添加一个消费分支，从下一次录制开始生效，直到 remove_sink()
+        factory(samplerate, channels) 在每次录制开始时返回该分支的阶段列表；分支有自己的有界队列和线程
+        """
+        if name in ('writer', 'analysis') or name.startswith('writer-'):
+            raise ValueError(f"分支名称已被占用: {name}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self._sinks[name] = (factory, maxsize or self.queue_maxsize, overflow)
+    
+    def remove_sink(self, name: str):
+        """移除消费分支（从下一次录制开始生效）"""
+        self._sinks.pop(name, None)
+    
+    def subscribe(self, name: str, maxsize: Optional[int] = None,
+                  slow_policy: Optional[str] = None) -> Subscription:
+        """
+        订阅采集到的块（只读视图，不复制）：录制中调用时从下一个块开始，否则从下一次录制开始；
+        该次录制结束后订阅随之结束。slow_policy 见 fanout 模块（drop / degrade / disconnect）
+        """
+        subscription = Subscription(name, maxsize or AUDIO_CONFIG['subscriber_queue_maxsize'],
+                                    slow_policy or AUDIO_CONFIG['subscriber_slow_policy'])
+        with self._subscription_lock:
+            if self._live_pipeline is not None:
+                self._live_pipeline.add_subscription(subscription)
+            else:
+                self._pending_subscriptions.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅（订阅者读完已入队的块后迭代结束）"""
+        with self._subscription_lock:
+            if subscription in self._pending_subscriptions:
+                self._pending_subscriptions.remove(subscription)
+            if self._live_pipeline is not None:
+                self._live_pipeline.remove_subscription(subscription)
+        subscription.close()
+    
+    def get_queue_stats(self) -> dict:
+        """获取最近一次录制的队列统计（深度、最高水位、丢弃数等）"""
+        if self._pipeline is None:
+            return {}
+        return self._pipeline.get_stats()
+    
+    def get_stats(self) -> dict:
+        """
+        获取录制统计（录制中或最近一次录制）：
+        - capture：已采集帧数与按帧时钟应采集的帧数、record() 耗时直方图、短块数
+        - queues：各分支队列的深度、最高水位和丢弃的块数
+        - stages：各分支每个阶段（转换、写入等）的处理耗时直方图
+        - subscribers：各订阅者的投递、丢弃、降级和断开统计
+        """
+        stats = {'capture': self.capture_stats.to_dict() if self.capture_stats else {},
+                 'queues': {}, 'stages': {}, 'subscribers': {}, 'dropped_blocks': 0}
+        pipeline = self._pipeline
+        if pipeline is not None:
+            stats['queues'] = pipeline.get_stats()
+            stats['stages'] = pipeline.get_stage_stats()
+            stats['subscribers'] = pipeline.get_subscription_stats()
+            stats['dropped_blocks'] = sum(queue['drops'] for queue in stats['queues'].values())
+        return stats
+    
+    def get_status(self) -> RecorderStatus:
+        """获取录制状态快照（任意线程可调用，不加锁）"""
+        return self.status.snapshot()
+    
     def get_device_info(self) -> dict:
         """获取设备信息"""
         return {
             'name': self.speaker_name,
             'channels': self.channels,
-            'is_recording': self.recording
+            'is_recording': self.recording,
+            'is_armed': self.armed
         }
     
     def get_elapsed_time(self) -> float:
-        """获取已录制时长（秒）"""
+        """获取已录制时长（秒），按已采集帧数计算，采集丢帧时不会被墙上时间掩盖"""
         if self.start_time and self.recording:
-            return (datetime.datetime.now() - self.start_time).total_seconds()
+            return self.status.snapshot().elapsed
         return 0.0
     
     @property
@@ -0,0 +1,113 @@
+"""
+WAV修复工具
+进程崩溃后，最后一个分段的文件头仍是占位长度；
+本工具根据实际文件大小回填 RIFF/data（以及 fact、ds64）长度字段
+
+用法: python -m core.recovery <文件.wav> [<文件.wav> ...]
+"""
+
+import argparse
+import os
+import struct
+import sys
+from typing import List
+
+from .wavwriter import RIFF_MAX_SIZE, DS64_SIZE, LARGE_FILE_FORMATS
+
+
+def repair_wav(path: str) -> dict:
+    """修复被截断的WAV/RF64文件头，返回修复结果"""
+    file_size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        riff_id, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff_id not in (b'RIFF',) + tuple(fmt.encode('ascii') for fmt in LARGE_FILE_FORMATS) \
+                or wave_id != b'WAVE':
+            raise RuntimeError(f"不是WAV文件: {path}")
+
+        # 扫描 data 块之前的各个块，记录需要回填的位置
+        junk_offset = None
+        fact_offset = None
+        block_align = None
+        data_offset = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            offset = f.tell()
+            if chunk_id == b'data':
+                data_offset = offset
+                break
+            if chunk_id in (b'JUNK', b'ds64') and chunk_size == DS64_SIZE:
+                junk_offset = offset - 8
+            elif chunk_id == b'fact':
+                fact_offset = offset
+            elif chunk_id == b'fmt ':
+                fmt = f.read(16)
+                block_align = struct.unpack('<HHIIHH', fmt)[4]
+            f.seek(offset + chunk_size + chunk_size % 2)
+
+        if data_offset is None or not block_align:
+            raise RuntimeError(f"文件头损坏，找不到 fmt 或 data 块: {path}")
+
+        # 丢弃末尾不完整的帧
+        data_bytes = (file_size - data_offset) // block_align * block_align
+        frames = data_bytes // block_align
+        if data_offset + data_bytes < file_size:
+            f.truncate(data_offset + data_bytes)
+
+        riff_size = data_offset - 8 + data_bytes
+        large = riff_size > RIFF_MAX_SIZE
+        # 沿用原有的大文件标识（RF64 / BW64），经典RIFF升级时默认用RF64
+        large_id = riff_id if riff_id != b'RIFF' else b'RF64'
+        if large and junk_offset is None:
+            raise RuntimeError(f"数据超过4GB且文件头没有预留ds64空间，无法修复: {path}")
+
+        if large:
+            f.seek(0)
+            f.write(struct.pack('<4sI', large_id, RIFF_MAX_SIZE))
+            f.seek(junk_offset)
+            f.write(struct.pack('<4sIQQQI', b'ds64', DS64_SIZE, riff_size, data_bytes, frames, 0))
+        else:
+            f.seek(0)
+            f.write(struct.pack('<4sI', b'RIFF', riff_size))
+            if junk_offset is not None:
+                # 还原为JUNK占位块，保留日后升级的空间
+                f.seek(junk_offset)
+                f.write(struct.pack('<4sI', b'JUNK', DS64_SIZE) + bytes(DS64_SIZE))
+
+        if fact_offset is not None:
+            f.seek(fact_offset)
+            f.write(struct.pack('<I', RIFF_MAX_SIZE if large else frames))
+        f.seek(data_offset - 4)
+        f.write(struct.pack('<I', RIFF_MAX_SIZE if large else data_bytes))
+
+    return {
+        'path': path,
+        'frames': frames,
+        'data_bytes': data_bytes,
+        'format': (large_id if large else b'RIFF').decode('ascii'),
+        'truncated_bytes': file_size - data_offset - data_bytes,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="修复崩溃后文件头未回填的WAV分段")
+    parser.add_argument('files', nargs='+', help="需要修复的WAV文件")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        try:
+            result = repair_wav(path)
+            print(f"已修复 {path}: {result['frames']} 帧, {result['format']}, "
+                  f"丢弃末尾 {result['truncated_bytes']} 字节")
+        except Exception as e:
+            failed += 1
+            print(f"修复失败 {path}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
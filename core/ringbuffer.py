@@ -0,0 +1,77 @@
+"""
+环形缓冲区模块
+固定容量的预分配帧缓冲区，写入时覆盖最旧的数据；
+读取返回至多两段视图（环绕处切开），不复制数据
+"""
+
+import numpy as np
+from typing import List, Optional
+
+
+class RingBuffer:
+    """固定容量的帧环形缓冲区（单写入方；读取方需保证读取期间没有写入）"""
+
+    def __init__(self, capacity: int, channels: int, dtype=np.float32):
+        if capacity < 1:
+            raise ValueError(f"环形缓冲区容量必须大于0: {capacity}")
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._write_pos = 0  # 下一帧写入的位置
+        self._size = 0  # 当前有效帧数
+        self.frames_written = 0  # 累计写入的帧数
+        self.frames_overwritten = 0  # 因容量不足被覆盖的帧数
+
+    @property
+    def nbytes(self) -> int:
+        """缓冲区占用的内存（字节），与写入量无关"""
+        return self._data.nbytes
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, block: np.ndarray):
+        """写入一个块，形状 (帧数, 通道数)；超出容量时只保留最新的部分"""
+        frames = len(block)
+        if not frames:
+            return
+        self.frames_written += frames
+        if frames >= self.capacity:
+            # 整块比缓冲区还大：只保留最后 capacity 帧
+            self.frames_overwritten += self._size + frames - self.capacity
+            self._data[:] = block[-self.capacity:]
+            self._write_pos = 0
+            self._size = self.capacity
+            return
+
+        self.frames_overwritten += max(0, self._size + frames - self.capacity)
+        first = min(frames, self.capacity - self._write_pos)
+        self._data[self._write_pos:self._write_pos + first] = block[:first]
+        if first < frames:
+            # 写到末尾后从头继续
+            self._data[:frames - first] = block[first:]
+        self._write_pos = (self._write_pos + frames) % self.capacity
+        self._size = min(self.capacity, self._size + frames)
+
+    def views(self, frames: Optional[int] = None) -> List[np.ndarray]:
+        """按时间顺序返回最近 frames 帧（默认全部）的视图，环绕时为两段"""
+        count = self._size if frames is None else max(0, min(frames, self._size))
+        if not count:
+            return []
+        start = (self._write_pos - count) % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            return [self._data[start:end]]
+        return [self._data[start:], self._data[:end - self.capacity]]
+
+    def read(self, frames: Optional[int] = None) -> np.ndarray:
+        """返回最近 frames 帧的连续副本（需要单个数组时使用）"""
+        views = self.views(frames)
+        if not views:
+            return np.empty((0, self.channels), dtype=self._data.dtype)
+        return views[0].copy() if len(views) == 1 else np.concatenate(views)
+
+    def clear(self):
+        """清空（不释放内存）"""
+        self._write_pos = 0
+        self._size = 0
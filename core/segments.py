@@ -0,0 +1,111 @@
+"""
+分段录制模块
+按时长或文件大小轮转输出文件，分段之间按采样精确切分、无缝衔接；
+已完成的分段文件头均已回填，进程崩溃时最多只有当前分段需要修复
+"""
+
+import datetime
+import os
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+from .pcm import PCMConverter
+from .wavwriter import StreamingWavWriter
+
+
+class SegmentedWavWriter:
+    """按时长/大小自动轮转的WAV写入器"""
+
+    def __init__(self, base_path: str, samplerate: int, channels: int,
+                 start_time: datetime.datetime, timestamp_format: str,
+                 max_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 sample_format: str = 'int16', dither: bool = False,
+                 large_file_format: Optional[str] = 'RF64',
+                 on_segment: Optional[Callable[[str], None]] = None):
+        if not max_seconds and not max_bytes:
+            raise ValueError("分段录制需要指定最大时长或最大文件大小")
+        self.base_path = base_path
+        self.samplerate = samplerate
+        self.channels = channels
+        self.start_time = start_time
+        self.timestamp_format = timestamp_format
+        self.large_file_format = large_file_format
+        self.on_segment = on_segment
+
+        # 所有分段共用一个转换器，抖动噪声在分段边界处保持连续
+        self.converter = PCMConverter(sample_format, dither)
+
+        # 每段最多帧数（按大小限制时扣除文件头）
+        limits = []
+        if max_seconds:
+            limits.append(int(max_seconds * samplerate))
+        if max_bytes:
+            block_align = channels * self.converter.sampwidth
+            limits.append((max_bytes - 128) // block_align)
+        self.segment_frames = max(1, min(limits))
+
+        self.segments: List[str] = []
+        self.index: List[Tuple[int, str, int]] = []  # 每个分段的 (起始帧, 路径, 数据起始位置)
+        self.frames_written = 0
+        self._current: Optional[StreamingWavWriter] = None
+
+    @property
+    def path(self) -> Optional[str]:
+        """最近一个分段的路径"""
+        return self.segments[-1] if self.segments else None
+
+    def _segment_path(self, index: int) -> str:
+        """生成分段文件名：<前缀>_<分段起始时间>_<序号>.wav"""
+        root, ext = os.path.splitext(self.base_path)
+        # 分段起始时间按已写入帧数推算，与音频时间轴一致
+        offset = datetime.timedelta(seconds=self.frames_written / self.samplerate)
+        timestamp = (self.start_time + offset).strftime(self.timestamp_format)
+        return f"{root}_{timestamp}_{index:03d}{ext or '.wav'}"
+
+    def _open_segment(self):
+        """打开新分段"""
+        path = self._segment_path(len(self.segments) + 1)
+        self._current = StreamingWavWriter(path, self.samplerate, self.channels,
+                                           large_file_format=self.large_file_format,
+                                           converter=self.converter)
+        self.segments.append(path)
+        self.index.append((self.frames_written, path, self._current.data_offset))
+
+    def _close_segment(self):
+        """回填当前分段的文件头并关闭"""
+        if self._current is None:
+            return
+        path = self._current.close()
+        self._current = None
+        if self.on_segment:
+            self.on_segment(path)
+
+    def write(self, data: np.ndarray, encoded: bool = False):
+        """写入一个块，跨越分段边界时在精确的帧位置切开（encoded 含义同 StreamingWavWriter.write）"""
+        if not encoded and not self.converter.is_encoded(data):
+            for chunk in self.converter.iter_convert(data):
+                self.write(chunk, encoded=True)
+            return
+
+        start = 0
+        while start < len(data):
+            if self._current is None:
+                self._open_segment()
+            room = self.segment_frames - self._current.frames_written
+            part = data[start:start + room]
+            self._current.write(part, encoded=True)
+            self.frames_written += len(part)
+            start += len(part)
+            if self._current.frames_written >= self.segment_frames:
+                self._close_segment()
+
+    def close(self) -> Optional[str]:
+        """关闭最后一个分段，返回其路径"""
+        self._close_segment()
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,90 @@
+"""
+录制状态快照模块
+采集线程和分析线程各自发布自己负责的字段，界面线程按固定频率读取；
+每次发布都是替换一个不可变对象的引用，读写双方都不加锁、不会互相阻塞
+"""
+
+import time
+from typing import NamedTuple, Tuple
+
+from .meter import LevelReading
+
+
+class RecorderStatus(NamedTuple):
+    """某一时刻的录制状态（不可变）"""
+    recording: bool
+    samplerate: int
+    channels: int
+    frames: int  # 已采集的帧数
+    elapsed: float  # 按已采集帧数计算的录制时长（秒）
+    peak: Tuple[float, ...]  # 最近一个电平表间隔内的各通道峰值（0~1）
+    rms: Tuple[float, ...]  # 最近一个电平表间隔内的各通道RMS
+    clips: Tuple[int, ...]  # 录制开始以来各通道的削波采样数
+    queue_depth: int  # 写入队列当前深度
+    queue_maxsize: int
+    dropped_blocks: int  # 各分支累计丢弃的块数
+    updated_at: float  # 最近一次发布的时间（time.monotonic）
+
+
+class _CaptureState(NamedTuple):
+    """采集线程发布的字段"""
+    recording: bool
+    samplerate: int
+    channels: int
+    frames: int
+    updated_at: float
+
+
+class StatusBoard:
+    """
+    无锁状态发布板
+    - 采集线程调用 publish_capture()，分析线程调用 publish_level()，各字段只有一个写入方
+    - 任意线程调用 snapshot() 读取最新状态；CPython 中引用赋值是原子的，读方不会看到半更新的对象
+    """
+
+    def __init__(self):
+        self._capture = _CaptureState(False, 0, 0, 0, time.monotonic())
+        self._level = LevelReading((), (), (), (), 0)
+        self._pipeline = None
+
+    def reset(self, samplerate: int, channels: int):
+        """开始录制时重置（在启动采集线程之前调用）"""
+        self._level = LevelReading((0.0,) * channels, (0.0,) * channels, (0,) * channels, (0,) * channels, 0)
+        self._pipeline = None
+        self._capture = _CaptureState(True, samplerate, channels, 0, time.monotonic())
+
+    def attach_pipeline(self, pipeline):
+        """关联流水线，用于读取队列深度"""
+        self._pipeline = pipeline
+
+    def publish_capture(self, frames: int, recording: bool = True):
+        """采集线程：发布已采集帧数"""
+        state = self._capture
+        self._capture = _CaptureState(recording, state.samplerate, state.channels, frames, time.monotonic())
+
+    def publish_level(self, reading: LevelReading):
+        """分析线程：发布各通道电平"""
+        self._level = reading
+
+    def snapshot(self) -> RecorderStatus:
+        """读取当前状态"""
+        state = self._capture
+        level = self._level
+        depth = maxsize = dropped = 0
+        pipeline = self._pipeline
+        if pipeline is not None:
+            depth, maxsize, dropped = pipeline.get_depth()
+        return RecorderStatus(
+            recording=state.recording,
+            samplerate=state.samplerate,
+            channels=state.channels,
+            frames=state.frames,
+            elapsed=state.frames / state.samplerate if state.samplerate else 0.0,
+            peak=level.peak,
+            rms=level.rms,
+            clips=level.total_clips,
+            queue_depth=depth,
+            queue_maxsize=maxsize,
+            dropped_blocks=dropped,
+            updated_at=state.updated_at,
+        )
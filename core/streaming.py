@@ -0,0 +1,379 @@
+"""
+实时推流模块
+录制过程中把采集到的音频推送给其他机器上的监听端，无需等待录制结束：
+- HTTP：分块传输编码的WAV，GET /stream.wav?channels=1&rate=16000&format=int16，播放器可直接打开
+- TCP：原始PCM（交错、小端），格式由服务端参数决定，连接后直接开始接收
+每个监听端是一个订阅者（见 fanout 模块），有自己的有界缓冲区，跟不上的监听端按策略丢块或断开，
+不影响采集、写盘和其他监听端；可选下混为单声道和整数倍降采样以节省带宽
+
+用法（监听端）: python -m core.streaming http://127.0.0.1:8000/stream.wav --seconds 10 --output copy.wav
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from config import STREAM_CONFIG
+from .fanout import Subscription
+from .pcm import PCMConverter, SAMPLE_FORMATS, WAVE_FORMAT_IEEE_FLOAT
+from .wavwriter import StreamingWavWriter
+
+# 推流时WAV头中的长度字段（长度未知，约定为最大值）
+STREAM_SIZE = 0xFFFFFFFF
+
+PROTOCOLS = ('http', 'tcp')
+
+
+class StreamEncoder:
+    """把采集块编码为推流格式：可选下混、整数倍降采样，再转换为目标PCM格式"""
+
+    def __init__(self, samplerate: int, channels: int, sample_format: str = 'int16',
+                 downmix: bool = False, rate: int = 0):
+        self.in_channels = channels
+        self.downmix = downmix and channels > 1
+        self.channels = 1 if self.downmix else channels
+        # 降采样只支持整数倍（每 factor 帧取平均，兼作简单的抗混叠），实际采样率取整
+        self.factor = max(1, samplerate // rate) if rate else 1
+        self.samplerate = samplerate // self.factor
+        self.converter = PCMConverter(sample_format)
+        self._carry = np.empty((0, self.channels), dtype=np.float32)
+
+    def header(self) -> bytes:
+        """长度未知的WAV头（RIFF/data长度为 0xFFFFFFFF）"""
+        sampwidth = self.converter.sampwidth
+        block_align = self.channels * sampwidth
+        fmt = struct.pack('<HHIIHH', self.converter.format_tag, self.channels, self.samplerate,
+                          self.samplerate * block_align, block_align, sampwidth * 8)
+        if self.converter.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            fmt += struct.pack('<H', 0)
+        return (struct.pack('<4sI4s', b'RIFF', STREAM_SIZE, b'WAVE')
+                + struct.pack('<4sI', b'fmt ', len(fmt)) + fmt
+                + struct.pack('<4sI', b'data', STREAM_SIZE))
+
+    def encode(self, block: np.ndarray) -> bytes:
+        """编码一个块；降采样时不足一组的尾部帧留到下一块"""
+        data = block
+        if self.downmix:
+            data = data.mean(axis=1, keepdims=True, dtype=np.float32)
+        if self.factor > 1:
+            if len(self._carry):
+                data = np.concatenate((self._carry, data))
+            usable = len(data) // self.factor * self.factor
+            self._carry = np.array(data[usable:], dtype=np.float32)
+            data = data[:usable].reshape(-1, self.factor, self.channels).mean(axis=1, dtype=np.float32)
+        if not len(data):
+            return b''
+        return self.converter.convert(data).tobytes()
+
+
+class _Listener:
+    """一个监听端的统计"""
+
+    def __init__(self, address: str, protocol: str):
+        self.address = address
+        self.protocol = protocol
+        self.connected = time.time()
+        self.bytes_sent = 0
+        self.subscription: Optional[Subscription] = None
+
+    def get_stats(self) -> dict:
+        stats = {'address': self.address, 'protocol': self.protocol,
+                 'connected': round(self.connected, 3), 'bytes_sent': self.bytes_sent}
+        if self.subscription is not None:
+            stats.update(self.subscription.get_stats())
+        return stats
+
+
+class _StreamHandler(socketserver.BaseRequestHandler):
+    """每个监听端一个线程：订阅采集块，编码后发送"""
+
+    def handle(self):
+        owner: LiveStreamServer = self.server.owner
+        self.request.settimeout(owner.send_timeout)
+        listener = _Listener('%s:%d' % self.client_address[:2], owner.protocol)
+        try:
+            if owner.protocol == 'http':
+                options = self._read_http_request(owner)
+                if options is None:
+                    return
+            else:
+                options = {'format': owner.sample_format, 'channels': owner.channels, 'rate': owner.rate}
+            owner._add_listener(listener)
+            self._stream(owner, listener, options)
+        except (OSError, ValueError):
+            # 监听端断开或发送超时
+            pass
+        finally:
+            owner._remove_listener(listener)
+
+    def _read_http_request(self, owner: 'LiveStreamServer') -> Optional[dict]:
+        """解析HTTP请求，返回推流选项；非推流请求在此应答后返回None"""
+        stream = self.request.makefile('rb')
+        request_line = stream.readline(8192).decode('latin-1').split()
+        while stream.readline(8192).strip():
+            pass  # 忽略请求头
+        if len(request_line) < 2 or request_line[0] != 'GET':
+            self._send_http(405, 'text/plain', "只支持 GET".encode('utf-8'))
+            return None
+        url = urlsplit(request_line[1])
+        if url.path == '/status':
+            body = json.dumps(owner.get_stats(), ensure_ascii=False).encode('utf-8')
+            self._send_http(200, 'application/json', body)
+            return None
+        if url.path not in ('/', '/stream.wav'):
+            self._send_http(404, 'text/plain', b'not found')
+            return None
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            options = {'format': query.get('format', owner.sample_format),
+                       'channels': int(query.get('channels', owner.channels)),
+                       'rate': int(query.get('rate', owner.rate))}
+            if options['format'] not in SAMPLE_FORMATS:
+                raise ValueError(f"不支持的采样格式: {options['format']}")
+            if options['channels'] not in (0, 1) or options['rate'] < 0:
+                raise ValueError("channels 只能为 1（下混）或 0（原始通道），rate 不能为负数")
+        except ValueError as e:
+            self._send_http(400, 'text/plain', str(e).encode('utf-8'))
+            return None
+        return options
+
+    def _send_http(self, status: int, content_type: str, body: bytes):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+        self.request.sendall((f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                              f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('latin-1')
+                             + body)
+
+    def _stream(self, owner: 'LiveStreamServer', listener: _Listener, options: dict):
+        """订阅并发送，直到录制结束、监听端断开或服务停止"""
+        sock = self.request
+        http = owner.protocol == 'http'
+        subscription = listener.subscription = owner.recorder.subscribe(
+            f"stream-{listener.address}", owner.queue_maxsize, owner.slow_policy)
+        try:
+            # 未在录制时等待下一次录制开始；采样率在收到第一个块后才能确定
+            first = None
+            while first is None and owner.running and not subscription.closed:
+                first = subscription.get(timeout=0.5)
+            if first is None:
+                return
+            encoder = StreamEncoder(owner.recorder.get_status().samplerate, first.data.shape[1],
+                                    options['format'], options['channels'] == 1, options['rate'])
+            if http:
+                sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: audio/wav\r\n"
+                             b"Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\n\r\n")
+                self._send(sock, listener, encoder.header(), http)
+
+            item = first
+            while item is not None and owner.running:
+                self._send(sock, listener, encoder.encode(item.data), http)
+                item = subscription.get(timeout=0.5)
+                while item is None and owner.running and not subscription.closed:
+                    item = subscription.get(timeout=0.5)
+            if http:
+                # 录制结束：发送结束块
+                sock.sendall(b"0\r\n\r\n")
+        finally:
+            owner.recorder.unsubscribe(subscription)
+
+    @staticmethod
+    def _send(sock: socket.socket, listener: _Listener, payload: bytes, http: bool):
+        if not payload:
+            return
+        if http:
+            sock.sendall(b"%X\r\n" % len(payload) + payload + b"\r\n")
+        else:
+            sock.sendall(payload)
+        listener.bytes_sent += len(payload)
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LiveStreamServer:
+    """
+    实时推流服务（在后台线程中运行）
+    绑定到 AudioRecorder 后，录制期间的每个块都会推送给已连接的监听端；
+    没有录制时连接的监听端会等待下一次录制开始
+    """
+
+    def __init__(self, recorder, protocol: str = STREAM_CONFIG['protocol'],
+                 host: str = STREAM_CONFIG['host'], port: int = STREAM_CONFIG['port'],
+                 sample_format: str = STREAM_CONFIG['sample_format'],
+                 channels: int = STREAM_CONFIG['channels'], rate: int = STREAM_CONFIG['rate'],
+                 queue_maxsize: int = STREAM_CONFIG['queue_maxsize'],
+                 slow_policy: str = STREAM_CONFIG['slow_policy'],
+                 send_timeout: float = STREAM_CONFIG['send_timeout']):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"不支持的推流协议: {protocol}")
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"不支持的采样格式: {sample_format}")
+        self.recorder = recorder
+        self.protocol = protocol
+        self.sample_format = sample_format
+        self.channels = channels  # 1: 下混为单声道；0: 保持原始通道
+        self.rate = rate  # 目标采样率（整数倍降采样）；0: 保持原始采样率
+        self.queue_maxsize = queue_maxsize
+        self.slow_policy = slow_policy
+        self.send_timeout = send_timeout
+        self.running = False
+        self._listeners: List[_Listener] = []
+        self.served = 0  # 累计服务过的监听端数
+        self.bytes_sent = 0  # 已断开的监听端累计发送的字节数
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _StreamHandler, bind_and_activate=True)
+        self._server.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/stream.wav" if self.protocol == 'http' else f"tcp://{host}:{port}"
+
+    def start(self):
+        """在后台线程中开始接受连接"""
+        self.running = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="live-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止服务并断开所有监听端"""
+        self.running = False
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            if listener.subscription is not None:
+                self.recorder.unsubscribe(listener.subscription)
+
+    def _add_listener(self, listener: _Listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _remove_listener(self, listener: _Listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+                self.served += 1
+                self.bytes_sent += listener.bytes_sent
+
+    def get_stats(self) -> dict:
+        """当前监听端及其发送量、缓冲区统计"""
+        with self._lock:
+            listeners = list(self._listeners)
+            served, bytes_sent = self.served, self.bytes_sent
+        return {'url': self.url, 'served': served, 'bytes_sent': bytes_sent,
+                'listeners': [listener.get_stats() for listener in listeners]}
+
+
+def _read_exact(response, size: int) -> bytes:
+    """从响应中读取恰好 size 字节，推流提前结束时报错"""
+    data = response.read(size)
+    if len(data) < size:
+        raise RuntimeError("推流在WAV头结束前中断")
+    return data
+
+
+def _read_wav_header(response) -> dict:
+    """逐块解析推流的WAV头，读到 data 块为止，返回格式信息（不假定头部长度固定）"""
+    riff_id, _, wave_id = struct.unpack('<4sI4s', _read_exact(response, 12))
+    if riff_id not in (b'RIFF', b'RF64', b'BW64') or wave_id != b'WAVE':
+        raise RuntimeError("推流内容不是WAV格式")
+    info = None
+    while True:
+        chunk_id, chunk_size = struct.unpack('<4sI', _read_exact(response, 8))
+        if chunk_id == b'data':
+            break
+        body = _read_exact(response, chunk_size + chunk_size % 2)
+        if chunk_id == b'fmt ':
+            format_tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+            sampwidth = bits // 8
+            sample_format = next((name for name, spec in SAMPLE_FORMATS.items()
+                                  if spec == (sampwidth, format_tag)), None)
+            if sample_format is None:
+                raise RuntimeError(f"不支持的推流格式: 格式标签 {format_tag}, {bits} 位")
+            info = {'samplerate': samplerate, 'channels': channels, 'sampwidth': sampwidth,
+                    'format_tag': format_tag, 'sample_format': sample_format}
+    if info is None:
+        raise RuntimeError("推流的WAV头缺少 fmt 块")
+    return info
+
+
+def receive_http(url: str, seconds: Optional[float] = None,
+                 timeout: float = STREAM_CONFIG['send_timeout']) -> Tuple[dict, bytes]:
+    """接收HTTP推流，返回 (WAV格式信息, PCM数据)；seconds 为None时接收到推流结束"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    try:
+        connection.request('GET', parts.path + ('?' + parts.query if parts.query else ''))
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"推流服务返回 {response.status}: {response.read().decode('utf-8', 'replace')}")
+        info = _read_wav_header(response)
+        samplerate, channels, sampwidth = info['samplerate'], info['channels'], info['sampwidth']
+        limit = int(seconds * samplerate) * channels * sampwidth if seconds else None
+        data = bytearray()
+        while limit is None or len(data) < limit:
+            chunk = response.read1(65536) if hasattr(response, 'read1') else response.read(65536)
+            if not chunk:
+                break
+            data += chunk
+        return info, bytes(data[:limit] if limit is not None else data)
+    finally:
+        connection.close()
+
+
+def receive_tcp(host: str, port: int, nbytes: Optional[int] = None,
+                timeout: float = STREAM_CONFIG['send_timeout']) -> bytes:
+    """接收原始PCM推流，直到收到 nbytes 字节或推流结束"""
+    data = bytearray()
+    with socket.create_connection((host, port), timeout) as sock:
+        while nbytes is None or len(data) < nbytes:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return bytes(data[:nbytes] if nbytes is not None else data)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """监听端入口：接收HTTP推流并保存为WAV文件"""
+    parser = argparse.ArgumentParser(prog='python -m core.streaming', description="接收实时推流")
+    parser.add_argument('url', help="推流地址，如 http://127.0.0.1:8000/stream.wav?channels=1")
+    parser.add_argument('--seconds', type=float, help="接收时长（秒），不指定则接收到录制结束")
+    parser.add_argument('--output', default='stream.wav', help="保存的WAV文件")
+    args = parser.parse_args(argv)
+
+    info, data = receive_http(args.url, args.seconds)
+    # 用录制同款写入器保存，浮点推流得到正确的格式标签和 fact 块
+    with StreamingWavWriter(args.output, info['samplerate'], info['channels'],
+                            info['sample_format']) as writer:
+        converter = writer.converter
+        frames = len(data) // (info['channels'] * info['sampwidth'])
+        if frames:
+            # 已是目标格式的数据直接写入（int24 为逐字节的 uint8）
+            count = frames * info['channels'] * info['sampwidth'] // converter.out_dtype.itemsize
+            writer.write(np.frombuffer(data, dtype=converter.out_dtype, count=count).reshape(frames, -1),
+                         encoded=True)
+    print(json.dumps({'output': args.output, 'bytes': len(data), **info}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+WAV增量写入模块
+录制过程中逐块写入磁盘，停止时回填RIFF头；
+数据超过4GB时自动升级为RF64/BW64格式
+"""
+
+import struct
+import numpy as np
+from typing import List, Optional, Tuple
+
+from .pcm import PCMConverter, WAVE_FORMAT_IEEE_FLOAT
+
+# 32位RIFF长度字段的上限
+RIFF_MAX_SIZE = 0xFFFFFFFF
+
+# 支持的大文件格式（EBU Tech 3306 RF64 / ITU-R BS.2088 BW64，结构相同）
+LARGE_FILE_FORMATS = ('RF64', 'BW64')
+
+# JUNK占位块的内容长度，恰好可以原地替换为 ds64 块
+DS64_SIZE = 28
+
+
+class StreamingWavWriter:
+    """增量WAV写入器，内存占用与录制时长无关"""
+
+    def __init__(self, path: str, samplerate: int, channels: int,
+                 sample_format: str = 'int16', dither: bool = False,
+                 large_file_format: Optional[str] = 'RF64',
+                 converter: Optional[PCMConverter] = None):
+        if large_file_format is not None and large_file_format not in LARGE_FILE_FORMATS:
+            raise ValueError(f"不支持的大文件格式: {large_file_format}")
+        self.path = path
+        self.samplerate = samplerate
+        self.channels = channels
+        # 可传入共享的转换器（如分段录制时多个文件共用一个）
+        self.converter = converter or PCMConverter(sample_format, dither)
+        self.sampwidth = self.converter.sampwidth
+        self.large_file_format = large_file_format  # 为None时保持经典WAV，超过4GB报错
+        self.frames_written = 0
+        self._data_bytes = 0
+        self._file = open(path, 'wb')
+
+        # 先写入占位头，停止时再回填真实长度
+        self._write_header()
+
+    def _write_header(self):
+        """写入（或回填）文件头；超过4GB时改写为RF64/BW64"""
+        block_align = self.channels * self.sampwidth
+        format_tag = self.converter.format_tag
+        is_float = format_tag == WAVE_FORMAT_IEEE_FLOAT
+        header_size = self._header_size()
+        riff_size = header_size - 8 + self._data_bytes + self._data_bytes % 2
+        large = riff_size > RIFF_MAX_SIZE
+
+        if large:
+            # 真实长度写入 ds64 块，RIFF/data/fact 中的32位长度置为 0xFFFFFFFF
+            head = struct.pack('<4sI4s', self.large_file_format.encode('ascii'), RIFF_MAX_SIZE, b'WAVE')
+            head += struct.pack('<4sIQQQI', b'ds64', DS64_SIZE, riff_size, self._data_bytes,
+                                self.frames_written, 0)
+            data_size = RIFF_MAX_SIZE
+            fact_frames = RIFF_MAX_SIZE
+        else:
+            head = struct.pack('<4sI4s', b'RIFF', riff_size, b'WAVE')
+            if self.large_file_format is not None:
+                # 预留与 ds64 等长的 JUNK 块，升级时原地替换，无需移动音频数据
+                head += struct.pack('<4sI', b'JUNK', DS64_SIZE) + bytes(DS64_SIZE)
+            data_size = self._data_bytes
+            fact_frames = self.frames_written
+
+        fmt = struct.pack('<HHIIHH', format_tag, self.channels, self.samplerate,
+                          self.samplerate * block_align, block_align, self.sampwidth * 8)
+        if is_float:
+            # 非PCM格式需要 cbSize 字段和 fact 块
+            fmt += struct.pack('<H', 0)
+            body = (struct.pack('<4sI', b'fmt ', len(fmt)) + fmt
+                    + struct.pack('<4sII', b'fact', 4, fact_frames & RIFF_MAX_SIZE))
+        else:
+            body = struct.pack('<4sI', b'fmt ', len(fmt)) + fmt
+        body += struct.pack('<4sI', b'data', data_size)
+
+        self._file.write(head + body)
+
+    @property
+    def data_offset(self) -> int:
+        """音频数据在文件中的起始位置（字节）；升级为RF64/BW64时原地替换JUNK块，位置不变"""
+        return self._header_size()
+
+    @property
+    def index(self) -> List[Tuple[int, str, int]]:
+        """时间→字节偏移索引：[(起始帧, 文件路径, 数据起始位置)]"""
+        return [(0, self.path, self.data_offset)]
+
+    def _header_size(self) -> int:
+        """文件头总长度（打开时即固定，回填时不变）"""
+        size = 12 + 8 + 16 + 8  # RIFF + fmt + data
+        if self.converter.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            size += 2 + 12  # cbSize + fact
+        if self.large_file_format is not None:
+            size += 8 + DS64_SIZE  # JUNK / ds64
+        return size
+
+    def write(self, data: np.ndarray, encoded: bool = False):
+        """转换并写入一个音频块；转换器刚输出的块或 encoded=True（已是目标格式的数据）直接写入"""
+        if encoded or self.converter.is_encoded(data):
+            self._write_encoded(data)
+        else:
+            for chunk in self.converter.iter_convert(data):
+                self._write_encoded(chunk)
+
+    def _write_encoded(self, data: np.ndarray):
+        """写入已编码的块"""
+        if self.large_file_format is None and \
+                self._header_size() - 8 + self._data_bytes + data.nbytes > RIFF_MAX_SIZE:
+            raise RuntimeError("WAV文件超过4GB上限，请启用RF64/BW64格式")
+        self._file.write(np.ascontiguousarray(data).data)
+        self._data_bytes += data.nbytes
+        self.frames_written += len(data)
+
+    def close(self) -> Optional[str]:
+        """回填RIFF头并关闭文件"""
+        if self._file is None:
+            return None
+        try:
+            # 奇数长度的data块需要补齐一个字节
+            if self._data_bytes % 2:
+                self._file.write(b'\x00')
+            self._file.seek(0)
+            self._write_header()
+        finally:
+            self._file.close()
+            self._file = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -21,6 +21,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from ui.gui import ModernGUI
+    from config import LOGGING_CONFIG
 except ImportError as e:
     print(f"导入模块失败: {e}")
     print("请确保所有依赖模块都已正确安装")
@@ -42,6 +43,12 @@ def main():
     # 设置高DPI支持
     setup_high_dpi()
     
+    # 按配置启用结构化日志（默认关闭）
+    if LOGGING_CONFIG['enabled']:
+        # 只在启用时导入，默认情况下首帧前不加载录制核心
+        from core.instrumentation import configure_logging
+        configure_logging()
+    
     try:
         # 创建主窗口
         root = tk.Tk()
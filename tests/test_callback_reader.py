@@ -0,0 +1,61 @@
+"""
+回调式读取器测试
+不打开真实设备，直接调用 PortAudio 回调，验证计数和环形缓冲区
+"""
+
+import threading
+
+import numpy as np
+
+from core.backends import _CallbackReader
+
+
+def make_reader(capacity=16, channels=2):
+    """跳过打开输入流，只初始化回调用到的状态"""
+    reader = _CallbackReader.__new__(_CallbackReader)
+    reader.channels = channels
+    reader.capacity = capacity
+    reader._ring = np.zeros((capacity, channels), dtype=np.float32)
+    reader._write_pos = 0
+    reader._read_pos = 0
+    reader._data_ready = threading.Event()
+    reader.callbacks = 0
+    reader.input_overflows = 0
+    reader.ring_overflow_frames = 0
+    return reader
+
+
+class Flags:
+    """模拟 sounddevice.CallbackFlags：任一标志置位时为真"""
+
+    NAMES = ('input_underflow', 'input_overflow', 'output_underflow', 'output_overflow', 'priming_output')
+
+    def __init__(self, **values):
+        for name in self.NAMES:
+            setattr(self, name, values.get(name, False))
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.NAMES)
+
+
+def test_only_input_overflow_is_counted():
+    """输出下溢、预充等标志不计为输入溢出"""
+    reader = make_reader()
+    block = np.ones((4, 2), dtype=np.float32)
+    reader._callback(block, 4, None, Flags(output_underflow=True))
+    reader._callback(block, 4, None, Flags(priming_output=True))
+    reader._callback(block, 4, None, Flags())
+    assert reader.input_overflows == 0
+    reader._callback(block, 4, None, Flags(input_overflow=True, output_underflow=True))
+    assert reader.input_overflows == 1
+    assert reader.callbacks == 4
+
+
+def test_full_ring_drops_and_counts_frames():
+    """环形缓冲区满时丢弃超出的帧并计数，已有数据不被覆盖"""
+    reader = make_reader(capacity=6)
+    reader._callback(np.full((4, 2), 1, dtype=np.float32), 4, None, Flags())
+    reader._callback(np.full((4, 2), 2, dtype=np.float32), 4, None, Flags())
+    assert reader.ring_overflow_frames == 2
+    assert reader._write_pos == 6
+    np.testing.assert_array_equal(reader._ring[:, 0], [1, 1, 1, 1, 2, 2])
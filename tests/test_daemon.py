@@ -0,0 +1,41 @@
+"""
+录制服务测试
+start 请求参数的类型转换，以及已结束会话的清理
+"""
+
+import asyncio
+
+import pytest
+
+from core.daemon import RecorderDaemon, session_args
+
+
+@pytest.mark.parametrize('value', [False, 0, 'false', 'False', '0', 'off'])
+def test_switch_param_false_values(value):
+    """JSON 中的 "false" 不能按非空字符串当作真值"""
+    assert session_args({'gate': value}).gate is False
+
+
+@pytest.mark.parametrize('value', [True, 1, 'true', '1', 'yes'])
+def test_switch_param_true_values(value):
+    assert session_args({'gate': value}).gate is True
+
+
+@pytest.mark.parametrize('value', ['maybe', 2, None, [True]])
+def test_switch_param_rejects_other_values(value):
+    with pytest.raises(ValueError):
+        session_args({'gate': value})
+
+
+def test_finished_sessions_are_pruned(tmp_path):
+    """已结束的会话只保留最近的 max_finished 个"""
+    async def run():
+        daemon = RecorderDaemon(max_finished=2, poll_interval=0.01)
+        for i in range(4):
+            session = await daemon.start_session({'backend': 'synthetic', 'duration': 0.05,
+                                                  'output': str(tmp_path / f'{i}.wav')})
+            await daemon.stop_session(session.id)
+        return daemon
+
+    daemon = asyncio.run(run())
+    assert sorted(daemon.sessions) == ['3', '4']
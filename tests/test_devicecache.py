@@ -0,0 +1,92 @@
+"""
+设备能力缓存测试
+用替身 sounddevice 模块验证各主机API都能得到回放录制采样率，且不探测输出流参数
+"""
+
+import sys
+import types
+
+import pytest
+
+from core.devicecache import DeviceCapabilityCache, device_fingerprint, probe_devices
+
+RATES = [44100, 48000, 96000]
+
+
+class FakeWasapiSettings:
+    def __init__(self, loopback=False):
+        self.loopback = loopback
+
+
+def make_sounddevice(devices, hostapis, input_limit, loopback_limit):
+    """替身 sounddevice：输入流只接受 input_limit 以下的采样率，loopback 流只接受 loopback_limit 以下"""
+    module = types.ModuleType('sounddevice')
+    module.calls = []
+
+    def query_devices(index=None):
+        return devices if index is None else devices[index]
+
+    def check_input_settings(device, samplerate, channels, extra_settings=None):
+        module.calls.append(('input', device, samplerate, extra_settings is not None))
+        limit = loopback_limit if extra_settings is not None else input_limit
+        if samplerate > limit:
+            raise ValueError("不支持的采样率")
+
+    def check_output_settings(**kwargs):
+        raise AssertionError("不应探测输出流参数")
+
+    module.query_devices = query_devices
+    module.query_hostapis = lambda index: hostapis[index]
+    module.check_input_settings = check_input_settings
+    module.check_output_settings = check_output_settings
+    module.WasapiSettings = FakeWasapiSettings
+    module.default = types.SimpleNamespace(device=(0, 1))
+    return module
+
+
+def device(name, hostapi, inputs, outputs):
+    return {'name': name, 'hostapi': hostapi, 'max_input_channels': inputs,
+            'max_output_channels': outputs, 'default_samplerate': 48000.0}
+
+
+@pytest.fixture
+def fake_sd(monkeypatch):
+    devices = [device('Mic', 0, 2, 0), device('Speakers', 0, 0, 2),
+               device('Mic', 1, 1, 0), device('Speakers', 1, 0, 2)]
+    hostapis = [{'name': 'Windows WASAPI'}, {'name': 'PulseAudio'}]
+    module = make_sounddevice(devices, hostapis, input_limit=48000, loopback_limit=44100)
+    monkeypatch.setitem(sys.modules, 'sounddevice', module)
+    return module
+
+
+def test_loopback_rates_on_every_hostapi(fake_sd):
+    """WASAPI 以 loopback 输入流探测，其他主机API的输出设备同样有回放录制采样率"""
+    results = probe_devices(RATES)
+
+    wasapi_speakers = results[device_fingerprint('Speakers', 'Windows WASAPI', 0, 2)]
+    assert wasapi_speakers['loopback_rates'] == [44100]
+    assert wasapi_speakers['input_rates'] == []
+
+    pulse_speakers = results[device_fingerprint('Speakers', 'PulseAudio', 0, 2)]
+    assert pulse_speakers['loopback_rates'] == RATES
+
+    wasapi_mic = results[device_fingerprint('Mic', 'Windows WASAPI', 2, 0)]
+    assert wasapi_mic['input_rates'] == [44100, 48000]
+    assert wasapi_mic['loopback_rates'] == []
+
+    # loopback 探测只用于 WASAPI 输出设备
+    loopback_devices = {call[1] for call in fake_sd.calls if call[3]}
+    assert loopback_devices == {1}
+
+
+def test_cached_loopback_rates_survive_reload(fake_sd, tmp_path):
+    """探测结果写入磁盘后重新加载，非 WASAPI 设备同样命中"""
+    path = str(tmp_path / 'devices.json')
+    cache = DeviceCapabilityCache(path)
+    for fingerprint, entry in probe_devices(RATES).items():
+        cache.put(fingerprint, entry)
+    cache.save()
+
+    reloaded = DeviceCapabilityCache(path)
+    entry = reloaded.get(device_fingerprint('Speakers', 'PulseAudio', 0, 2))
+    assert entry is not None and entry['loopback_rates'] == RATES
@@ -0,0 +1,119 @@
+"""
+块订阅测试
+慢订阅者的三种处理策略：丢弃最旧的块、降级为隔块投递、断开；投递从不阻塞采集线程
+"""
+
+import numpy as np
+import pytest
+
+from core.fanout import (MAX_STRIDE, SLOW_DEGRADE, SLOW_DISCONNECT, SLOW_DROP, Subscription,
+                         TimedBlock)
+
+BLOCK_FRAMES = 10
+
+
+def make_block(index):
+    block = np.full((BLOCK_FRAMES, 2), index, dtype=np.float32)
+    block.flags.writeable = False
+    return block
+
+
+def offer_blocks(subscription, start, count):
+    """按顺序投递 count 个块，返回每次 offer 的结果"""
+    return [subscription.offer(i * BLOCK_FRAMES, make_block(i)) for i in range(start, start + count)]
+
+
+def drain(subscription):
+    """取出当前已入队的全部块"""
+    items = []
+    while subscription.get_stats()['depth']:
+        items.append(subscription.get(timeout=0))
+    return items
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        Subscription('s', 4, slow_policy='block')
+
+
+def test_delivers_blocks_without_copying():
+    subscription = Subscription('s', 4)
+    block = make_block(0)
+    assert subscription.offer(0, block)
+    item = subscription.get(timeout=0)
+    assert isinstance(item, TimedBlock)
+    assert item.frame == 0
+    assert item.data is block
+
+
+def test_drop_policy_keeps_latest_blocks():
+    """队列满时丢弃最旧的块，订阅者保持有效，读到的是最新的块"""
+    subscription = Subscription('s', 4, slow_policy=SLOW_DROP)
+    assert offer_blocks(subscription, 0, 10) == [True] * 10
+    items = drain(subscription)
+    assert [item.frame for item in items] == [i * BLOCK_FRAMES for i in range(6, 10)]
+    stats = subscription.get_stats()
+    assert stats['delivered'] == 10
+    assert stats['dropped'] == 6
+    assert stats['skipped'] == 0
+    assert stats['stride'] == 1
+    assert stats['high_watermark'] == 4
+    assert not stats['disconnected']
+
+
+def test_degrade_policy_widens_stride_while_full():
+    """队列满时投递间隔逐次加倍直到上限，被跳过的块计入 skipped"""
+    subscription = Subscription('s', 4, slow_policy=SLOW_DEGRADE)
+    offered = 400
+    assert offer_blocks(subscription, 0, offered) == [True] * offered
+    stats = subscription.get_stats()
+    assert stats['stride'] == MAX_STRIDE
+    assert stats['delivered'] + stats['skipped'] == offered
+    assert stats['skipped'] > stats['delivered']
+    # 投递的块帧号递增，跳过的部分表现为帧号缺口
+    frames = [item.frame for item in drain(subscription)]
+    assert frames == sorted(frames)
+    assert all(b - a >= MAX_STRIDE * BLOCK_FRAMES for a, b in zip(frames, frames[1:]))
+
+
+def test_degrade_policy_recovers_after_backlog_clears():
+    """积压消化后投递间隔逐步减半，恢复为逐块投递"""
+    subscription = Subscription('s', 4, slow_policy=SLOW_DEGRADE)
+    offer_blocks(subscription, 0, 200)
+    assert subscription.get_stats()['stride'] == MAX_STRIDE
+    drain(subscription)
+    index = 200
+    while subscription.get_stats()['stride'] > 1:
+        offer_blocks(subscription, index, 1)
+        index += 1
+        drain(subscription)
+    assert index - 200 == 6  # 64 -> 1 共减半6次
+    skipped = subscription.get_stats()['skipped']
+    offer_blocks(subscription, index, 1)
+    assert subscription.get_stats()['skipped'] == skipped
+    assert subscription.get(timeout=0).frame == index * BLOCK_FRAMES
+
+
+def test_disconnect_policy_closes_slow_subscriber():
+    """队列满时断开订阅者：offer 返回 False，已入队的块仍可读完，之后迭代结束"""
+    subscription = Subscription('s', 3, slow_policy=SLOW_DISCONNECT)
+    assert offer_blocks(subscription, 0, 3) == [True] * 3
+    assert subscription.offer(30, make_block(3)) is False
+    assert subscription.disconnected
+    assert subscription.closed
+    assert offer_blocks(subscription, 4, 2) == [False, False]
+    assert [item.frame for item in subscription] == [0, 10, 20]
+    stats = subscription.get_stats()
+    assert stats['disconnected']
+    assert stats['delivered'] == 3
+    assert stats['dropped'] == 0
+
+
+def test_close_ends_iteration_after_remaining_blocks():
+    subscription = Subscription('s', 4)
+    offer_blocks(subscription, 0, 2)
+    subscription.close()
+    assert subscription.offer(20, make_block(2)) is False
+    assert not subscription.disconnected
+    assert [item.frame for item in subscription] == [0, 10]
+    assert subscription.get(timeout=0) is None
@@ -0,0 +1,89 @@
+"""
+能量门限测试
+对已知信号做门限处理，再用 .gate.json 中的映射还原原始时间轴
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from core.gate import EnergyGate, gate_map_path, source_frame
+from core.pipeline import GateStage, RecordingPipeline, WriteStage
+from core.wavwriter import StreamingWavWriter
+
+RATE = 8000
+
+
+def make_signal():
+    """静音与正弦音交替的已知信号，返回 (信号, [(有声起点, 有声终点)])"""
+    layout = [('silence', 1.0), ('tone', 0.5), ('silence', 2.0), ('tone', 0.25), ('silence', 1.5)]
+    pieces = []
+    bursts = []
+    position = 0
+    for kind, seconds in layout:
+        frames = int(RATE * seconds)
+        if kind == 'tone':
+            t = np.arange(frames) / RATE
+            pieces.append(0.5 * np.sin(2 * np.pi * 440 * t))
+            bursts.append((position, position + frames))
+        else:
+            pieces.append(np.zeros(frames))
+        position += frames
+    signal = np.concatenate(pieces).astype(np.float32).reshape(-1, 1)
+    return signal, bursts
+
+
+def restore_timeline(gate_map, output):
+    """按映射把被移除的静音补回原位，得到与原始时间轴等长的信号"""
+    restored = np.zeros((gate_map['source_frames'], output.shape[1]), dtype=output.dtype)
+    positions = [source_frame(gate_map, frame) for frame in range(len(output))]
+    restored[positions] = output
+    return restored
+
+
+@pytest.mark.parametrize('blocksize', [160, 1024, 5000])
+def test_gate_map_restores_original_timeline(tmp_path, blocksize):
+    """经过门限、写入文件后，按 .gate.json 还原的时间轴与原始信号逐帧一致"""
+    signal, bursts = make_signal()
+    path = str(tmp_path / 'gated.wav')
+    gate = EnergyGate(RATE, 1, threshold_db=-40, hangover=0.1, preroll=0.05)
+
+    writer = StreamingWavWriter(path, RATE, 1, 'float32')
+    pipeline = RecordingPipeline()
+    pipeline.add_branch('writer', [GateStage(gate), WriteStage(writer)], maxsize=64)
+    pipeline.start()
+    for start in range(0, len(signal), blocksize):
+        pipeline.push(signal[start:start + blocksize])
+    pipeline.close()
+    gate.write_map(gate_map_path(path))
+
+    with open(str(tmp_path / 'gated.gate.json'), encoding='utf-8') as f:
+        gate_map = json.load(f)
+    with open(path, 'rb') as f:
+        f.seek(writer.data_offset)
+        output = np.frombuffer(f.read(), dtype='<f4').reshape(-1, 1)
+    assert writer.frames_written == len(output) == gate_map['output_frames']
+
+    # 静音被移除，且移除区间与输出帧数相加等于原始长度
+    assert gate_map['source_frames'] == len(signal)
+    assert gate_map['output_frames'] < len(signal)
+    assert gate_map['output_frames'] + sum(span['frames'] for span in gate_map['removed']) == len(signal)
+
+    # 移除的区间都不与有声段重叠
+    for span in gate_map['removed']:
+        for start, end in bursts:
+            assert span['start'] + span['frames'] <= start or span['start'] >= end
+
+    # 补回静音后与原始信号逐帧一致
+    np.testing.assert_array_equal(restore_timeline(gate_map, output), signal)
+
+
+def test_source_frame_skips_removed_spans():
+    """输出帧恰好位于移除区间之后时，加回该区间"""
+    gate_map = {'removed': [{'start': 0, 'frames': 100, 'output_frame': 0},
+                            {'start': 150, 'frames': 50, 'output_frame': 50}]}
+    assert source_frame(gate_map, 0) == 100
+    assert source_frame(gate_map, 49) == 149
+    assert source_frame(gate_map, 50) == 200
+    assert source_frame(gate_map, 60) == 210
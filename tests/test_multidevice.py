@@ -0,0 +1,43 @@
+"""
+多设备采集测试
+合并后的通道数固定，录制器在设置通道数时即拒绝不一致的值
+"""
+
+import wave
+
+import pytest
+
+from core import AudioRecorder, MultiDeviceBackend, SyntheticBackend
+
+
+def make_backend():
+    return MultiDeviceBackend([SyntheticBackend(channels=2, realtime=True),
+                               SyntheticBackend(kind='noise', channels=1, realtime=True, seed=1)],
+                              channel_counts=[2, 1])
+
+
+def test_set_channels_rejects_subset_of_combined_channels():
+    """少于合并通道数时在 set_channels 中报错，而不是到开始录制时才失败"""
+    recorder = AudioRecorder(make_backend())
+    assert recorder.channels == 3
+    with pytest.raises(ValueError):
+        recorder.set_channels(2)
+    with pytest.raises(ValueError):
+        recorder.set_channels(4)
+    recorder.set_channels(3)
+
+
+def test_records_combined_channels(tmp_path):
+    """按合并通道数录制，文件包含全部设备的通道"""
+    recorder = AudioRecorder(make_backend())
+    recorder.set_channels(3)
+    recorder.set_peaks(False)
+    path = str(tmp_path / 'multi.wav')
+    recorder.set_output_file(path)
+    recorder.set_frame_limit(4800)
+    assert recorder.start_recording(48000)
+    assert recorder.wait(10)
+    assert recorder.last_error is None
+    with wave.open(path, 'rb') as wav:
+        assert wav.getnchannels() == 3
+        assert wav.getnframes() == 4800
@@ -0,0 +1,125 @@
+"""
+PCM转换测试
+整数格式的饱和边界、24位紧凑小端打包、TPDF抖动幅度，以及输出缓冲区的识别
+"""
+
+import numpy as np
+import pytest
+
+from core.pcm import PCMConverter
+
+
+def decode_int24(raw):
+    """把 (帧数, 通道数 * 3) 的小端3字节数据还原为 int32"""
+    packed = raw.reshape(-1, 3).astype(np.int32)
+    values = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+    return np.where(values & 0x800000, values - (1 << 24), values)
+
+
+def decode(converter, out):
+    """把转换结果还原为整数采样（一维）"""
+    if converter.sample_format == 'int24':
+        return decode_int24(out)
+    return out.reshape(-1).astype(np.int64)
+
+
+@pytest.mark.parametrize('sample_format,bits', [('int16', 16), ('int24', 24), ('int32', 32)])
+def test_integer_formats_saturate(sample_format, bits):
+    """超出 [-1, 1] 的采样饱和到满量程，不回绕"""
+    converter = PCMConverter(sample_format)
+    data = np.array([[2.0, -2.0], [1.0, -1.0], [1.5, -0.5], [0.0, 0.0]], dtype=np.float32)
+    values = decode(converter, converter.convert(data))
+    full = 2 ** (bits - 1)
+    assert values.tolist() == [full - 1, -full, full - 1, -(full - 1), full - 1, -(full // 2), 0, 0]
+
+
+def test_float32_output_is_clipped():
+    converter = PCMConverter('float32')
+    out = converter.convert(np.array([[1.5, -3.0, 0.25]], dtype=np.float32))
+    assert out.dtype == np.dtype('<f4')
+    assert out.tolist() == [[1.0, -1.0, 0.25]]
+
+
+def test_int24_packing_is_little_endian_three_bytes():
+    """24位输出每个采样3字节，低字节在前，负数为二进制补码"""
+    converter = PCMConverter('int24')
+    data = np.array([[0.5, -1.0], [2.0, -2.0]], dtype=np.float32)
+    out = converter.convert(data)
+    assert out.dtype == np.uint8
+    assert out.shape == (2, 6)
+    # 0.5 * 8388607 = 4194303.5 -> 4194304 = 0x400000；-8388607 = 0x800001
+    assert bytes(out[0]) == bytes([0x00, 0x00, 0x40, 0x01, 0x00, 0x80])
+    # 饱和到 0x7fffff 与 0x800000
+    assert bytes(out[1]) == bytes([0xff, 0xff, 0x7f, 0x00, 0x00, 0x80])
+
+
+def test_int24_round_trip_matches_scaled_input():
+    rng = np.random.default_rng(3)
+    data = rng.uniform(-1, 1, size=(1000, 2)).astype(np.float32)
+    converter = PCMConverter('int24')
+    values = decode_int24(converter.convert(data))
+    expected = np.rint(data.reshape(-1).astype(np.float64) * converter.max_value)
+    assert np.abs(values - expected).max() <= 1
+
+
+def test_integer_input_is_normalized():
+    """整数输入按其满量程换算后再转换"""
+    converter = PCMConverter('int16')
+    data = np.array([[32767, -32767, 0]], dtype=np.int16)
+    assert converter.convert(data).tolist() == [[32767, -32767, 0]]
+    converter = PCMConverter('int24')
+    values = decode_int24(converter.convert(data))
+    assert values.tolist() == [8388607, -8388607, 0]
+
+
+@pytest.mark.parametrize('sample_format', ['int16', 'int24', 'int32'])
+def test_tpdf_dither_stays_within_one_lsb(sample_format):
+    """抖动为两个均匀分布之差，量化结果与不加抖动时最多相差1 LSB"""
+    rng = np.random.default_rng(7)
+    data = rng.uniform(-0.9, 0.9, size=(20000, 2)).astype(np.float32)
+    plain = PCMConverter(sample_format)
+    dithered = PCMConverter(sample_format, dither=True, seed=1)
+    expected = decode(plain, plain.convert(data))
+    values = decode(dithered, dithered.convert(data))
+    difference = values - expected
+    assert np.abs(difference).max() <= 1
+    # 抖动确实改变了部分采样，且没有系统偏移
+    assert np.count_nonzero(difference) > len(difference) // 10
+    assert abs(difference.mean()) < 0.05
+
+
+def test_dither_on_silence_and_full_scale():
+    """静音加抖动只产生 -1/0/+1；满量程加抖动仍然饱和"""
+    converter = PCMConverter('int16', dither=True, seed=2)
+    silence = converter.convert(np.zeros((10000, 1), dtype=np.float32)).reshape(-1)
+    assert set(np.unique(silence).tolist()) <= {-1, 0, 1}
+    assert np.count_nonzero(silence) > 0
+    full = converter.convert(np.full((10000, 2), [1.0, -1.0], dtype=np.float32))
+    assert full[:, 0].min() >= 32766 and full[:, 0].max() == 32767
+    assert full[:, 1].min() >= -32768 and full[:, 1].max() <= -32766
+
+
+def test_float_output_ignores_dither():
+    converter = PCMConverter('float32', dither=True, seed=1)
+    assert not converter.dither
+    data = np.array([[0.125, -0.5]], dtype=np.float32)
+    assert converter.convert(data).tolist() == data.tolist()
+
+
+def test_iter_convert_matches_single_convert():
+    rng = np.random.default_rng(5)
+    data = rng.uniform(-1.2, 1.2, size=(1000, 2)).astype(np.float32)
+    whole = PCMConverter('int24').convert(data).copy()
+    chunked = np.concatenate(list(c.copy() for c in PCMConverter('int24', chunk_frames=300).iter_convert(data)))
+    assert np.array_equal(whole, chunked)
+
+
+def test_is_encoded_uses_buffer_identity():
+    """只有 convert() 的输出才算已编码；同类型的原始数据需要重新转换"""
+    converter = PCMConverter('float32')
+    raw = np.array([[1.5, -0.5]], dtype=np.float32)
+    assert not converter.is_encoded(raw)
+    out = converter.convert(raw)
+    assert converter.is_encoded(out)
+    assert not converter.is_encoded(raw)
+    assert not converter.is_encoded(out.copy())
@@ -0,0 +1,54 @@
+"""
+波形峰值测试
+录制中界面线程读取的峰值只包含已发布的点；结束时 flush() 补上每级最后一个不完整的点
+"""
+
+import threading
+
+import numpy as np
+
+from core.peaks import MAX, MIN, PeakPyramid, _LevelBuffer
+
+
+def test_level_view_never_exposes_unpublished_rows():
+    """写入线程不断扩容时，读取方看到的每一行都已写入"""
+    buffer = _LevelBuffer(channels=1, capacity=4)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            view = buffer.view()
+            expected = np.arange(len(view), dtype='<i2')
+            if not np.array_equal(view[:, 0, 0], expected):
+                errors.append(len(view))
+                return
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for start in range(0, 20000, 7):
+            rows = np.arange(start, start + 7).astype('<i2')
+            buffer.append(np.repeat(rows[:, np.newaxis, np.newaxis], 3, axis=2))
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
+    assert buffer.count == len(buffer.view()) == 20006
+
+
+def test_flush_adds_final_partial_point_on_every_level():
+    """总帧数不是整点时，flush() 之后每级都覆盖全部帧"""
+    pyramid = PeakPyramid(48000, 2, base_frames=100, factor=4, levels=3)
+    signal = np.zeros((1050, 2), dtype=np.float32)
+    signal[-10:] = 0.5  # 只出现在最后不完整的点里
+    for start in range(0, len(signal), 64):
+        pyramid.process(signal[start:start + 64])
+    assert [len(pyramid.level(level)) for level in range(3)] == [10, 2, 0]
+
+    pyramid.flush()
+    assert [len(pyramid.level(level)) for level in range(3)] == [11, 3, 1]
+    for level in range(3):
+        last = pyramid.level(level)[-1]
+        assert (last[:, MAX] > 0).all()
+        assert (last[:, MIN] == 0).all()
@@ -0,0 +1,135 @@
+"""
+块队列测试
+三种溢出策略的入队/丢弃行为、统计计数，以及阻塞中的生产者在队列关闭时及时返回
+"""
+
+import threading
+import time
+
+import pytest
+
+from core.pipeline import OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, BlockQueue
+
+
+def drain(queue):
+    """取出队列中剩余的全部块"""
+    items = []
+    while len(queue):
+        items.append(queue.get(timeout=0))
+    return items
+
+
+def put_in_thread(queue, block):
+    """在后台线程中入队，返回 (线程, 结果列表)"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(queue.put(block)))
+    thread.start()
+    return thread, result
+
+
+def test_rejects_invalid_arguments():
+    with pytest.raises(ValueError):
+        BlockQueue(0)
+    with pytest.raises(ValueError):
+        BlockQueue(4, overflow='drop_random')
+
+
+def test_drop_newest_keeps_queued_blocks():
+    """队列满时丢弃新块，已入队的块保持不变"""
+    queue = BlockQueue(3, overflow=OVERFLOW_DROP_NEWEST)
+    results = [queue.put(i) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert drain(queue) == [0, 1, 2]
+    stats = queue.get_stats()
+    assert stats['puts'] == 3
+    assert stats['drops'] == 2
+    assert stats['high_watermark'] == 3
+    assert stats['peak_fill_ratio'] == 1.0
+    assert stats['blocked_puts'] == 0
+
+
+def test_drop_oldest_keeps_latest_blocks():
+    """队列满时丢弃最旧的块，新块总能入队"""
+    queue = BlockQueue(3, overflow=OVERFLOW_DROP_OLDEST)
+    results = [queue.put(i) for i in range(5)]
+    assert results == [True] * 5
+    assert drain(queue) == [2, 3, 4]
+    stats = queue.get_stats()
+    assert stats['puts'] == 5
+    assert stats['drops'] == 2
+    assert stats['high_watermark'] == 3
+    assert stats['blocked_puts'] == 0
+
+
+def test_block_waits_for_consumer():
+    """阻塞策略：队列满时生产者等待，消费者取出后入队成功，不丢块"""
+    queue = BlockQueue(2, overflow=OVERFLOW_BLOCK, put_timeout=5.0)
+    assert queue.put(0) and queue.put(1)
+    thread, result = put_in_thread(queue, 2)
+    time.sleep(0.05)
+    assert thread.is_alive()
+    assert queue.get(timeout=1) == 0
+    thread.join(1)
+    assert not thread.is_alive()
+    assert result == [True]
+    assert drain(queue) == [1, 2]
+    stats = queue.get_stats()
+    assert stats['puts'] == 3
+    assert stats['drops'] == 0
+    assert stats['blocked_puts'] == 1
+    assert stats['blocked_seconds'] > 0
+
+
+def test_block_times_out_and_counts_drop():
+    """阻塞超过 put_timeout 后放弃入队，计为一次丢弃"""
+    queue = BlockQueue(1, overflow=OVERFLOW_BLOCK, put_timeout=0.05)
+    assert queue.put(0)
+    assert queue.put(1) is False
+    assert drain(queue) == [0]
+    stats = queue.get_stats()
+    assert stats['drops'] == 1
+    assert stats['blocked_puts'] == 1
+    assert stats['blocked_seconds'] >= 0.04
+
+
+def test_close_releases_blocked_producer():
+    """关闭队列时阻塞中的生产者立即返回（不等到 put_timeout），已入队的块仍可取出"""
+    queue = BlockQueue(1, overflow=OVERFLOW_BLOCK, put_timeout=10.0)
+    assert queue.put(0)
+    thread, result = put_in_thread(queue, 1)
+    time.sleep(0.05)
+    started = time.perf_counter()
+    queue.close()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert time.perf_counter() - started < 1.0
+    assert result == [False]
+    assert queue.closed
+    assert queue.get(timeout=0) == 0
+    assert queue.get(timeout=0) is None
+    assert queue.get_stats()['drops'] == 1
+
+
+def test_close_wakes_waiting_consumer():
+    """消费者在空队列上等待时关闭队列，get 返回 None"""
+    queue = BlockQueue(2)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(queue.get(timeout=10)))
+    thread.start()
+    time.sleep(0.05)
+    queue.close()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert result == [None]
+
+
+def test_high_watermark_tracks_peak_depth():
+    queue = BlockQueue(8, overflow=OVERFLOW_DROP_NEWEST)
+    for i in range(5):
+        queue.put(i)
+    drain(queue)
+    queue.put(5)
+    stats = queue.get_stats()
+    assert stats['depth'] == 1
+    assert stats['high_watermark'] == 5
+    assert stats['peak_fill_ratio'] == 5 / 8
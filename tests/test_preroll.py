@@ -0,0 +1,48 @@
+"""
+预录测试
+预录环形缓冲区中的数据以视图送入流水线分支；录制结束后预录线程会覆盖这些位置，
+订阅者晚于此读取时看到的仍应是录制时的数据
+"""
+
+import time
+
+import numpy as np
+
+from core import AudioRecorder, SyntheticBackend
+
+
+def read_float_wav(path, channels):
+    """读出 float32 文件中 data 块的采样"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    offset = content.index(b'data') + 8
+    return np.frombuffer(content[offset:], dtype='<f4').reshape(-1, channels)
+
+
+def test_slow_subscriber_sees_preroll_after_ring_reuse(tmp_path):
+    """订阅者在预录缓冲区被复用后才读取，拿到的预录块与写入文件的数据一致"""
+    recorder = AudioRecorder(SyntheticBackend(kind='noise', channels=2, realtime=True, seed=3))
+    recorder.set_sample_format('float32')
+    recorder.set_peaks(False)
+    recorder.set_block_duration(0.01)
+    path = str(tmp_path / 'armed.wav')
+    recorder.set_output_file(path)
+    assert recorder.arm(48000, 0.3)
+    try:
+        time.sleep(0.4)
+        subscription = recorder.subscribe('slow', maxsize=1000)
+        recorder.set_frame_limit(int(48000 * 0.5))
+        assert recorder.start_recording(48000)
+        assert recorder.wait(10)
+        # 预录线程继续采集，环形缓冲区被新数据覆盖
+        time.sleep(0.4)
+        blocks = list(subscription)
+    finally:
+        recorder.disarm()
+
+    recorded = read_float_wav(path, 2)
+    assert recorder.last_error is None
+    assert len(recorded) == int(48000 * 0.5)
+    received = np.concatenate([block.data for block in blocks])
+    assert blocks[0].frame == 0
+    np.testing.assert_array_equal(received, recorded)
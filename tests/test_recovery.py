@@ -0,0 +1,122 @@
+"""
+WAV修复测试
+截断写好的文件或模拟崩溃（文件头未回填），修复后核对文件头长度和恢复出的PCM数据
+"""
+
+import struct
+import wave
+
+import numpy as np
+
+from core import recovery, wavwriter
+from core.recovery import repair_wav
+from core.wavwriter import StreamingWavWriter
+
+
+def write_wav(path, signal, sample_format='int16', close=True):
+    """写入测试文件；close=False 时只落盘数据、不回填文件头（模拟进程崩溃）"""
+    writer = StreamingWavWriter(path, 48000, signal.shape[1], sample_format)
+    for start in range(0, len(signal), 256):
+        writer.write(signal[start:start + 256])
+    if close:
+        writer.close()
+    else:
+        writer._file.flush()
+    return writer
+
+
+def header_sizes(path):
+    """读出 RIFF 长度、各块长度和 data 块起始位置"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    riff_id, riff_size, _ = struct.unpack_from('<4sI4s', content, 0)
+    sizes = {}
+    offset = 12
+    while True:
+        chunk_id, size = struct.unpack_from('<4sI', content, offset)
+        sizes[chunk_id] = (size, offset + 8)
+        if chunk_id == b'data':
+            break
+        offset += 8 + size + size % 2
+    return riff_id, riff_size, sizes, content
+
+
+def make_signal(frames, channels=2):
+    rng = np.random.default_rng(7)
+    return rng.uniform(-0.9, 0.9, (frames, channels)).astype(np.float32)
+
+
+def test_repairs_truncated_file(tmp_path):
+    """截断到半帧处：丢弃不完整的帧，回填长度，前面的PCM保持不变"""
+    path = str(tmp_path / 'cut.wav')
+    write_wav(path, make_signal(2000))
+    with wave.open(path, 'rb') as wav:
+        original = wav.readframes(2000)
+    _, _, sizes, content = header_sizes(path)
+    data_offset = sizes[b'data'][1]
+
+    # 截在第1500帧中间（每帧4字节）
+    cut = data_offset + 1500 * 4 + 3
+    with open(path, 'r+b') as f:
+        f.truncate(cut)
+
+    result = repair_wav(path)
+    assert result['frames'] == 1500
+    assert result['data_bytes'] == 1500 * 4
+    assert result['truncated_bytes'] == 3
+    assert result['format'] == 'RIFF'
+
+    riff_id, riff_size, sizes, content = header_sizes(path)
+    assert riff_id == b'RIFF'
+    assert len(content) == data_offset + 1500 * 4
+    assert riff_size == len(content) - 8
+    assert sizes[b'data'] == (1500 * 4, data_offset)
+    assert sizes[b'JUNK'][0] == wavwriter.DS64_SIZE
+
+    with wave.open(path, 'rb') as wav:
+        assert wav.getnframes() == 1500
+        assert wav.readframes(1500) == original[:1500 * 4]
+
+
+def test_repairs_unclosed_float_file(tmp_path):
+    """崩溃时文件头仍是占位长度：按实际大小回填 RIFF/data/fact"""
+    path = str(tmp_path / 'crash.wav')
+    signal = make_signal(1234, channels=1)
+    writer = write_wav(path, signal, 'float32', close=False)
+    try:
+        _, _, sizes, _ = header_sizes(path)
+        assert sizes[b'data'][0] == 0
+
+        result = repair_wav(path)
+    finally:
+        writer._file.close()
+    assert result['frames'] == 1234
+
+    _, riff_size, sizes, content = header_sizes(path)
+    assert riff_size == len(content) - 8
+    assert sizes[b'data'][0] == 1234 * 4
+    fact_offset = sizes[b'fact'][1]
+    assert struct.unpack_from('<I', content, fact_offset)[0] == 1234
+    data_offset = sizes[b'data'][1]
+    recovered = np.frombuffer(content[data_offset:], dtype='<f4')
+    np.testing.assert_array_equal(recovered, signal[:, 0])
+
+
+def test_repair_upgrades_to_rf64_past_limit(tmp_path, monkeypatch):
+    """恢复出的数据超过上限时，把JUNK占位块改写为ds64"""
+    monkeypatch.setattr(wavwriter, 'RIFF_MAX_SIZE', 1000)
+    monkeypatch.setattr(recovery, 'RIFF_MAX_SIZE', 1000)
+    path = str(tmp_path / 'large.wav')
+    writer = write_wav(path, make_signal(600), close=False)
+    try:
+        result = repair_wav(path)
+    finally:
+        writer._file.close()
+    assert result['format'] == 'RF64'
+
+    riff_id, riff_size, sizes, content = header_sizes(path)
+    assert riff_id == b'RF64'
+    assert riff_size == 1000
+    assert sizes[b'data'][0] == 1000
+    ds64_offset = sizes[b'ds64'][1]
+    assert struct.unpack_from('<QQQ', content, ds64_offset) == (len(content) - 8, 600 * 4, 600)
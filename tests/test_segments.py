@@ -0,0 +1,92 @@
+"""
+分段录制测试
+轮转在精确的帧位置切开：各分段帧数之和等于输入，边界处没有重复或缺失的采样
+"""
+
+import datetime
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from core.segments import SegmentedWavWriter
+
+START_TIME = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_signal(frames, channels=2):
+    """每个采样取值唯一的 int16 信号，便于逐帧核对"""
+    return np.arange(frames * channels, dtype=np.int16).reshape(frames, channels)
+
+
+def read_segment(path, channels=2):
+    with wave.open(path, 'rb') as f:
+        assert f.getnchannels() == channels
+        return np.frombuffer(f.readframes(f.getnframes()), dtype='<i2').reshape(-1, channels)
+
+
+def write_blocks(writer, signal, block_sizes):
+    """按给定的块大小循环切分输入并写入"""
+    start = 0
+    sizes = iter(block_sizes)
+    while start < len(signal):
+        size = next(sizes)
+        writer.write(signal[start:start + size])
+        start += size
+
+
+@pytest.mark.parametrize('block_sizes', [
+    [100] * 20,  # 块大小整除分段长度
+    [37, 263, 1, 499, 250, 1000] * 4,  # 块跨越边界，或一个块覆盖多个分段
+])
+def test_rotation_is_gapless(tmp_path, block_sizes):
+    samplerate, segment_frames, total = 1000, 250, 1733
+    signal = make_signal(total)
+    closed = []
+    writer = SegmentedWavWriter(str(tmp_path / 'rec.wav'), samplerate, 2, START_TIME, '%H%M%S',
+                                max_seconds=segment_frames / samplerate, on_segment=closed.append)
+    assert writer.segment_frames == segment_frames
+    write_blocks(writer, signal, block_sizes)
+    writer.close()
+
+    assert writer.frames_written == total
+    assert closed == writer.segments
+    assert len(writer.segments) == -(-total // segment_frames)
+    parts = [read_segment(path) for path in writer.segments]
+    assert [len(p) for p in parts] == [segment_frames] * (len(parts) - 1) + [total % segment_frames]
+    # 拼接后与输入逐采样一致：边界处既不重复也不缺失
+    assert np.array_equal(np.concatenate(parts), signal)
+    # 索引记录的起始帧与各分段长度一致
+    assert [start for start, _, _ in writer.index] == list(range(0, total, segment_frames))
+
+
+def test_segment_names_follow_audio_time(tmp_path):
+    """分段文件名中的时间按已写入帧数推算"""
+    writer = SegmentedWavWriter(str(tmp_path / 'rec.wav'), 1000, 2, START_TIME, '%H%M%S',
+                                max_seconds=60)
+    writer.write(make_signal(150_000) * 0)
+    writer.close()
+    names = [os.path.basename(path) for path in writer.segments]
+    assert names == ['rec_120000_001.wav', 'rec_120100_002.wav', 'rec_120200_003.wav']
+
+
+def test_rotation_by_size_is_gapless(tmp_path):
+    """按文件大小轮转时同样无缝，且每个分段不超过大小上限"""
+    max_bytes = 128 + 4 * 300
+    signal = make_signal(1000)
+    writer = SegmentedWavWriter(str(tmp_path / 'rec.wav'), 1000, 2, START_TIME, '%H%M%S',
+                                max_bytes=max_bytes)
+    assert writer.segment_frames == 300
+    write_blocks(writer, signal, [128] * 10)
+    writer.close()
+    parts = [read_segment(path) for path in writer.segments]
+    assert [len(p) for p in parts] == [300, 300, 300, 100]
+    assert np.array_equal(np.concatenate(parts), signal)
+    for path in writer.segments:
+        assert os.path.getsize(path) <= max_bytes
+
+
+def test_requires_a_limit(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentedWavWriter(str(tmp_path / 'rec.wav'), 1000, 2, START_TIME, '%H%M%S')
@@ -0,0 +1,90 @@
+"""
+实时推流测试
+监听端逐块解析WAV头，并用 StreamingWavWriter 保存，浮点推流得到正确的格式标签
+"""
+
+import io
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core import AudioRecorder, SyntheticBackend
+from core.pcm import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM
+from core.streaming import LiveStreamServer, StreamEncoder, _read_wav_header, main
+
+
+def parse_wav(path):
+    """读出 RIFF 标识、各块内容和 data 数据"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    riff_id = content[:4]
+    chunks = {}
+    offset = 12
+    while offset + 8 <= len(content):
+        chunk_id, size = struct.unpack_from('<4sI', content, offset)
+        chunks[chunk_id] = content[offset + 8:offset + 8 + size]
+        offset += 8 + size + size % 2
+    return riff_id, chunks
+
+
+@pytest.mark.parametrize('sample_format', ['int16', 'int24', 'float32'])
+def test_header_parsed_by_chunks(sample_format):
+    """推流头中 fmt 之前夹带其他块、fmt 带 cbSize 时仍能找到 data 块的起点"""
+    encoder = StreamEncoder(48000, 2, sample_format)
+    header = encoder.header()
+    # 在 fmt 块之前插入一个奇数长度的 LIST 块（需要补齐字节）
+    extra = struct.pack('<4sI', b'LIST', 5) + b'INFOx' + b'\x00'
+    payload = header[:12] + extra + header[12:] + b'\x01\x02'
+    stream = io.BytesIO(payload)
+
+    info = _read_wav_header(stream)
+    assert info['sample_format'] == sample_format
+    assert info['samplerate'] == 48000
+    assert info['channels'] == 2
+    assert stream.read() == b'\x01\x02'
+
+
+def test_truncated_header_raises():
+    """WAV头没传完就中断时报错，而不是把头部当作PCM数据"""
+    header = StreamEncoder(48000, 1).header()
+    with pytest.raises(RuntimeError):
+        _read_wav_header(io.BytesIO(header[:30]))
+
+
+@pytest.mark.parametrize('sample_format, format_tag', [('float32', WAVE_FORMAT_IEEE_FLOAT),
+                                                       ('int16', WAVE_FORMAT_PCM)])
+def test_main_saves_stream_with_matching_format(tmp_path, sample_format, format_tag):
+    """监听端入口保存的文件格式标签、fact 块和数据长度与推流一致"""
+    recorder = AudioRecorder(SyntheticBackend(channels=2, realtime=True))
+    recorder.set_output_file(str(tmp_path / 'source.wav'))
+    server = LiveStreamServer(recorder, 'http', '127.0.0.1', 0, sample_format=sample_format)
+    server.start()
+    output = str(tmp_path / 'copy.wav')
+    listener = threading.Thread(target=main, args=([server.url, '--seconds', '0.25', '--output', output],))
+    try:
+        listener.start()
+        time.sleep(0.2)
+        recorder.start_recording(48000)
+        listener.join(10)
+        recorder.stop_recording()
+        recorder.wait()
+    finally:
+        server.stop()
+    assert not listener.is_alive()
+
+    riff_id, chunks = parse_wav(output)
+    assert riff_id == b'RIFF'
+    fmt_tag, channels, samplerate = struct.unpack_from('<HHI', chunks[b'fmt '])
+    assert (fmt_tag, channels, samplerate) == (format_tag, 2, 48000)
+    frames = int(0.25 * 48000)
+    sampwidth = 4 if sample_format == 'float32' else 2
+    assert len(chunks[b'data']) == frames * 2 * sampwidth
+    if sample_format == 'float32':
+        assert struct.unpack('<I', chunks[b'fact'])[0] == frames
+        samples = np.frombuffer(chunks[b'data'], dtype='<f4')
+        assert 0 < np.abs(samples).max() <= 1.0
+    else:
+        assert b'fact' not in chunks
@@ -0,0 +1,127 @@
+"""
+WAV增量写入测试
+通过调低 RIFF_MAX_SIZE 模拟超过4GB的录音，验证RF64/BW64升级和ds64中的真实长度
+"""
+
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from core import wavwriter
+from core.wavwriter import DS64_SIZE, StreamingWavWriter
+
+
+def read_chunks(path):
+    """解析文件头：返回 (RIFF标识, RIFF长度, [(块标识, 长度, 内容起始位置)])"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    riff_id, riff_size, wave_id = struct.unpack_from('<4sI4s', content, 0)
+    assert wave_id == b'WAVE'
+    chunks = []
+    offset = 12
+    while offset + 8 <= len(content):
+        chunk_id, size = struct.unpack_from('<4sI', content, offset)
+        chunks.append((chunk_id, size, offset + 8))
+        if chunk_id == b'data':
+            break
+        offset += 8 + size + size % 2
+    return riff_id, riff_size, chunks, content
+
+
+def make_signal(frames, channels=2):
+    """可逐帧核对的确定性信号"""
+    ramp = np.arange(frames * channels, dtype=np.float32).reshape(frames, channels)
+    return (ramp % 200 - 100) / 128
+
+
+@pytest.mark.parametrize('large_format', ['RF64', 'BW64'])
+def test_upgrades_to_large_format_past_limit(tmp_path, monkeypatch, large_format):
+    """超过上限时改写为RF64/BW64，ds64记录真实的RIFF/data长度和帧数"""
+    monkeypatch.setattr(wavwriter, 'RIFF_MAX_SIZE', 1000)
+    path = str(tmp_path / 'large.wav')
+    signal = make_signal(600)
+    with StreamingWavWriter(path, 48000, 2, 'int16', large_file_format=large_format) as writer:
+        for start in range(0, len(signal), 128):
+            writer.write(signal[start:start + 128])
+        data_offset = writer.data_offset
+
+    riff_id, riff_size, chunks, content = read_chunks(path)
+    ids = [chunk[0] for chunk in chunks]
+    assert riff_id == large_format.encode('ascii')
+    assert riff_size == 1000
+    assert ids == [b'ds64', b'fmt ', b'data']
+
+    data_bytes = 600 * 2 * 2
+    _, ds64_size, ds64_offset = chunks[0]
+    assert ds64_size == DS64_SIZE
+    ds64_riff, ds64_data, ds64_frames, table = struct.unpack_from('<QQQI', content, ds64_offset)
+    assert ds64_riff == len(content) - 8
+    assert ds64_data == data_bytes
+    assert ds64_frames == 600
+    assert table == 0
+
+    _, data_size, offset = chunks[-1]
+    assert data_size == 1000
+    assert offset == data_offset
+    assert len(content) == data_offset + data_bytes
+
+
+def test_float_large_file_marks_fact_chunk(tmp_path, monkeypatch):
+    """浮点格式升级后 fact 块中的32位帧数同样置为上限值"""
+    monkeypatch.setattr(wavwriter, 'RIFF_MAX_SIZE', 1000)
+    path = str(tmp_path / 'large_float.wav')
+    with StreamingWavWriter(path, 48000, 1, 'float32') as writer:
+        writer.write(make_signal(500, channels=1))
+
+    riff_id, _, chunks, content = read_chunks(path)
+    assert riff_id == b'RF64'
+    assert [chunk[0] for chunk in chunks] == [b'ds64', b'fmt ', b'fact', b'data']
+    _, _, fact_offset = chunks[2]
+    assert struct.unpack_from('<I', content, fact_offset)[0] == 1000
+    _, _, ds64_offset = chunks[0]
+    assert struct.unpack_from('<QQQ', content, ds64_offset)[1:] == (500 * 4, 500)
+
+
+def test_stays_riff_under_limit(tmp_path):
+    """未超过上限时保持经典RIFF，ds64位置保留为JUNK占位块，标准库可以直接读取"""
+    path = str(tmp_path / 'small.wav')
+    signal = make_signal(1000)
+    with StreamingWavWriter(path, 44100, 2, 'int16') as writer:
+        writer.write(signal)
+
+    riff_id, riff_size, chunks, content = read_chunks(path)
+    assert riff_id == b'RIFF'
+    assert riff_size == len(content) - 8
+    assert [chunk[0] for chunk in chunks] == [b'JUNK', b'fmt ', b'data']
+    _, junk_size, junk_offset = chunks[0]
+    assert junk_size == DS64_SIZE
+    assert content[junk_offset:junk_offset + DS64_SIZE] == bytes(DS64_SIZE)
+    assert chunks[-1][1] == 1000 * 2 * 2
+
+    with wave.open(path, 'rb') as wav:
+        assert wav.getnframes() == 1000
+        assert wav.getnchannels() == 2
+        assert wav.getframerate() == 44100
+        pcm = np.frombuffer(wav.readframes(1000), dtype='<i2').reshape(-1, 2)
+    expected = np.clip(np.round(signal * 32767), -32768, 32767).astype(np.int16)
+    assert np.abs(pcm.astype(np.int32) - expected).max() <= 1
+
+
+def test_classic_wav_refuses_to_exceed_limit(tmp_path, monkeypatch):
+    """关闭大文件格式时不写JUNK块，超过上限直接报错"""
+    monkeypatch.setattr(wavwriter, 'RIFF_MAX_SIZE', 1000)
+    path = str(tmp_path / 'classic.wav')
+    writer = StreamingWavWriter(path, 48000, 2, 'int16', large_file_format=None)
+    try:
+        writer.write(make_signal(100))
+        with pytest.raises(RuntimeError):
+            writer.write(make_signal(200))
+    finally:
+        writer.close()
+
+    riff_id, _, chunks, _ = read_chunks(path)
+    assert riff_id == b'RIFF'
+    assert [chunk[0] for chunk in chunks] == [b'fmt ', b'data']
+    assert chunks[-1][1] == 100 * 2 * 2
@@ -6,32 +6,87 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
-from typing import Optional
-from core.recorder import AudioRecorder
+import threading
+from typing import Optional, TYPE_CHECKING
+from config import AUDIO_CONFIG, UI_CONFIG
+
+if TYPE_CHECKING:
+    # 录制核心依赖 numpy / soundcard，在后台线程中才导入，避免拖慢首帧
+    from core.recorder import AudioRecorder
 
 
 class ModernGUI:
     """现代化GUI界面类"""
     
+    METER_BAR_HEIGHT = 12  # 电平表每个通道的高度（像素）
+    WAVEFORM_HEIGHT = 96  # 波形视图的高度（像素）
+    WAVEFORM_ZOOM_STEP = 1.5  # 滚轮每格的缩放倍数
+    
     def __init__(self, master: tk.Tk):
         self.master = master
-        self.recorder = AudioRecorder()
+        self.recorder: Optional['AudioRecorder'] = None
         
         # UI状态变量
         self.recording = False
         self.output_file: Optional[str] = None
         self.topmost_var = tk.BooleanVar(value=True)  # 提前初始化
+        self._poll_job: Optional[str] = None  # 状态轮询的 after() 任务
+        
+        # 波形视图：显示录制中/刚结束的录音，或打开的 .peaks 文件；视图区间为None时显示全部
+        self.waveform_peaks = None
+        self._wave_view: Optional[tuple] = None
+        self._wave_drag: Optional[tuple] = None
         
         self.setup_window()
         self.setup_styles()
         self.create_widgets()
         self.setup_layout()
+        
+        # 窗口先绘制，音频模块在后台加载和初始化
+        self._recorder_result = None
+        threading.Thread(target=self._load_recorder, name="recorder-init", daemon=True).start()
+        self.master.after(50, self._check_recorder_ready)
+    
+    def _load_recorder(self):
+        """后台线程：导入录制核心并初始化音频设备（不触碰任何Tk对象）"""
+        try:
+            from core.recorder import AudioRecorder
+            recorder = AudioRecorder()
+            self._recorder_result = (recorder, recorder.get_cached_rates(), None)
+        except Exception as e:
+            self._recorder_result = (None, None, e)
+    
+    def _check_recorder_ready(self):
+        """界面线程：轮询后台初始化结果，就绪后填充设备信息"""
+        if self._recorder_result is None:
+            self.master.after(50, self._check_recorder_ready)
+            return
+        
+        recorder, cached_rates, error = self._recorder_result
+        if error is not None:
+            self.device_name_var.set(" 初始化失败")
+            self.status_var.set("⚠️ 音频设备不可用")
+            messagebox.showerror("错误", f"初始化音频设备失败: {error}")
+            return
+        
+        self.recorder = recorder
+        device_info = recorder.get_device_info()
+        self.device_name_var.set(f" {device_info['name']}")
+        self.device_channels_var.set(f" {device_info['channels']}")
+        if cached_rates:
+            self._set_rates(cached_rates)
+        self.start_button.config(state=tk.NORMAL)
+        self.preroll_check.config(state=tk.NORMAL)
+        
+        # 后台刷新设备能力缓存，完成后更新采样率列表
+        recorder.refresh_device_capabilities(self._on_rates_probed)
+        self.master.after(200, self._apply_probed_rates)
     
     def setup_window(self):
         """设置窗口属性"""
         self.master.title("🎧 扬声器录制工具 Pro")
-        self.master.geometry("540x540")  # 进一步增加窗口尺寸
-        self.master.minsize(540, 540)    # 设置最小尺寸
+        self.master.geometry("540x820")  # 进一步增加窗口尺寸（含波形视图）
+        self.master.minsize(540, 820)    # 设置最小尺寸
         self.master.resizable(True, True)  # 允许调整大小
         # 窗口置顶默认开启
         self.master.attributes('-topmost', True)
@@ -83,6 +138,7 @@ class ModernGUI:
         self.create_settings_section()
         self.create_control_section()
         self.create_status_section()
+        self.create_waveform_section()
         self.create_file_section()
     
     def create_menu_bar(self):
@@ -95,6 +151,7 @@ class ModernGUI:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="文件", menu=file_menu)
         file_menu.add_command(label="选择保存位置", command=self.select_save_location)
+        file_menu.add_command(label="打开波形...", command=self.open_waveform)
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.master.quit)
         
@@ -141,15 +198,16 @@ class ModernGUI:
         name_frame = ttk.Frame(info_frame)
         name_frame.pack(fill=tk.X, pady=3)  # 增加垂直间距
         ttk.Label(name_frame, text="设备名称:", style='Header.TLabel').pack(side=tk.LEFT)
-        device_info = self.recorder.get_device_info()
-        ttk.Label(name_frame, text=f" {device_info['name']}", 
+        self.device_name_var = tk.StringVar(value=" 正在初始化...")
+        ttk.Label(name_frame, textvariable=self.device_name_var, 
                  style='Status.TLabel').pack(side=tk.LEFT)
         
         # 通道数
         channel_frame = ttk.Frame(info_frame)
         channel_frame.pack(fill=tk.X, pady=3)  # 增加垂直间距
         ttk.Label(channel_frame, text="最大通道数:", style='Header.TLabel').pack(side=tk.LEFT)
-        ttk.Label(channel_frame, text=f" {device_info['channels']}", 
+        self.device_channels_var = tk.StringVar(value=" -")
+        ttk.Label(channel_frame, textvariable=self.device_channels_var, 
                  style='Status.TLabel').pack(side=tk.LEFT)
     
     def create_settings_section(self):
@@ -163,7 +221,8 @@ class ModernGUI:
         rate_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(rate_frame, text="采样率:", style='Header.TLabel').pack(side=tk.LEFT)
-        supported_rates = self.recorder.detect_supported_rates()
+        # 设备就绪前先给出常用采样率，随后以缓存/探测结果替换
+        supported_rates = [44100, 48000]
         self.rate_var = tk.StringVar(value=str(supported_rates[0]) if supported_rates else "48000")
         self.rate_combo = ttk.Combobox(rate_frame, textvariable=self.rate_var, 
                                       values=[str(rate) for rate in supported_rates],
@@ -173,8 +232,57 @@ class ModernGUI:
         # 单位标签
         ttk.Label(rate_frame, text="Hz", style='Status.TLabel').pack(side=tk.LEFT, padx=(5, 0))
         
+        self._probed_rates = None
+        
+        # 块时长选择（决定停止延迟和进度刷新间隔）
+        block_frame = ttk.Frame(settings_frame)
+        block_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(block_frame, text="块时长:", style='Header.TLabel').pack(side=tk.LEFT)
+        block_values = [str(int(d * 1000)) for d in AUDIO_CONFIG['block_durations']]
+        self.block_var = tk.StringVar(value=str(int(AUDIO_CONFIG['blocksize_factor'] * 1000)))
+        self.block_combo = ttk.Combobox(block_frame, textvariable=self.block_var,
+                                       values=block_values,
+                                       state="readonly", width=12, font=('微软雅黑', 9))
+        self.block_combo.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(block_frame, text="ms", style='Status.TLabel').pack(side=tk.LEFT, padx=(5, 0))
+        
+        # 预录：持续缓存最近N秒，开始录制时放在录音开头
+        preroll_frame = ttk.Frame(settings_frame)
+        preroll_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(preroll_frame, text="预录:", style='Header.TLabel').pack(side=tk.LEFT)
+        self.preroll_var = tk.BooleanVar(value=False)
+        self.preroll_check = ttk.Checkbutton(preroll_frame,
+                                            text=f"开始录制时包含之前 {AUDIO_CONFIG['preroll_seconds']} 秒",
+                                            variable=self.preroll_var, command=self.toggle_preroll,
+                                            state=tk.DISABLED)
+        self.preroll_check.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # 预录状态下修改采样率或块时长需要重新开始预录
+        self.rate_combo.bind('<<ComboboxSelected>>', lambda event: self._rearm())
+        self.block_combo.bind('<<ComboboxSelected>>', lambda event: self._rearm())
+        
         # 注意：窗口置顶选项已移动到菜单栏
     
+    def _on_rates_probed(self, rates):
+        """后台探测完成（运行在探测线程中，只记录结果）"""
+        self._probed_rates = rates
+    
+    def _apply_probed_rates(self):
+        """在界面线程中应用探测结果"""
+        rates = self._probed_rates
+        if rates is None:
+            self.master.after(200, self._apply_probed_rates)
+            return
+        self._set_rates(rates)
+    
+    def _set_rates(self, rates):
+        """更新采样率下拉列表"""
+        self.rate_combo.config(values=[str(rate) for rate in rates])
+        if self.rate_var.get() not in [str(rate) for rate in rates]:
+            self.rate_var.set(str(rates[0]))
+    
     def create_control_section(self):
         """创建控制按钮区域"""
         control_frame = ttk.Frame(self.main_container)
@@ -187,6 +295,7 @@ class ModernGUI:
         # 开始录制按钮
         self.start_button = ttk.Button(button_container, text="● 开始录制", 
                                       command=self.start_recording,
+                                      state=tk.DISABLED,  # 音频设备就绪后启用
                                       style='Record.TButton')
         self.start_button.pack(side=tk.LEFT, padx=(0, 15))  # 增加按钮间距
         
@@ -227,6 +336,160 @@ class ModernGUI:
         self.progress_bar = ttk.Progressbar(status_frame, mode='indeterminate',
                                           style='Recording.Horizontal.TProgressbar')
         self.progress_bar.pack(fill=tk.X, pady=(10, 0))
+        
+        # 电平表：每个通道一行，填充为RMS，竖线为峰值，削波时整行变红
+        meter_row = ttk.Frame(status_frame)
+        meter_row.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(meter_row, text="电平:", style='Header.TLabel').pack(side=tk.LEFT, anchor=tk.N)
+        self.meter_canvas = tk.Canvas(meter_row, height=self.METER_BAR_HEIGHT * 2 + 4,
+                                      background='#ecf0f1', highlightthickness=0)
+        self.meter_canvas.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+        self.meter_var = tk.StringVar(value="-- dBFS")
+        ttk.Label(status_frame, textvariable=self.meter_var,
+                  style='Status.TLabel').pack(anchor=tk.E, pady=(4, 0))
+    
+    def update_meter(self, peak, rms, clips):
+        """按电平读数重绘电平表（界面线程调用）"""
+        from core.meter import METER_FLOOR_DB, to_dbfs
+        
+        canvas = self.meter_canvas
+        canvas.delete('all')
+        width = max(1, canvas.winfo_width())
+        height = self.METER_BAR_HEIGHT
+        canvas.config(height=height * max(1, len(peak)) + 4)
+        
+        def x_of(value):
+            # dB刻度：METER_FLOOR_DB 对应左端，0 dBFS 对应右端
+            return width * (1 - to_dbfs(value) / METER_FLOOR_DB)
+        
+        for ch, (p, r) in enumerate(zip(peak, rms)):
+            top = ch * height + 2
+            color = '#e74c3c' if clips[ch] else ('#f39c12' if to_dbfs(p) > -6 else '#27ae60')
+            canvas.create_rectangle(0, top, x_of(r), top + height - 2, fill=color, width=0)
+            canvas.create_line(x_of(p), top, x_of(p), top + height - 2, fill='#2c3e50', width=2)
+        
+        if peak:
+            peak_db = max(to_dbfs(p) for p in peak)
+            clip_text = f"  削波 {sum(clips)}" if any(clips) else ""
+            self.meter_var.set(f"峰值 {peak_db:.1f} dBFS{clip_text}")
+        else:
+            self.meter_var.set("-- dBFS")
+    
+    def create_waveform_section(self):
+        """创建波形视图区域：滚轮缩放、拖动平移、双击显示全部"""
+        wave_frame = ttk.LabelFrame(self.main_container, text="〰️ 波形", padding="12")
+        wave_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        self.wave_canvas = tk.Canvas(wave_frame, height=self.WAVEFORM_HEIGHT,
+                                     background='#ecf0f1', highlightthickness=0)
+        self.wave_canvas.pack(fill=tk.X)
+        self.wave_var = tk.StringVar(value="录制时显示波形；滚轮缩放，拖动平移，双击显示全部")
+        ttk.Label(wave_frame, textvariable=self.wave_var,
+                  style='Status.TLabel').pack(anchor=tk.W, pady=(4, 0))
+        
+        canvas = self.wave_canvas
+        canvas.bind('<Configure>', lambda event: self.draw_waveform())
+        canvas.bind('<MouseWheel>', lambda event: self._zoom_waveform(event.x, event.delta > 0))
+        canvas.bind('<Button-4>', lambda event: self._zoom_waveform(event.x, True))  # X11 滚轮
+        canvas.bind('<Button-5>', lambda event: self._zoom_waveform(event.x, False))
+        canvas.bind('<ButtonPress-1>', self._start_wave_drag)
+        canvas.bind('<B1-Motion>', self._drag_waveform)
+        canvas.bind('<Double-Button-1>', lambda event: self._fit_waveform())
+    
+    def _wave_range(self) -> tuple:
+        """当前显示的帧区间；未缩放时为整段录音"""
+        peaks = self.waveform_peaks
+        if self._wave_view is not None:
+            return self._wave_view
+        return 0, max(1, peaks.frames if peaks is not None else 1)
+    
+    def _zoom_waveform(self, x: int, zoom_in: bool):
+        """以鼠标位置为中心缩放"""
+        peaks = self.waveform_peaks
+        if peaks is None or not peaks.frames:
+            return
+        start, end = self._wave_range()
+        width = max(1, self.wave_canvas.winfo_width())
+        anchor = start + (end - start) * x / width
+        span = (end - start) / self.WAVEFORM_ZOOM_STEP if zoom_in else (end - start) * self.WAVEFORM_ZOOM_STEP
+        # 最多放大到每像素一帧，缩小到整段录音为止
+        span = min(max(span, width), peaks.frames)
+        start = min(max(0.0, anchor - span * x / width), peaks.frames - span)
+        self._wave_view = None if span >= peaks.frames else (start, start + span)
+        self.draw_waveform()
+    
+    def _start_wave_drag(self, event):
+        self._wave_drag = (event.x, self._wave_range())
+    
+    def _drag_waveform(self, event):
+        """拖动平移（只在放大时有效）"""
+        peaks = self.waveform_peaks
+        if peaks is None or self._wave_view is None or self._wave_drag is None:
+            return
+        x0, (start, end) = self._wave_drag
+        span = end - start
+        shift = (x0 - event.x) * span / max(1, self.wave_canvas.winfo_width())
+        start = min(max(0.0, start + shift), max(0.0, peaks.frames - span))
+        self._wave_view = (start, start + span)
+        self.draw_waveform()
+    
+    def _fit_waveform(self):
+        self._wave_view = None
+        self.draw_waveform()
+    
+    def draw_waveform(self):
+        """按当前视图区间重绘波形：每个通道一条 最小/最大值 包络和一条 RMS 包络，耗时与录音时长无关"""
+        from core.peaks import MIN, MAX, RMS
+        
+        canvas = self.wave_canvas
+        canvas.delete('all')
+        peaks = self.waveform_peaks
+        if peaks is None or not peaks.frames:
+            return
+        width = max(1, canvas.winfo_width())
+        height = self.WAVEFORM_HEIGHT
+        start, end = self._wave_range()
+        columns = peaks.render(int(start), int(end), width)
+        lane = height / peaks.channels
+        xs = list(range(width)) + list(range(width - 1, -1, -1))
+        
+        for ch in range(peaks.channels):
+            middle = lane * ch + lane / 2
+            scale = lane / 2 - 1
+            for upper, lower, color in ((MAX, MIN, '#7fb3d5'), (RMS, None, '#2471a3')):
+                top = columns[:, ch, upper]
+                bottom = columns[:, ch, lower] if lower is not None else -top
+                ys = list(middle - top * scale) + list((middle - bottom * scale)[::-1])
+                canvas.create_polygon([v for xy in zip(xs, ys) for v in xy], fill=color, outline=color)
+            canvas.create_line(0, middle, width, middle, fill='#bdc3c7')
+        
+        rate = peaks.samplerate
+        self.wave_var.set(f"{self._format_seconds(start / rate)} - {self._format_seconds(end / rate)}"
+                          f"  （共 {self._format_seconds(peaks.frames / rate)}）")
+    
+    @staticmethod
+    def _format_seconds(seconds: float) -> str:
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(int(minutes), 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+    
+    def open_waveform(self):
+        """打开录音的峰值伴随文件（可直接选择WAV文件，自动查找同名的 .peaks）"""
+        if self.recording:
+            return
+        file_path = filedialog.askopenfilename(
+            filetypes=[("峰值/WAV 文件", "*.peaks *.wav"), ("All files", "*.*")],
+            title="打开波形"
+        )
+        if not file_path:
+            return
+        try:
+            from core.peaks import PeakPyramid, peak_file_path
+            self.waveform_peaks = PeakPyramid.load(peak_file_path(file_path))
+        except Exception as e:
+            messagebox.showerror("错误", f"打开波形失败（录制时需启用峰值文件）: {e}")
+            return
+        self._fit_waveform()
     
     def create_file_section(self):
         """创建文件操作区域"""
@@ -256,6 +519,27 @@ class ModernGUI:
         self.master.columnconfigure(0, weight=1)
         self.master.rowconfigure(0, weight=1)
     
+    def toggle_preroll(self):
+        """切换预录状态"""
+        if self.recorder is None:
+            return
+        if self.preroll_var.get():
+            self._rearm()
+        else:
+            self.recorder.disarm()
+    
+    def _rearm(self):
+        """按当前采样率和块时长重新开始预录"""
+        if self.recorder is None or not self.preroll_var.get() or self.recording:
+            return
+        try:
+            self.recorder.disarm()
+            self.recorder.set_block_duration(int(self.block_var.get()) / 1000)
+            self.recorder.arm(int(self.rate_var.get()), AUDIO_CONFIG['preroll_seconds'])
+        except Exception as e:
+            self.preroll_var.set(False)
+            messagebox.showerror("错误", f"开始预录失败: {e}")
+    
     def toggle_topmost(self):
         """切换窗口置顶状态"""
         self.master.attributes('-topmost', self.topmost_var.get())
@@ -269,14 +553,16 @@ class ModernGUI:
         )
         if file_path:
             self.output_file = file_path
-            self.recorder.set_output_file(file_path)
+            if self.recorder:
+                self.recorder.set_output_file(file_path)
             self.file_var.set(os.path.basename(file_path))
     
     def start_recording(self):
         """开始录制"""
-        if not self.recording:
+        if not self.recording and self.recorder:
             try:
                 samplerate = int(self.rate_var.get())
+                self.recorder.set_block_duration(int(self.block_var.get()) / 1000)
                 self.recording = True
                 self.update_ui_state()
                 
@@ -285,9 +571,14 @@ class ModernGUI:
                     self.recorder.set_output_file(self.output_file)
                 
                 # 开始录制
-                success = self.recorder.start_recording(samplerate, self.update_progress)
+                # 不向录制线程传入界面回调，改由界面线程定时轮询状态快照
+                success = self.recorder.start_recording(samplerate)
                 if not success:
                     raise RuntimeError("无法开始录制")
+                self.waveform_peaks = None
+                self._wave_view = None
+                self._cancel_poll()
+                self._schedule_poll()
                     
             except Exception as e:
                 self.recording = False
@@ -302,9 +593,70 @@ class ModernGUI:
                 if success:
                     self.recording = False
                     self.update_ui_state()
+                    self._schedule_finish()
             except Exception as e:
                 messagebox.showerror("错误", f"停止录制失败: {e}")
     
+    def _schedule_poll(self):
+        """按固定频率安排下一次状态轮询"""
+        self._poll_job = self.master.after(UI_CONFIG['refresh_ms'], self._poll_status)
+    
+    def _schedule_finish(self):
+        """录制停止后等待收尾（排空流水线、落盘）完成"""
+        self._poll_job = self.master.after(UI_CONFIG['refresh_ms'], self._poll_finish)
+    
+    def _poll_finish(self):
+        """界面线程：收尾完成后最后刷新一次波形并显示结果（不阻塞界面，未完成时稍后再查）"""
+        self._poll_job = None
+        if self.recording or self.recorder is None:
+            return
+        if not self.recorder.wait(0):
+            self._schedule_finish()
+            return
+        # 每级最后一个不完整的点在峰值阶段关闭（flush）时才生成
+        self.waveform_peaks = self.recorder.peaks
+        self.draw_waveform()
+        self._report_result()
+    
+    def _report_result(self):
+        """收尾完成后显示录制结果：出错时显示错误，否则显示保存完成消息"""
+        error = self.recorder.last_error
+        if error:
+            self.status_var.set("⚠️ 录制出错")
+            messagebox.showerror("错误", f"录制过程中出现错误:\n{error}")
+            return
+        file_path = self.recorder.last_saved_file
+        if file_path and os.path.exists(file_path):
+            file_size = os.path.getsize(file_path) // 1024
+            messagebox.showinfo("🎉 完成",
+                              f"文件已成功保存为:\n{file_path}\n\n文件大小: {file_size} KB")
+    
+    def _cancel_poll(self):
+        """停止状态轮询"""
+        if self._poll_job is not None:
+            self.master.after_cancel(self._poll_job)
+            self._poll_job = None
+    
+    def _poll_status(self):
+        """界面线程：读取录制状态快照并刷新显示（每次只取最新状态，不会积压）"""
+        self._poll_job = None
+        if not self.recording or self.recorder is None:
+            return
+        status = self.recorder.get_status()
+        self.update_progress(status.elapsed)
+        self.update_meter(status.peak, status.rms, status.clips)
+        # 峰值在写入线程中生成，录制中始终显示整段录音
+        self.waveform_peaks = self.recorder.peaks
+        self._wave_view = None
+        self.draw_waveform()
+        if not status.recording:
+            # 来源结束或采集出错，录制线程已自行停止
+            self.recording = False
+            self.update_ui_state()
+            self._schedule_finish()
+            return
+        self._schedule_poll()
+    
     def update_progress(self, elapsed_seconds: float):
         """更新录制进度显示"""
         if self.recording:
@@ -325,24 +677,20 @@ class ModernGUI:
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.rate_combo.config(state=tk.DISABLED)
-            self.topmost_check.config(state=tk.DISABLED)
+            self.block_combo.config(state=tk.DISABLED)
+            self.preroll_check.config(state=tk.DISABLED)
         else:
+            self._cancel_poll()
             self.status_var.set("🟢 就绪")
             self.progress_bar.stop()
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
             self.rate_combo.config(state="readonly")
-            self.topmost_check.config(state=tk.NORMAL)
+            self.block_combo.config(state="readonly")
+            self.preroll_check.config(state=tk.NORMAL)
             # 重置状态显示
             self.progress_var.set("00:00:00")
-            
-            # 显示保存完成消息
-            if hasattr(self.recorder, '_last_saved_file'):
-                file_path = getattr(self.recorder, '_last_saved_file', '')
-                if file_path:
-                    file_size = os.path.getsize(file_path) // 1024
-                    messagebox.showinfo("🎉 完成", 
-                                      f"文件已成功保存为:\n{file_path}\n\n文件大小: {file_size} KB")
+            self.update_meter((), (), ())
     
     def show_about(self):
         """显示关于对话框"""